@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Seeded generator of synthetic VMaaS datasets.
+
+Generates CVEs, errata, repositories and package version chains in the fixture
+format of the fake server (see ``vmaas.fake.server``). Every package name gets a
+chain of versions in repositories of one RHEL major release; the first version is
+the base package, every later one is released by an erratum issued after the
+errata of the previous versions. Security errata fix CVEs published before them.
+The same seed and sizes always produce the same dataset.
+"""
+
+import bisect
+import datetime
+import gzip
+import json
+import random
+
+
+FIRST_CVE_YEAR = 2002
+LAST_YEAR = 2024
+FIRST_ERRATUM_YEAR = 2010
+
+MAJORS = (6, 7, 8, 9)
+VARIANTS = ('server', 'workstation', 'desktop', 'hpc-node')
+CHANNELS = ('', '-optional', '-extras', '-supplementary', '-rh-common')
+BASEARCHES = ('x86_64', 'ppc64le', 's390x')
+ARCHES = ('x86_64', 'x86_64', 'x86_64', 'noarch', 'i686')
+
+IMPACTS = ('NotSet', 'Low', 'Moderate', 'Important', 'Critical')
+IMPACT_WEIGHTS = (5, 20, 45, 25, 5)
+ERRATA_TYPES = (('RHSA', 'security', 40), ('RHBA', 'bugfix', 45), ('RHEA', 'enhancement', 15))
+# five digit sequence numbers of errata are used since 2014
+LONG_ERRATUM_YEAR = 2014
+# errata names are drawn at random, more than half of all possible names would
+# make almost every draw collide with already used one
+MAX_ERRATA = len(ERRATA_TYPES) * (
+    (LONG_ERRATUM_YEAR - FIRST_ERRATUM_YEAR) * 9999 +
+    (LAST_YEAR + 1 - LONG_ERRATUM_YEAR) * 99999) // 2
+
+_PREFIXES = ('', '', '', 'lib', 'python3-', 'perl-', 'golang-', 'rubygem-')
+_SUFFIXES = ('', '', '', '-devel', '-libs', '-common', '-tools', '-doc')
+_ONSETS = ('b', 'c', 'd', 'f', 'g', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'x', 'z',
+           'st', 'tr', 'gl', 'br')
+_NUCLEI = ('a', 'e', 'i', 'o', 'u', 'y')
+
+
+def _date(rng, start, end):
+    """Returns random datetime between two dates."""
+    span = int((end - start).total_seconds())
+    return start + datetime.timedelta(seconds=rng.randrange(span))
+
+
+def _year_start(year):
+    return datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def gen_cves(rng, num):
+    """Returns dict of CVEs and list of ``(public_date, name)`` sorted by date."""
+    cves = {}
+    dated = []
+    years = list(range(FIRST_CVE_YEAR, LAST_YEAR + 1))
+    # later years have more CVEs
+    weights = [year - FIRST_CVE_YEAR + 1 for year in years]
+    while len(cves) < num:
+        year = rng.choices(years, weights)[0]
+        # long sequence numbers are used since 2014
+        top = 9999 if year < 2014 or rng.random() < 0.8 else 1999999
+        name = 'CVE-{}-{:04d}'.format(year, rng.randint(1, top))
+        if name in cves:
+            continue
+        public = _date(rng, _year_start(year), _year_start(year + 1))
+        modified = min(public + datetime.timedelta(days=rng.expovariate(1 / 90)),
+                       _year_start(LAST_YEAR + 1))
+        impact = rng.choices(IMPACTS, IMPACT_WEIGHTS)[0]
+        cves[name] = {
+            'impact': impact,
+            'public_date': public.isoformat(),
+            'modified_date': modified.isoformat(),
+            'synopsis': name,
+            'description': 'Synthetic vulnerability {}.'.format(name),
+            'redhat_url': 'https://access.redhat.com/security/cve/{}'.format(name.lower()),
+            'secondary_url': '',
+            'cvss3_score': '' if impact == 'NotSet' else '{:.3f}'.format(
+                rng.randint(10, 100) / 10),
+            'cwe_list': ['CWE-{}'.format(rng.randint(20, 900))
+                         for __ in range(rng.choice((0, 1, 1, 2)))],
+        }
+        dated.append((public, name))
+    dated.sort()
+    return cves, dated
+
+
+def gen_repos(rng, num):
+    """Returns dict of repositories and dict of their labels per major release."""
+    combos = [(major, variant, channel)
+              for major in MAJORS for variant in VARIANTS for channel in CHANNELS]
+    rng.shuffle(combos)
+    repos = {}
+    by_major = {}
+    for index in range(num):
+        if index < len(combos):
+            major, variant, channel = combos[index]
+            label = 'rhel-{}-{}{}-rpms'.format(major, variant, channel)
+        else:
+            major, variant = rng.choice(MAJORS), rng.choice(VARIANTS)
+            label = 'rhel-{}-{}-custom-{}-rpms'.format(major, variant, index)
+        releasever = '{}{}'.format(major, variant.split('-')[0].capitalize())
+        repos[label] = [{
+            'product': 'Red Hat Enterprise Linux {}'.format(major),
+            'releasever': releasever,
+            'name': 'Red Hat Enterprise Linux {} {} (RPMs)'.format(major, variant.capitalize()),
+            'url': 'https://cdn.example.com/content/dist/rhel/{}/{}/{}/os/'.format(
+                variant, releasever, basearch),
+            'basearch': basearch,
+            'revision': _date(rng, _year_start(LAST_YEAR), _year_start(LAST_YEAR + 1)).isoformat(),
+            'label': label,
+        } for basearch in BASEARCHES[:rng.choice((1, 1, 2, 3))]]
+        by_major.setdefault(major, []).append(label)
+    return repos, by_major
+
+
+def _package_name(rng, used):
+    while True:
+        core = ''.join(rng.choice(_ONSETS) + rng.choice(_NUCLEI)
+                       for __ in range(rng.randint(1, 3)))
+        name = rng.choice(_PREFIXES) + core + rng.choice(_SUFFIXES)
+        if name not in used:
+            used.add(name)
+            return name
+
+
+def _nevra(name, epoch, version, release, arch):
+    if epoch:
+        return '{}-{}:{}-{}.{}'.format(name, epoch, version, release, arch)
+    return '{}-{}-{}.{}'.format(name, version, release, arch)
+
+
+def gen_chains(rng, num, majors, max_versions):
+    """Returns list of ``(major, arch, [nevra, ...])`` version chains, oldest first."""
+    used = set()
+    chains = []
+    for __ in range(num):
+        name = _package_name(rng, used)
+        major = rng.choice(majors)
+        arch = rng.choice(ARCHES)
+        epoch = rng.choice((None,) * 8 + (1, 2))
+        version = [rng.randint(0, 5), rng.randint(0, 20), rng.randint(0, 30)]
+        release = rng.randint(1, 30)
+        z_stream = None
+        nevras = []
+        for __ in range(rng.randint(1, max_versions)):
+            if z_stream is None:
+                dist = 'el{}'.format(major)
+            else:
+                dist = 'el{}_{}.{}'.format(major, z_stream[0], z_stream[1])
+            nevras.append(_nevra(name, epoch, '.'.join(str(part) for part in version),
+                                 '{}.{}'.format(release, dist), arch))
+            bump = rng.random()
+            if bump < 0.2:
+                version[2] += 1
+                release, z_stream = 1, None
+            elif bump < 0.5:
+                release += rng.randint(1, 5)
+                z_stream = None
+            else:
+                # z-stream update of the same release
+                z_stream = (rng.randint(1, 9), 1) if z_stream is None else \
+                    (z_stream[0], z_stream[1] + 1)
+        chains.append((major, arch, nevras))
+    return chains
+
+
+def _gen_errata_headers(rng, num):
+    """Returns list of ``(issued, name, type)`` sorted by issue date."""
+    headers = []
+    used = set()
+    types = [item[:2] for item in ERRATA_TYPES]
+    weights = [item[2] for item in ERRATA_TYPES]
+    while len(headers) < num:
+        prefix, errata_type = rng.choices(types, weights)[0]
+        issued = _date(rng, _year_start(FIRST_ERRATUM_YEAR), _year_start(LAST_YEAR + 1))
+        long_sequence = issued.year >= LONG_ERRATUM_YEAR
+        top = 99999 if long_sequence and rng.random() < 0.2 else 9999
+        name = '{}-{}:{:04d}'.format(prefix, issued.year, rng.randint(1, top))
+        if name in used and long_sequence:
+            # short sequence numbers of the year run out with many errata
+            name = '{}-{}:{:04d}'.format(prefix, issued.year, rng.randint(1, 99999))
+        if name in used:
+            continue
+        used.add(name)
+        headers.append((issued, name, errata_type))
+    headers.sort()
+    return headers
+
+
+def gen_errata(rng, num, chains, dated_cves, max_cves):
+    """Returns dict of errata and dict of errata of every updated NEVRA."""
+    headers = _gen_errata_headers(rng, num)
+    package_lists = [[] for __ in headers]
+    nevra_errata = {}
+    for __, __, nevras in chains:
+        updates = nevras[1:]
+        if not updates or not headers:
+            continue
+        # later versions are released by later errata
+        for index, nevra in zip(sorted(rng.sample(range(len(headers)),
+                                                  min(len(updates), len(headers)))), updates):
+            package_lists[index].append(nevra)
+            nevra_errata[nevra] = [headers[index][1]]
+
+    dates = [public for public, __ in dated_cves]
+    errata = {}
+    for (issued, name, errata_type), package_list in zip(headers, package_lists):
+        cve_list = []
+        severity = 'None'
+        if errata_type == 'security' and dated_cves:
+            # only CVEs published before the erratum
+            known = bisect.bisect_right(dates, issued) or len(dated_cves)
+            cve_list = sorted({dated_cves[rng.randrange(known)][1]
+                               for __ in range(rng.randint(1, max_cves))})
+            severity = rng.choices(IMPACTS[1:], IMPACT_WEIGHTS[1:])[0]
+        component = package_list[0].rsplit('-', 2)[0] if package_list else 'component'
+        synopsis = '{}{} {} update'.format(
+            severity + ': ' if errata_type == 'security' else '', component, errata_type)
+        updated = min(issued + datetime.timedelta(days=rng.expovariate(1 / 30)),
+                      _year_start(LAST_YEAR + 1))
+        errata[name] = {
+            'updated': updated.isoformat(),
+            'severity': severity,
+            'reference_list': ['https://access.redhat.com/articles/{}'.format(
+                rng.randint(10000, 999999))],
+            'issued': issued.isoformat(),
+            'description': 'Synthetic {} erratum {}.'.format(errata_type, name),
+            'solution': 'Install the updated packages.',
+            'summary': synopsis,
+            'url': 'https://access.redhat.com/errata/{}'.format(name),
+            'synopsis': synopsis,
+            'cve_list': cve_list,
+            'bugzilla_list': [str(rng.randint(1000000, 2000000))
+                              for __ in range(rng.randint(0, 3))],
+            'package_list': sorted(package_list),
+            'type': errata_type,
+        }
+    return errata, nevra_errata
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def generate(seed, cves=1000, errata=500, packages=1000, repos=20, max_versions=5,
+             max_cves=5):
+    """Generates dataset in the fake server fixture format.
+
+    Args:
+        seed: Seed of the generator
+        cves: Number of CVEs
+        errata: Number of errata
+        packages: Number of package names, every one with a chain of versions
+        repos: Number of repository labels
+        max_versions: Maximum length of package version chain
+        max_cves: Maximum number of CVEs fixed by one security erratum
+
+    Raises:
+        ValueError: More than ``MAX_ERRATA`` errata requested.
+    """
+    if errata > MAX_ERRATA:
+        raise ValueError('At most {} errata can be generated'.format(MAX_ERRATA))
+    rng = random.Random(seed)
+    cve_data, dated_cves = gen_cves(rng, cves)
+    repo_data, labels_by_major = gen_repos(rng, max(repos, 1))
+    chains = gen_chains(rng, packages, sorted(labels_by_major), max_versions)
+    errata_data, nevra_errata = gen_errata(rng, errata, chains, dated_cves, max_cves)
+
+    package_data = {}
+    for major, __, nevras in chains:
+        labels = labels_by_major[major]
+        # base channel (first label) plus a few more channels of the same release
+        repositories = sorted(set([labels[0]] + rng.sample(labels, rng.randint(0, min(
+            2, len(labels))))))
+        name = nevras[0].rsplit('-', 2)[0]
+        for nevra in nevras:
+            package_data[nevra] = {
+                'summary': 'Synthetic package {}'.format(name),
+                'description': 'Package {} generated for scale testing.'.format(name),
+                'errata': nevra_errata.get(nevra, []),
+                'repositories': repositories,
+            }
+
+    exported = _year_start(LAST_YEAR + 1).isoformat()
+    return {
+        'cves': cve_data,
+        'errata': errata_data,
+        'repos': repo_data,
+        'packages': package_data,
+        'dbchange': {
+            'cve_changes': exported,
+            'errata_changes': exported,
+            'exported': exported,
+            'last_change': exported,
+            'repository_changes': exported,
+        },
+    }
+
+
+def base_packages(fixture):
+    """Returns NEVRAs of packages not released by any erratum, i.e. oldest versions."""
+    return sorted(nevra for nevra, item in fixture['packages'].items() if not item['errata'])
+
+
+def write_fixture(fixture, path):
+    """Writes fixture as JSON, gzipped when path ends with ``.gz``."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as output_file:
+        json.dump(fixture, output_file, separators=(',', ':'))
@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+"""
+In-process fake VMaaS server.
+
+Serves the query API (``cves``, ``errata``, ``repos``, ``updates``, ``dbchange``,
+``version``) and the sync API out of a fixture file, so the REST client, validators
+and perf tools can be run without a synced VMaaS database. Latency of responses can
+be injected.
+
+Fixture is a JSON file (gzipped when its name ends with ``.gz``) with mappings:
+
+* ``cves`` - CVE name to CVE data as returned by ``/cves``
+* ``errata`` - erratum name to erratum data as returned by ``/errata``
+* ``repos`` - repository label to list of repositories as returned by ``/repos``
+* ``packages`` - NEVRA to ``{"summary", "description", "errata", "repositories"}``,
+  the package is an update released by the errata in the repositories
+* ``dbchange`` - optional initial timestamps as returned by ``/dbchange``
+
+Like VMaaS, a list with single CVE, erratum or repository is matched as a regular
+expression. Syncs only move ``dbchange`` timestamps (and reload the fixture file)
+after ``sync_duration`` seconds.
+"""
+
+import bisect
+import datetime
+import gzip
+import http.server
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+from vmaas.utils import nevra
+
+
+API_PREFIX = '/api/v1/'
+
+DEFAULT_PAGE_SIZE = 5000
+
+VERSION = 'fake'
+
+# names of sync tasks started by sync endpoints
+SYNC_TASKS = {
+    'sync': 'All',
+    'sync/cve': 'CVE',
+    'sync/cvemap': 'CVE map',
+    'sync/repo': 'Repo',
+    'sync/export': 'Export',
+}
+
+# ``dbchange`` timestamps moved by each sync endpoint
+SYNC_CHANGES = {
+    'sync': ('cve_changes', 'exported', 'last_change'),
+    'sync/cve': ('cve_changes', 'exported', 'last_change'),
+    'sync/cvemap': ('cve_changes', 'exported', 'last_change'),
+    'sync/repo': ('exported', 'last_change'),
+    'sync/export': ('exported',),
+}
+
+DBCHANGE_KEYS = ('cve_changes', 'errata_changes', 'exported', 'last_change',
+                 'repository_changes')
+
+_CVE_DEFAULTS = {
+    'impact': 'NotSet',
+    'public_date': '',
+    'description': '',
+    'modified_date': '',
+    'redhat_url': '',
+    'cvss3_score': '',
+    'secondary_url': '',
+    'cwe_list': [],
+}
+
+_ERRATUM_DEFAULTS = {
+    'updated': '',
+    'severity': 'None',
+    'reference_list': [],
+    'issued': '',
+    'description': '',
+    'solution': None,
+    'summary': None,
+    'url': '',
+    'cve_list': [],
+    'bugzilla_list': [],
+    'package_list': [],
+    'type': 'bugfix',
+}
+
+_REPO_DEFAULTS = {
+    'product': '',
+    'releasever': '',
+    'name': '',
+    'url': '',
+    'basearch': '',
+    'revision': '',
+}
+
+
+class BadRequest(Exception):
+    """Request rejected with status 400 and plain text message."""
+
+
+def now():
+    """Returns current time with timezone."""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def parse_date(value):
+    """Parses ISO 8601 date with timezone; raises ``BadRequest`` for other values."""
+    try:
+        date = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise BadRequest('Wrong date format (not ISO format with timezone): {}'.format(value))
+    if date.tzinfo is None:
+        raise BadRequest('Wrong date format (not ISO format with timezone): {}'.format(value))
+    return date
+
+
+def _fixture_date(value):
+    try:
+        return parse_date(value) if value else None
+    except BadRequest:
+        return None
+
+
+def load_fixture(path):
+    """Loads fixture data from JSON file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as input_file:
+        return json.load(input_file)
+
+
+def _nevra_key(parsed):
+    return parsed.name, parsed.epoch or 0, parsed.version, parsed.release, parsed.arch
+
+
+class Dataset(object):
+    """Fixture data indexed for answering queries.
+
+    Args:
+        data: Fixture content
+    """
+    def __init__(self, data):
+        self.cves = {}
+        self.cve_modified = {}
+        for name, item in data.get('cves', {}).items():
+            self.cves[name] = dict(_CVE_DEFAULTS, synopsis=name)
+            self.cves[name].update(item)
+            self.cve_modified[name] = _fixture_date(self.cves[name]['modified_date'])
+
+        self.errata = {}
+        self.errata_modified = {}
+        for name, item in data.get('errata', {}).items():
+            self.errata[name] = dict(_ERRATUM_DEFAULTS, synopsis=name)
+            self.errata[name].update(item)
+            self.errata_modified[name] = _fixture_date(self.errata[name]['updated'])
+
+        self.repos = {}
+        for label, items in data.get('repos', {}).items():
+            self.repos[label] = []
+            for item in items:
+                repo = dict(_REPO_DEFAULTS, label=label)
+                repo.update(item)
+                self.repos[label].append(repo)
+
+        # package name to updates sorted by EVR and their sort keys
+        self.updates = {}
+        self.update_keys = {}
+        self.packages = {}
+        by_name = {}
+        for package, item in data.get('packages', {}).items():
+            parsed = nevra.parse_nevra(package)
+            by_name.setdefault(parsed.name, []).append((parsed, package, item))
+            self.packages[_nevra_key(parsed)] = item
+        for name, updates in by_name.items():
+            updates.sort(key=lambda update: nevra.evr_key(update[0][1:4]))
+            self.updates[name] = updates
+            self.update_keys[name] = [nevra.evr_key(update[0][1:4]) for update in updates]
+
+        timestamp = now().isoformat()
+        self.dbchange = {key: timestamp for key in DBCHANGE_KEYS}
+        self.dbchange.update(data.get('dbchange', {}))
+
+    @classmethod
+    def load(cls, path):
+        """Creates dataset out of fixture file."""
+        return cls(load_fixture(path))
+
+    def _repo_matches(self, labels, releasever, basearch):
+        for label in labels:
+            for repo in self.repos.get(label, ()):
+                if releasever and repo['releasever'] != releasever:
+                    continue
+                if basearch and repo['basearch'] != basearch:
+                    continue
+                yield repo
+
+    def package_updates(self, package, repositories=None, releasever=None, basearch=None,
+                        modified_since=None):
+        """Returns updates of installed package as returned in ``update_list``."""
+        # pylint: disable=too-many-arguments
+        try:
+            installed = nevra.parse_nevra(package)
+        except ValueError:
+            return {}
+        if installed.name not in self.updates:
+            return {}
+        updates = self.updates[installed.name]
+        start = bisect.bisect_right(
+            self.update_keys[installed.name], nevra.evr_key(installed[1:4]))
+        available = []
+        for parsed, name, item in updates[start:]:
+            if parsed.arch != installed.arch and 'noarch' not in (parsed.arch, installed.arch):
+                continue
+            labels = item.get('repositories', [])
+            if repositories is not None:
+                labels = [label for label in labels if label in repositories]
+            for erratum in item.get('errata', []):
+                updated = self.errata_modified.get(erratum)
+                if modified_since and (updated is None or updated < modified_since):
+                    continue
+                for repo in self._repo_matches(labels, releasever, basearch):
+                    available.append({
+                        'package': name,
+                        'erratum': erratum,
+                        'repository': repo['label'],
+                        'basearch': repo['basearch'],
+                        'releasever': repo['releasever'],
+                    })
+        info = self.packages.get(_nevra_key(installed)) or updates[-1][2]
+        return {
+            'available_updates': available,
+            'description': info.get('description', ''),
+            'summary': info.get('summary', ''),
+        }
+
+
+def _match(names, available):
+    """Returns sorted names of items matching the requested names.
+
+    Single name is matched as a regular expression against the whole item name.
+    """
+    if not isinstance(names, list) or not names or \
+            not all(isinstance(name, str) for name in names):
+        raise BadRequest('List of names expected')
+    if len(names) > 1:
+        return sorted(name for name in set(names) if name in available)
+    if names[0] in available:
+        return [names[0]]
+    try:
+        regex = re.compile(names[0])
+    except re.error as err:
+        raise BadRequest('Invalid regular expression: {}'.format(err))
+    return sorted(name for name in available if regex.fullmatch(name))
+
+
+def _page_param(body, key, default):
+    value = body.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BadRequest('{} must be a number'.format(key))
+    if math.isnan(value) or value < 1:
+        return default
+    return int(value)
+
+
+def paginate(names, body):
+    """Returns names on requested page and pagination fields of the response."""
+    page = _page_param(body, 'page', 1)
+    page_size = _page_param(body, 'page_size', DEFAULT_PAGE_SIZE)
+    start = (page - 1) * page_size
+    pagination = {
+        'page': page,
+        'page_size': page_size,
+        'pages': int(math.ceil(len(names) / page_size)),
+    }
+    return names[start:start + page_size], pagination
+
+
+# pylint: disable=too-many-instance-attributes
+class FakeServer(object):
+    """Fake VMaaS server running in background threads.
+
+    Args:
+        fixture: Path to fixture file or ``Dataset``
+        host: Address to listen on
+        port: Port of the query API, ``0`` picks a free one
+        sync_port: Port of the sync API, ``None`` serves the sync API on ``port`` only
+        latency: Seconds added to every response
+        jitter: Maximum seconds randomly added to or subtracted from ``latency``
+        item_latency: Seconds added for every requested item (package, CVE, ...)
+        sync_duration: Seconds after which a started sync finishes
+        seed: Seed of the jitter
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, fixture, host='127.0.0.1', port=0, sync_port=None, latency=0.0,
+                 jitter=0.0, item_latency=0.0, sync_duration=1.0, seed=None):
+        self.fixture = None if isinstance(fixture, Dataset) else fixture
+        self.dataset = fixture if self.fixture is None else Dataset.load(fixture)
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.item_latency = item_latency
+        self.sync_duration = sync_duration
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sync = None
+        self._servers = [self._http_server(port)]
+        if sync_port is not None:
+            self._servers.append(self._http_server(sync_port))
+        self._threads = []
+
+    def _http_server(self, port):
+        handler = type('Handler', (_Handler,), {'fake': self})
+        return http.server.ThreadingHTTPServer((self.host, port), handler)
+
+    @property
+    def port(self):
+        """Port of the query API."""
+        return self._servers[0].server_address[1]
+
+    @property
+    def sync_port(self):
+        """Port of the sync API."""
+        return self._servers[-1].server_address[1]
+
+    def start(self):
+        """Starts serving in background threads."""
+        for server in self._servers:
+            thread = threading.Thread(target=server.serve_forever, name='fake-vmaas',
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stops serving and closes sockets."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        return self
+
+    def delay(self, items=1):
+        """Sleeps for injected latency of request with ``items`` requested items."""
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        delay = self.latency + jitter + self.item_latency * items
+        if delay > 0:
+            time.sleep(delay)
+
+    def start_sync(self, endpoint):
+        """Starts sync; returns ``False`` when another sync is in progress."""
+        with self._lock:
+            if self._sync is not None and self._sync.is_alive():
+                return False
+            self._sync = threading.Timer(self.sync_duration, self._finish_sync, (endpoint,))
+            self._sync.daemon = True
+            self._sync.start()
+        return True
+
+    def _finish_sync(self, endpoint):
+        dataset = self.dataset
+        if self.fixture is not None and endpoint in ('sync', 'sync/repo'):
+            dataset = Dataset.load(self.fixture)
+            dataset.dbchange = dict(self.dataset.dbchange)
+        timestamp = now().isoformat()
+        for key in SYNC_CHANGES[endpoint]:
+            dataset.dbchange[key] = timestamp
+        self.dataset = dataset
+
+    # query API handlers return ``(status, body)`` for requested items
+
+    def cves(self, body):
+        """Handles ``/cves``."""
+        dataset = self.dataset
+        names = _match(body.get('cve_list'), dataset.cves)
+        response = {}
+        if body.get('modified_since'):
+            since = parse_date(body['modified_since'])
+            names = [name for name in names if dataset.cve_modified[name] and
+                     dataset.cve_modified[name] >= since]
+            response['modified_since'] = body['modified_since']
+        names, pagination = paginate(names, body)
+        response['cve_list'] = {name: dataset.cves[name] for name in names}
+        response.update(pagination)
+        return response
+
+    def errata(self, body):
+        """Handles ``/errata``."""
+        dataset = self.dataset
+        names = _match(body.get('errata_list'), dataset.errata)
+        response = {}
+        if body.get('modified_since'):
+            since = parse_date(body['modified_since'])
+            names = [name for name in names if dataset.errata_modified[name] and
+                     dataset.errata_modified[name] >= since]
+            response['modified_since'] = body['modified_since']
+        names, pagination = paginate(names, body)
+        response['errata_list'] = {name: dataset.errata[name] for name in names}
+        response.update(pagination)
+        return response
+
+    def repos(self, body):
+        """Handles ``/repos``."""
+        dataset = self.dataset
+        names, pagination = paginate(_match(body.get('repository_list'), dataset.repos), body)
+        response = {'repository_list': {name: dataset.repos[name] for name in names}}
+        response.update(pagination)
+        return response
+
+    def updates(self, body):
+        """Handles ``/updates``."""
+        packages = body.get('package_list')
+        if not isinstance(packages, list) or not packages:
+            raise BadRequest('package_list must be a non-empty list')
+        repositories = body.get('repository_list')
+        since = parse_date(body['modified_since']) if body.get('modified_since') else None
+        response = {}
+        for key in ('repository_list', 'releasever', 'basearch', 'modified_since'):
+            if body.get(key):
+                response[key] = body[key]
+        dataset = self.dataset
+        response['update_list'] = {
+            package: dataset.package_updates(
+                package, repositories, body.get('releasever'), body.get('basearch'), since)
+            for package in packages if isinstance(package, str)
+        }
+        return response
+
+
+# list keys of POST bodies and endpoints accepting them
+_QUERY_ENDPOINTS = {
+    'cves': 'cve_list',
+    'errata': 'errata_list',
+    'repos': 'repository_list',
+    'updates': 'package_list',
+}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Routes requests to ``FakeServer`` set as ``fake`` class attribute."""
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in one write on flush after the request is handled;
+    # small writes on keep-alive connection would otherwise wait for delayed ACK
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    fake = None
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        if content_type == 'application/json':
+            data = json.dumps(body).encode('utf-8')
+        else:
+            data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(data.decode('utf-8')) if data else {}
+        except ValueError:
+            raise BadRequest('Request body is not JSON')
+        if not isinstance(body, dict):
+            raise BadRequest('Request body must be JSON object')
+        return body
+
+    def _endpoint(self):
+        path = self.path.split('?', 1)[0]
+        if not path.startswith(API_PREFIX):
+            return None, None
+        endpoint, __, item = path[len(API_PREFIX):].rstrip('/').partition('/')
+        return endpoint, urllib.parse.unquote(item)
+
+    def _query(self, endpoint, body):
+        list_key = _QUERY_ENDPOINTS[endpoint]
+        items = body.get(list_key)
+        self.fake.delay(len(items) if isinstance(items, list) else 1)
+        try:
+            self._send(200, getattr(self.fake, endpoint)(body))
+        except BadRequest as err:
+            self._send(400, str(err), 'text/plain')
+
+    def _sync(self, path):
+        self.fake.delay()
+        if self.fake.start_sync(path):
+            self._send(200, {
+                'msg': '{} sync task started.'.format(SYNC_TASKS[path]), 'success': True})
+        else:
+            self._send(429, {'msg': 'Another sync task already in progress', 'success': False})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handles GET requests."""
+        endpoint, item = self._endpoint()
+        if endpoint in _QUERY_ENDPOINTS:
+            if not item:
+                self._send(405, 'Method not allowed', 'text/plain')
+                return
+            self._query(endpoint, {_QUERY_ENDPOINTS[endpoint]: [item]})
+        elif endpoint == 'dbchange' and not item:
+            self.fake.delay()
+            self._send(200, self.fake.dataset.dbchange)
+        elif endpoint == 'version' and not item:
+            self.fake.delay()
+            self._send(200, VERSION, 'text/plain')
+        elif endpoint == 'sync' and (not item or 'sync/' + item in SYNC_CHANGES):
+            self._sync('sync/' + item if item else 'sync')
+        else:
+            self._send(404, 'Not found', 'text/plain')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handles POST requests."""
+        endpoint, item = self._endpoint()
+        try:
+            body = self._read_body()
+        except BadRequest as err:
+            self._send(400, str(err), 'text/plain')
+            return
+        if endpoint in _QUERY_ENDPOINTS and not item:
+            self._query(endpoint, body)
+        elif endpoint == 'sync' and item == 'repo':
+            self._sync('sync/repo')
+        else:
+            self._send(404, 'Not found', 'text/plain')
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Structured perf baselines and regression detection.
+
+Baseline is a JSON file holding raw latency samples per endpoint together with
+throughput, error rates and data about the measured server.
+"""
+
+import collections
+import datetime
+import json
+import os
+
+from vmaas.perf import stats
+
+
+BASELINE_FORMAT = 1
+
+Comparison = collections.namedtuple(
+    'Comparison', 'endpoint old new p_value latency_change throughput_change'
+                  ' error_rate_change regressions')
+
+
+def get_server_info(server):
+    """Gets version and last export time of VMaaS server; unknown values are ``None``."""
+    # imported here so the perf tools don't need REST client deps unless baselines are used
+    from vmaas.rest.client import VMaaSClient
+
+    info = {'host': '{}:{}'.format(server.host, server.port), 'version': None, 'exported': None}
+    api = VMaaSClient(server.host, port=server.port)
+    try:
+        # pylint: disable=no-member
+        version = api.query_api.actions.get_version().body
+        if isinstance(version, bytes):
+            version = version.decode('utf-8', 'replace')
+        if isinstance(version, str):
+            info['version'] = version.strip() or None
+    except Exception:  # pylint: disable=broad-except
+        pass
+    try:
+        # pylint: disable=no-member
+        info['exported'] = api.get_dbchange().raw.body.get('exported')
+    except Exception:  # pylint: disable=broad-except
+        pass
+    return info
+
+
+def new_baseline(records, duration, server_info=None, label=None):
+    """Creates baseline out of request records.
+
+    Args:
+        records: Iterable of ``(endpoint, latency, ok)`` tuples; latency of failed
+            requests is not used
+        duration: Duration of the run in seconds
+        server_info: Data about measured server as returned by ``get_server_info``
+        label: Optional label of the run
+    """
+    endpoints = collections.OrderedDict()
+    for endpoint, latency, success in records:
+        data = endpoints.setdefault(endpoint, {'samples': [], 'errors': 0})
+        if success:
+            data['samples'].append(latency)
+        else:
+            data['errors'] += 1
+
+    for data in endpoints.values():
+        count = len(data['samples']) + data['errors']
+        data['count'] = count
+        data['throughput'] = len(data['samples']) / duration if duration else None
+        data['error_rate'] = data['errors'] / count if count else 0.0
+
+    return {
+        'format': BASELINE_FORMAT,
+        'created': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'label': label,
+        'server': server_info or {},
+        'duration': duration,
+        'endpoints': endpoints,
+    }
+
+
+def save(baseline, baseline_file):
+    """Saves baseline to file."""
+    dirname = os.path.dirname(baseline_file)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(baseline_file, 'w') as out:
+        json.dump(baseline, out, separators=(',', ':'))
+
+
+def load(baseline_file):
+    """Loads baseline from file."""
+    with open(baseline_file) as inp:
+        baseline = json.load(inp)
+    if baseline.get('format') != BASELINE_FORMAT:
+        raise ValueError('{}: unsupported baseline format {!r}'.format(
+            baseline_file, baseline.get('format')))
+    return baseline
+
+
+def _relative_change(old, new):
+    if not old or new is None:
+        return None
+    return new / old - 1
+
+
+def compare(old, new, threshold=0.1, alpha=0.01, error_threshold=0.01, percentile=50):
+    """Compares two baselines endpoint by endpoint.
+
+    Latency regression is reported when the new latency distribution is significantly
+    greater (one-sided Mann-Whitney U test with significance level ``alpha``) and
+    the selected latency percentile grew by more than ``threshold`` (relative).
+    Throughput regression is reported when throughput dropped by more than
+    ``threshold`` and error regression when error rate grew by more than
+    ``error_threshold`` (absolute).
+
+    Returns:
+        List of ``Comparison`` records, one for every endpoint present in both baselines.
+    """
+    key = 'p{}'.format(percentile)
+    comparisons = []
+    for endpoint, old_data in old['endpoints'].items():
+        new_data = new['endpoints'].get(endpoint)
+        if new_data is None:
+            continue
+        old_summary = stats.summarize(old_data['samples'])
+        new_summary = stats.summarize(new_data['samples'])
+        old_summary[key] = stats.percentile(sorted(old_data['samples']), percentile)
+        new_summary[key] = stats.percentile(sorted(new_data['samples']), percentile)
+        __, p_value = stats.mann_whitney_u(old_data['samples'], new_data['samples'])
+        latency_change = _relative_change(old_summary[key], new_summary[key])
+        throughput_change = _relative_change(old_data['throughput'], new_data['throughput'])
+        error_rate_change = new_data['error_rate'] - old_data['error_rate']
+
+        regressions = []
+        if p_value < alpha and latency_change is not None and latency_change > threshold:
+            regressions.append('latency')
+        if throughput_change is not None and throughput_change < -threshold:
+            regressions.append('throughput')
+        if error_rate_change > error_threshold:
+            regressions.append('errors')
+
+        comparisons.append(Comparison(
+            endpoint, old_summary, new_summary, p_value, latency_change,
+            throughput_change, error_rate_change, regressions))
+    return comparisons
+
+
+def _format_change(change):
+    return '-' if change is None else '{:+.1%}'.format(change)
+
+
+def print_comparison(old, new, comparisons, percentile=50):
+    """Prints comparison of two baselines."""
+    for name, baseline in (('old', old), ('new', new)):
+        server = baseline.get('server', {})
+        print('{}: {} (created {}, server version {}, exported {})'.format(
+            name, baseline.get('label') or '-', baseline.get('created'),
+            server.get('version'), server.get('exported')))
+    print()
+    key = 'p{}'.format(percentile)
+    print('{:<16} {:>10} {:>10} {:>9} {:>10} {:>11} {:>11}  {}'.format(
+        'endpoint', 'old ' + key, 'new ' + key, 'change', 'p-value', 'throughput',
+        'error rate', 'regressions'))
+    for comp in comparisons:
+        print('{:<16} {:>10} {:>10} {:>9} {:>10.2g} {:>11} {:>11}  {}'.format(
+            comp.endpoint,
+            '-' if comp.old.get(key) is None else '{:.2f}'.format(comp.old[key] * 1000),
+            '-' if comp.new.get(key) is None else '{:.2f}'.format(comp.new[key] * 1000),
+            _format_change(comp.latency_change),
+            comp.p_value,
+            _format_change(comp.throughput_change),
+            '{:+.2%}'.format(comp.error_rate_change),
+            ', '.join(comp.regressions) or '-'))
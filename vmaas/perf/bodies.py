@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Generated ``updates`` request bodies.
+
+Every body is derived only from the seed and its position, so bodies are reproducible
+and any of them can be generated independently of the others. Bodies are encoded as
+compact JSON; files needed by tsung are cached in directory named by hash of all inputs,
+so repeated runs with the same inputs skip the generation. Cached bodies not used for
+``max_age`` seconds are removed, as well as the least recently used ones when the cache
+grows over ``max_size`` bytes.
+"""
+
+import collections.abc
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from vmaas.perf import workload
+from vmaas.perf.http import encode_body
+
+
+# bump when generated bodies change for the same inputs
+FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'vmaas-perf', 'bodies')
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+DEFAULT_MAX_AGE = 14 * 24 * 3600
+# temporary directories of interrupted runs older than this are removed
+_TMP_MAX_AGE = 24 * 3600
+
+
+def body_rng(seed, index):
+    """Returns random generator for body on given position."""
+    return random.Random('{}:{}'.format(seed, index))
+
+
+def gen_body(selector, count, seed, index):
+    """Generates encoded body with ``count`` packages for given position."""
+    packages = selector.select(count, body_rng(seed, index))
+    return encode_body(workload.gen_packages_query(packages))
+
+
+class LazyBodies(collections.abc.Sequence):
+    """Bodies generated on first access and kept in memory."""
+    def __init__(self, selector, counts_list, seed):
+        self.selector = selector
+        self.counts_list = list(counts_list)
+        self.seed = seed
+        self._bodies = {}
+
+    def __len__(self):
+        return len(self.counts_list)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        body = self._bodies.get(index)
+        if body is None:
+            body = gen_body(self.selector, self.counts_list[index], self.seed, index)
+            self._bodies[index] = body
+        return body
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as data:
+        for chunk in iter(lambda: data.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inputs_digest(args, counts_list):
+    """Returns hash of all inputs of generated bodies.
+
+    Args:
+        args: Parsed workload selection options (see ``workload.add_arguments``)
+        counts_list: Number of packages in every body
+    """
+    if args.distribution == 'profile':
+        source = _file_digest(args.frequency_file)
+    else:
+        source = _file_digest(args.packages_file)
+    inputs = {
+        'format': FORMAT_VERSION,
+        'source': source,
+        'distribution': args.distribution,
+        'skew': args.zipf_skew if args.distribution == 'zipf' else None,
+        'seed': args.seed,
+        'counts': list(counts_list),
+        'filter': [args.arch, args.name_prefix, args.min_age, args.max_age],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _dir_size(path):
+    size = 0
+    for dirpath, __, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+    return size
+
+
+def evict(cache_dir, max_size=DEFAULT_MAX_SIZE, max_age=DEFAULT_MAX_AGE, keep=None):
+    """Removes cached bodies older than ``max_age`` and the least recently used ones
+    over ``max_size``; ``keep`` directory is never removed.
+
+    Returns:
+        Number of removed cache entries.
+    """
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return 0
+    now = time.time()
+    entries = []
+    removed = 0
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        if not os.path.isdir(path) or path == keep:
+            continue
+        try:
+            used = os.path.getmtime(path)
+        except OSError:
+            continue
+        if name.startswith('.tmp-'):
+            # other run could be generating bodies right now
+            if now - used > _TMP_MAX_AGE:
+                shutil.rmtree(path, ignore_errors=True)
+            continue
+        if now - used > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        else:
+            entries.append((used, path, _dir_size(path)))
+    total = sum(size for __, __, size in entries)
+    if keep is not None and os.path.isdir(keep):
+        total += _dir_size(keep)
+    for __, path, size in sorted(entries):
+        if total <= max_size:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def body_files(args, counts_list, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE,
+               max_age=DEFAULT_MAX_AGE):
+    """Returns files with generated bodies, generates them unless they are cached.
+
+    Returns:
+        Tuple of list of absolute file paths and flag whether they were cached.
+    """
+    target = os.path.abspath(os.path.join(cache_dir, inputs_digest(args, counts_list)))
+    files = [os.path.join(target, 'updates{}.json'.format(i)) for i in range(len(counts_list))]
+    if os.path.isdir(target):
+        # modification time of the directory marks its last use for eviction
+        os.utime(target)
+        evict(cache_dir, max_size, max_age, keep=target)
+        return files, True
+
+    selector = workload.get_selector(args)
+    os.makedirs(cache_dir, exist_ok=True)
+    # directory is renamed to its final name only when complete, so interrupted
+    # generation never leaves incomplete cache behind
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+    try:
+        for i, count in enumerate(counts_list):
+            with open(os.path.join(tmp_dir, os.path.basename(files[i])), 'wb') as out:
+                out.write(gen_body(selector, count, args.seed, i))
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            # other run could have generated the same bodies in the meantime
+            if not os.path.isdir(target):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict(cache_dir, max_size, max_age, keep=target)
+    return files, False
+
+
+def add_arguments(parser):
+    """Adds body cache options to argument parser."""
+    parser.add_argument('--bodies-cache', default=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help='Directory with cached generated request bodies, used only'
+                             ' with --seed (default: %(default)s)')
+    parser.add_argument('--bodies-cache-size', type=int, default=DEFAULT_MAX_SIZE // 1024 ** 2,
+                        metavar='MB',
+                        help='Maximal size of the bodies cache (default: %(default)s)')
+    parser.add_argument('--bodies-cache-age', type=float, default=DEFAULT_MAX_AGE / 86400,
+                        metavar='DAYS',
+                        help='Cached bodies unused for DAYS are removed (default: %(default)s)')
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Measurements of VMaaS server response cache.
+
+Every webapp process keeps its own response cache and a keep-alive connection
+is served by a single process. Bodies are therefore made warm by sending them
+over every connection used for measuring.
+
+Working set probe cycles through growing number of distinct bodies; once the number
+exceeds what a process can keep cached, most requests become misses and latency jumps.
+"""
+
+import asyncio
+import collections
+import time
+import uuid
+
+from vmaas.perf import stats
+from vmaas.perf.engine import UPDATES_PATH
+from vmaas.perf.histogram import Histogram
+from vmaas.perf.http import Connection, ConnectionPool, HTTPError, encode_body
+from vmaas.perf.workload import gen_packages_query
+
+
+WORKING_SET_SIZES = (10, 100, 1000, 10000)
+
+# requests faster than this multiple of median latency of the smallest working set
+# are considered cache hits
+HIT_FACTOR = 2.0
+
+WorkingSetResult = collections.namedtuple(
+    'WorkingSetResult', 'size histogram hit_fraction errors')
+
+
+def unique_bodies(selector, packages_num, count):
+    """Generates ``updates`` bodies never seen by the server before.
+
+    Besides selected packages every body contains one non-existent package with
+    unique name, so the body can't be cached from any previous run.
+    """
+    run_id = uuid.uuid4().hex
+    bodies = []
+    for num in range(count):
+        packages = selector.select(packages_num)
+        packages.append('perf-cold-{}-{}-0:1-1.noarch'.format(run_id, num))
+        bodies.append(encode_body(gen_packages_query(packages)))
+    return bodies
+
+
+class PhaseResult(object):
+    """Latency histogram, errors and duration of one measured phase."""
+    def __init__(self, name):
+        self.name = name
+        self.histogram = Histogram()
+        self.errors = 0
+        self.duration = 0.0
+
+    def summarize(self):
+        summary = self.histogram.summarize(self.duration)
+        summary['errors'] = self.errors
+        return summary
+
+
+async def _send_all(connections, bodies_per_connection, result=None):
+    """Sends bodies, every connection sends its own list of bodies sequentially."""
+    async def _connection_loop(conn, bodies):
+        for body in bodies:
+            start = time.monotonic()
+            try:
+                response = await conn.request('POST', UPDATES_PATH, body)
+            except (OSError, HTTPError, asyncio.TimeoutError):
+                if result is not None:
+                    result.errors += 1
+                continue
+            if result is None:
+                continue
+            if response.status < 400:
+                result.histogram.record(time.monotonic() - start)
+            else:
+                result.errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*[
+        _connection_loop(conn, bodies)
+        for conn, bodies in zip(connections, bodies_per_connection)])
+    if result is not None:
+        result.duration = time.monotonic() - started
+
+
+def _spread(bodies, connections_num, rounds=1):
+    """Spreads bodies over connections, every body is sent ``rounds`` times in total."""
+    per_connection = [[] for __ in range(connections_num)]
+    position = 0
+    for __ in range(rounds):
+        for body in bodies:
+            per_connection[position % connections_num].append(body)
+            position += 1
+    return per_connection
+
+
+async def _cold_warm(servers, bodies, connections_num, warm_rounds, timeout):
+    connections = [
+        Connection(servers[i % len(servers)].host, servers[i % len(servers)].port, timeout)
+        for i in range(connections_num)
+    ]
+    cold = PhaseResult('cold')
+    warm = PhaseResult('warm')
+    try:
+        # every body is sent exactly once, so the server has never seen it
+        await _send_all(connections, _spread(bodies, connections_num), cold)
+        # make the bodies cached in every process serving our connections
+        await _send_all(connections, [bodies] * connections_num)
+        await _send_all(connections, _spread(bodies, connections_num, warm_rounds), warm)
+    finally:
+        for conn in connections:
+            conn.close()
+    return cold, warm
+
+
+def run_cold_warm(servers, bodies, connections=10, warm_rounds=1, timeout=30):
+    """Measures the same unique bodies first with cold and then with warm cache.
+
+    Args:
+        servers: List of ``Server`` records
+        bodies: List of encoded ``updates`` request bodies never seen by the server
+        connections: Number of keep-alive connections
+        warm_rounds: How many times every body is sent in the warm phase
+        timeout: Timeout for single request in seconds
+
+    Returns:
+        Tuple of cold and warm ``PhaseResult``.
+    """
+    return asyncio.run(_cold_warm(servers, bodies, connections, warm_rounds, timeout))
+
+
+def print_cold_warm(cold, warm):
+    """Prints per phase report and contribution of the cache."""
+    print(stats.format_header('phase') + ' {:>10} {:>8}'.format('req/s', 'errors'))
+    for phase in (cold, warm):
+        summary = phase.summarize()
+        print(stats.format_summary(phase.name, summary) + ' {:>10.2f} {:>8}'.format(
+            summary.get('throughput', 0), summary['errors']))
+    print()
+    cold_summary = cold.summarize()
+    warm_summary = warm.summarize()
+    for key in ('mean', 'p50', 'p99'):
+        if cold_summary.get(key) and warm_summary.get(key):
+            print('Cache speedup ({}): {:.2f}x'.format(key, cold_summary[key] / warm_summary[key]))
+
+
+async def _probe(servers, bodies, rate, duration, connections, timeout):
+    pool = ConnectionPool(servers, connections, timeout)
+    histogram = Histogram()
+    errors = collections.Counter()
+
+    async def _send(body):
+        start = time.monotonic()
+        try:
+            response = await pool.request('POST', UPDATES_PATH, body)
+        except (OSError, HTTPError, asyncio.TimeoutError) as err:
+            errors[type(err).__name__] += 1
+            return
+        if response.status < 400:
+            histogram.record(time.monotonic() - start)
+        else:
+            errors['http_{}'.format(response.status)] += 1
+
+    try:
+        # warm-up of the whole working set in every process serving our connections,
+        # not measured and not paced
+        await _send_all(pool.connections, [bodies] * len(pool.connections))
+
+        # cycle through the working set at constant rate
+        tasks = []
+        started = time.monotonic()
+        for num in range(int(rate * duration)):
+            delay = started + num / rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(_send(bodies[num % len(bodies)])))
+        await asyncio.gather(*tasks)
+    finally:
+        pool.close()
+    return histogram, errors
+
+
+# pylint: disable=too-many-arguments
+def run_working_set(servers, selector, packages_num, sizes=WORKING_SET_SIZES, rate=50,
+                    duration=30, connections=10, threshold=None, timeout=30):
+    """Probes latency for growing number of distinct bodies cycled at constant rate.
+
+    Before probing, every body is sent once over every connection, so the warm-up takes
+    ``size * connections`` requests per working set size.
+
+    Args:
+        servers: List of ``Server`` records
+        selector: ``PackageSelector`` used for generating bodies
+        packages_num: Number of packages per request
+        sizes: Working set sizes (numbers of distinct bodies) to probe
+        rate: Request rate in requests per second
+        duration: How long every working set size is probed, in seconds
+        connections: Number of keep-alive connections
+        threshold: Latency in seconds below which request is considered a cache hit;
+            ``HIT_FACTOR`` times median latency of the smallest working set by default
+        timeout: Timeout for single request in seconds
+
+    Returns:
+        Tuple of list of ``WorkingSetResult`` and used hit threshold.
+    """
+    measured = []
+    for size in sizes:
+        bodies = unique_bodies(selector, packages_num, size)
+        histogram, errors = asyncio.run(
+            _probe(servers, bodies, rate, duration, connections, timeout))
+        measured.append((size, histogram, errors))
+
+    if threshold is None:
+        smallest = measured[0][1].percentile(50) if measured else None
+        threshold = HIT_FACTOR * smallest if smallest else 0.0
+    results = [
+        WorkingSetResult(size, histogram, histogram.fraction_below(threshold), errors)
+        for size, histogram, errors in measured
+    ]
+    return results, threshold
+
+
+def find_knee(results, knee_fraction=0.5):
+    """Returns the first result with hit fraction under ``knee_fraction`` and its predecessor."""
+    previous = None
+    for result in results:
+        if result.hit_fraction is not None and result.hit_fraction < knee_fraction:
+            return previous, result
+        previous = result
+    return previous, None
+
+
+def print_working_set(results, threshold, knee_fraction=0.5):
+    """Prints hit fractions for probed working set sizes and the estimated knee."""
+    print('Hit threshold: {:.2f} ms'.format(threshold * 1000))
+    print()
+    print(stats.format_header('working set') + ' {:>8} {:>8}'.format('hits', 'errors'))
+    for result in results:
+        print(stats.format_summary(str(result.size), result.histogram.summarize()) +
+              ' {:>8} {:>8}'.format(
+                  '-' if result.hit_fraction is None else '{:.1%}'.format(result.hit_fraction),
+                  sum(result.errors.values())))
+    print()
+    before, knee = find_knee(results, knee_fraction)
+    if knee is None:
+        print('No latency knee found up to {} distinct bodies'.format(results[-1].size))
+    elif before is None:
+        print('Latency knee at or below {} distinct bodies'.format(knee.size))
+    else:
+        print('Latency knee between {} and {} distinct bodies,'
+              ' estimated cache capacity per process'.format(before.size, knee.size))
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Compact catalog of packages for building workloads.
+
+Packages are parsed from NEVRA strings (``name-[epoch:]version-release[.arch][.rpm]``)
+into columns stored in arrays; names, versions and arches are interned,
+so every package takes only a few bytes and filtering doesn't touch any strings.
+"""
+
+import collections
+import collections.abc
+
+from array import array
+
+from vmaas.utils.nevra import RPM_SUFFIX, evr_cmp, evr_key, parse_evr, parse_nevra
+
+
+class _Interner(object):
+    """Maps strings to small integers and back."""
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def get_id(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Catalog(object):
+    """Column store of parsed packages.
+
+    Every package is stored as name, ``[epoch:]version-release`` and arch ids
+    (empty arch when it is missing) and whether it had ``.rpm`` suffix,
+    so it is formatted back the same way as it was written.
+    """
+    def __init__(self):
+        self.names = _Interner()
+        self.evrs = _Interner()
+        self.arches = _Interner()
+        self.name_ids = array('I')
+        self.evr_ids = array('I')
+        self.arch_ids = array('H')
+        self.rpm_suffix = array('B')
+        self.skipped = 0
+        self._lines = None
+        self._ages = None
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Creates catalog out of iterable of NEVRA strings, other lines are skipped."""
+        catalog = cls()
+        for line in lines:
+            catalog.add(line.strip())
+        return catalog
+
+    @classmethod
+    def load(cls, path):
+        """Creates catalog out of file with one NEVRA per line."""
+        with open(path) as lines:
+            return cls.from_lines(lines)
+
+    def add(self, nevra):
+        """Adds package, returns ``False`` when the string couldn't be parsed."""
+        try:
+            name, epoch, version, release, arch = parse_nevra(nevra)
+        except ValueError:
+            if self._lines is None:
+                self._lines = array('I', range(len(self)))
+            self.skipped += 1
+            return False
+        if self._lines is not None:
+            self._lines.append(len(self) + self.skipped)
+        self.name_ids.append(self.names.get_id(name))
+        self.evr_ids.append(self.evrs.get_id('{}-{}'.format(
+            version if epoch is None else '{}:{}'.format(epoch, version), release)))
+        self.arch_ids.append(self.arches.get_id(arch or ''))
+        self.rpm_suffix.append(nevra.endswith(RPM_SUFFIX))
+        self._ages = None
+        return True
+
+    def __len__(self):
+        return len(self.name_ids)
+
+    def line(self, index):
+        """Returns position of package in the lines catalog was created from."""
+        return index if self._lines is None else self._lines[index]
+
+    def nevra(self, index):
+        """Returns NEVRA string of package."""
+        arch = self.arches.values[self.arch_ids[index]]
+        return '{}-{}{}{}'.format(
+            self.names.values[self.name_ids[index]],
+            self.evrs.values[self.evr_ids[index]],
+            '.' + arch if arch else '',
+            RPM_SUFFIX if self.rpm_suffix[index] else '')
+
+    @property
+    def ages(self):
+        """Age of every package; 0 for the newest version of name and arch, 1 for older..."""
+        if self._ages is None:
+            groups = collections.defaultdict(list)
+            for index, (name_id, arch_id) in enumerate(zip(self.name_ids, self.arch_ids)):
+                groups[(name_id, arch_id)].append(index)
+            evrs = {}
+            ages = array('I', bytes(4 * len(self)))
+            # versions are compared only within name and arch, most of the groups are tiny
+            for indexes in groups.values():
+                evr_ids = {self.evr_ids[index] for index in indexes}
+                if len(evr_ids) == 1:
+                    continue
+                for evr_id in evr_ids:
+                    if evr_id not in evrs:
+                        evrs[evr_id] = parse_evr(self.evrs.values[evr_id])
+                evr_ages = {}
+                age = previous = None
+                for evr_id in sorted(evr_ids, key=lambda evr_id: evr_key(evrs[evr_id]),
+                                     reverse=True):
+                    if previous is None:
+                        age = 0
+                    elif evr_cmp(evrs[evr_id], previous):
+                        age += 1
+                    evr_ages[evr_id] = age
+                    previous = evrs[evr_id]
+                for index in indexes:
+                    ages[index] = evr_ages[self.evr_ids[index]]
+            self._ages = ages
+        return self._ages
+
+    # pylint: disable=too-many-arguments
+    def select(self, arch=None, name_prefix=None, min_age=None, max_age=None):
+        """Returns ``CatalogView`` of packages matching all given conditions.
+
+        Args:
+            arch: Architecture or list of architectures
+            name_prefix: Prefix of package name
+            min_age: Minimal age, e.g. 1 for packages with newer version in catalog
+            max_age: Maximal age, e.g. 0 for the newest versions only
+        """
+        conditions = []
+        if arch is not None:
+            arches = [arch] if isinstance(arch, str) else arch
+            arch_ids = {self.arches.ids[a] for a in arches if a in self.arches.ids}
+            conditions.append((self.arch_ids, arch_ids))
+        if name_prefix:
+            name_ids = {
+                name_id for name_id, name in enumerate(self.names.values)
+                if name.startswith(name_prefix)
+            }
+            conditions.append((self.name_ids, name_ids))
+
+        indexes = range(len(self))
+        for column, allowed in conditions:
+            indexes = [i for i in indexes if column[i] in allowed]
+        if min_age is not None or max_age is not None:
+            ages = self.ages
+            low = min_age or 0
+            high = max_age if max_age is not None else float('inf')
+            indexes = [i for i in indexes if low <= ages[i] <= high]
+        return CatalogView(self, array('I', indexes))
+
+
+class CatalogView(collections.abc.Sequence):
+    """Sequence of NEVRA strings of selected catalog packages."""
+    def __init__(self, catalog, indexes):
+        self.catalog = catalog
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.catalog.nevra(self.indexes[index])
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+DB setup through the sync API with per-phase timing.
+
+Runs the same phases as ``setup_db.sh`` (repo sync, CVE sync from NIST, CVE sync
+from RH cvemap and export) one after another. Busy sync API is retried with growing
+delay and every phase is finished once ``exported`` reported by ``dbchange`` moves.
+Cvemap sync doesn't export the data (GH#271), so the export is triggered right after
+it, like in ``setup_db.sh``. Duration and throughput (repositories, errata or CVEs
+imported per second) of every phase is recorded, so sync performance can be compared
+across VMaaS releases.
+"""
+
+import collections
+import datetime
+import time
+
+
+# phases, actions of ``SyncApiActions`` starting them, counted items
+# and whether export has to be triggered after the action
+PHASES = collections.OrderedDict((
+    ('repo', ('reposcan', ('repos', 'errata'), False)),
+    ('cve', ('cvescan', ('cves',), False)),
+    ('cvemap', ('cvemapscan', ('cves',), True)),
+    ('export', ('export', (), False)),
+))
+
+BUSY_MSG = 'Another sync task already in progress'
+
+# list keys of queries counting items in the DB
+_COUNT_QUERIES = {
+    'cves': ('get_cves', 'cve_list'),
+    'errata': ('get_errata', 'errata_list'),
+}
+
+PhaseResult = collections.namedtuple('PhaseResult', 'name started duration counts error')
+
+
+def count_repos(repolist):
+    """Returns number of repositories (objects with ``baseurl``) in repolist data."""
+    if isinstance(repolist, dict):
+        if 'baseurl' in repolist:
+            return 1
+        return sum(count_repos(value) for value in repolist.values())
+    if isinstance(repolist, list):
+        return sum(count_repos(value) for value in repolist)
+    return 0
+
+
+def count_items(api, kind):
+    """Returns number of CVEs or errata in the DB, ``None`` when unknown.
+
+    Single item pages of all items are requested, so the number of pages is the count.
+    """
+    action, list_key = _COUNT_QUERIES[kind]
+    try:
+        response = getattr(api, action)(body={list_key: ['.*'], 'page_size': 1})
+        return int(response.raw.body['pages'])
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def trigger(api, action, body=None, timeout=600, max_delay=30):
+    """Starts sync task, retrying while another task is in progress; returns response."""
+    delay = 1
+    deadline = time.monotonic() + timeout
+    while True:
+        kwargs = {} if body is None else {'body': body}
+        response = getattr(api, action)(**kwargs)
+        if BUSY_MSG not in str(response.raw.body):
+            return response
+        if time.monotonic() + delay > deadline:
+            raise RuntimeError('{}: sync API busy for {} s'.format(action, timeout))
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def run_phase(api, name, repolist=None, timeout=3600):
+    """Runs one phase and waits until its data are exported; returns ``PhaseResult``."""
+    # imported here so the perf tools don't need REST client deps unless DB setup is used
+    from vmaas.rest import tools
+    from wait_for import TimedOutError
+
+    action, counted, export = PHASES[name]
+    counts = {}
+    # items already in the DB are not counted to the throughput of the phase
+    before = {kind: count_items(api, kind) for kind in counted if kind != 'repos'}
+    started = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    since = tools.get_dbchange_time(api, 'exported')
+    begin = time.monotonic()
+    actions = [(action, repolist if name == 'repo' else None)]
+    if export:
+        # started once the previous task finishes, the sync API is busy until then
+        actions.append(('export', None))
+    for action_name, body in actions:
+        try:
+            response = trigger(api, action_name, body, timeout=timeout)
+        except RuntimeError as err:
+            return PhaseResult(name, started, None, counts, str(err))
+        if response.raw.status_code >= 400:
+            return PhaseResult(name, started, None, counts, 'http_{}: {}'.format(
+                response.raw.status_code, response.raw.body))
+    try:
+        # short maximum delay keeps the measured duration precise
+        tools.wait_for_sync('export', since=since, timeout=timeout, max_delay=2, api=api)
+    except TimedOutError:
+        return PhaseResult(name, started, None, counts, 'timeout')
+    duration = time.monotonic() - begin
+
+    for kind in counted:
+        if kind == 'repos':
+            counts[kind] = count_repos(repolist)
+            continue
+        count = count_items(api, kind)
+        counts[kind] = count - before[kind] if None not in (count, before[kind]) else None
+    return PhaseResult(name, started, duration, counts, None)
+
+
+def get_report(results, server_info=None):
+    """Returns JSON-serializable timing report."""
+    phases = []
+    for result in results:
+        item = result._asdict()
+        item['throughput'] = {
+            kind: count / result.duration
+            for kind, count in result.counts.items() if count and result.duration
+        }
+        phases.append(item)
+    return {
+        'server': server_info or {},
+        'total_duration': sum(result.duration or 0 for result in results),
+        'phases': phases,
+    }
+
+
+def print_report(report):
+    """Prints duration and throughput of every phase."""
+    print('{:<8} {:>10} {:>28} {:>28}'.format('phase', 'duration s', 'items', 'per second'))
+    for item in report['phases']:
+        items = ', '.join('{} {}'.format(count, kind) for kind, count in item['counts'].items()
+                          if count is not None)
+        throughput = ', '.join('{:.1f} {}'.format(value, kind)
+                               for kind, value in item['throughput'].items())
+        print('{:<8} {:>10} {:>28} {:>28}'.format(
+            item['name'],
+            '{:.1f}'.format(item['duration']) if item['duration'] is not None else
+            item['error'], items or '-', throughput or '-'))
+    print('{:<8} {:>10.1f}'.format('total', report['total_duration']))
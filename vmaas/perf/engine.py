@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Native multi-process load engine.
+
+Every worker process runs its own event loop with its own pool of keep-alive
+connections. Workers start together on a barrier and periodically send latency
+histograms to the coordinator, which merges them exactly into per-interval
+and total results.
+"""
+
+import asyncio
+import collections
+import collections.abc
+import multiprocessing
+import queue as queue_module
+import threading
+import time
+
+from vmaas.perf import stats
+from vmaas.perf.histogram import Histogram
+from vmaas.perf.http import ConnectionPool, HTTPError
+
+
+UPDATES_PATH = '/api/v1/updates/'
+
+# how long to wait for workers to get ready, in seconds
+START_TIMEOUT = 60
+
+Request = collections.namedtuple('Request', 'method path body')
+
+Interval = collections.namedtuple('Interval', 'index start histogram statuses errors')
+
+EngineResult = collections.namedtuple('EngineResult', 'started duration interval total intervals')
+
+
+class _UpdatesRequests(collections.abc.Sequence):
+    """``updates`` requests over sequence of bodies, bodies are accessed on demand."""
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Request('POST', UPDATES_PATH, self.bodies[index])
+
+
+def updates_requests(bodies):
+    """Creates ``updates`` requests out of sequence of request bodies.
+
+    Bodies can be ``bodies.LazyBodies``; they are then generated in worker processes.
+    """
+    return _UpdatesRequests(bodies)
+
+
+class _Recorder(object):
+    """Collects results of one worker, grouped by interval of request start."""
+    def __init__(self, started, interval):
+        self.started = started
+        self.interval = interval
+        self.data = {}
+
+    def _slot(self, start):
+        index = int((start - self.started) // self.interval)
+        if index not in self.data:
+            self.data[index] = (Histogram(), collections.Counter(), collections.Counter())
+        return self.data[index]
+
+    def record(self, start, latency, status):
+        histogram, statuses, errors = self._slot(start)
+        statuses[status] += 1
+        if status < 400:
+            histogram.record(latency)
+        else:
+            errors['http_{}'.format(status)] += 1
+
+    def record_error(self, start, error):
+        self._slot(start)[2][error] += 1
+
+    def flush(self):
+        """Returns collected data as plain dicts and starts collecting from scratch."""
+        data = {
+            index: (histogram.to_dict(), dict(statuses), dict(errors))
+            for index, (histogram, statuses, errors) in self.data.items()
+        }
+        self.data = {}
+        return data
+
+
+async def _send(pool, request, recorder):
+    start = time.monotonic()
+    try:
+        response = await pool.request(request.method, request.path, request.body)
+    except (OSError, HTTPError, asyncio.TimeoutError) as err:
+        recorder.record_error(start, type(err).__name__)
+        return
+    recorder.record(start, time.monotonic() - start, response.status)
+
+
+async def _closed_loop(pool, requests, recorder, deadline, first_user, users_step, users):
+    async def _user(num):
+        position = num
+        while time.monotonic() < deadline:
+            await _send(pool, requests[position % len(requests)], recorder)
+            position += users_step
+
+    await asyncio.gather(*[_user(first_user + i) for i in range(users)])
+
+
+async def _open_loop(pool, requests, recorder, schedule, offset):
+    tasks = set()
+    sent = 0
+    for start, duration, rate in schedule:
+        stage_sent = 0
+        while True:
+            next_time = recorder.started + start + stage_sent / rate
+            if next_time >= recorder.started + start + duration:
+                break
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            request = requests[(offset + sent) % len(requests)]
+            task = asyncio.ensure_future(_send(pool, request, recorder))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+            stage_sent += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def _flusher(recorder, queue, worker_id, every):
+    while True:
+        await asyncio.sleep(every)
+        queue.put(('data', worker_id, recorder.flush()))
+
+
+async def _run_worker(worker_id, spec, barrier, queue):
+    pool = ConnectionPool(spec['servers'], spec['connections'], spec['timeout'])
+    # lazily generated bodies are all made before the start, not while measuring
+    for __ in spec['requests']:
+        pass
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, barrier.wait, START_TIMEOUT)
+    recorder = _Recorder(time.monotonic(), spec['interval'])
+    deadline = recorder.started + spec['duration']
+    flusher = asyncio.ensure_future(_flusher(recorder, queue, worker_id, spec['interval']))
+    try:
+        if spec['schedule']:
+            await _open_loop(
+                pool, spec['requests'], recorder, spec['schedule'], spec['first_user'])
+        else:
+            await _closed_loop(
+                pool, spec['requests'], recorder, deadline,
+                spec['first_user'], spec['users_step'], spec['connections'])
+    finally:
+        flusher.cancel()
+        pool.close()
+        queue.put(('data', worker_id, recorder.flush()))
+
+
+def _worker(worker_id, spec, barrier, queue):
+    try:
+        asyncio.run(_run_worker(worker_id, spec, barrier, queue))
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        queue.put(('done', worker_id, None))
+
+
+def _split(total, parts, index):
+    return total // parts + (1 if index < total % parts else 0)
+
+
+def _merge(intervals, data):
+    for index, (histogram, statuses, errors) in data.items():
+        slot = intervals.setdefault(
+            index, (Histogram(), collections.Counter(), collections.Counter()))
+        slot[0].merge(Histogram.from_dict(histogram))
+        slot[1].update(statuses)
+        slot[2].update(errors)
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def run(servers, requests, users=10, duration=60, workers=1, rate=None, interval=1.0,
+        timeout=30, on_start=None, schedule=None):
+    """Runs load against servers.
+
+    Args:
+        servers: List of ``Server`` records
+        requests: Sequence of ``Request`` records, sent in round-robin fashion
+        users: Number of concurrent users (keep-alive connections) over all workers
+        duration: Duration of the run in seconds
+        workers: Number of worker processes
+        rate: When set, requests are sent at this total rate (requests per second)
+            regardless of responses, otherwise every user sends next request
+            right after it gets the previous response
+        interval: Length of reporting interval in seconds
+        timeout: Timeout for single request in seconds
+        on_start: Called with wall clock time right after workers start sending requests
+        schedule: List of ``(start, duration, rate)`` stages with constant total rate
+            (start and duration in seconds from the beginning of the run); when set,
+            it replaces ``duration`` and ``rate``
+
+    Returns:
+        ``EngineResult`` with merged results.
+    """
+    workers = max(min(workers, users), 1)
+    if schedule:
+        duration = max(start + stage_duration for start, stage_duration, __ in schedule)
+    elif rate:
+        schedule = [(0, duration, rate)]
+    # forked workers share loaded package lists with the coordinator
+    ctx = multiprocessing.get_context(
+        'fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    barrier = ctx.Barrier(workers + 1)
+    queue = ctx.Queue()
+    processes = []
+    for worker_id in range(workers):
+        spec = {
+            'servers': servers,
+            'requests': requests,
+            'connections': _split(users, workers, worker_id),
+            'first_user': sum(_split(users, workers, i) for i in range(worker_id)),
+            'users_step': users,
+            'schedule': [
+                (start, stage_duration, stage_rate / workers)
+                for start, stage_duration, stage_rate in schedule or []
+            ],
+            'duration': duration,
+            'interval': interval,
+            'timeout': timeout,
+        }
+        proc = ctx.Process(target=_worker, args=(worker_id, spec, barrier, queue), daemon=True)
+        proc.start()
+        processes.append(proc)
+
+    try:
+        barrier.wait(START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        for proc in processes:
+            proc.terminate()
+        raise RuntimeError('Workers failed to start')
+    started = time.time()
+    monotonic_started = time.monotonic()
+    if on_start is not None:
+        on_start(started)
+
+    merged = {}
+    running = workers
+    while running:
+        try:
+            kind, __, data = queue.get(timeout=duration + timeout + START_TIMEOUT)
+        except queue_module.Empty:
+            break
+        if kind == 'done':
+            running -= 1
+        else:
+            _merge(merged, data)
+    run_duration = time.monotonic() - monotonic_started
+    for proc in processes:
+        proc.join(timeout)
+
+    total = Histogram()
+    intervals = []
+    for index in sorted(merged):
+        histogram, statuses, errors = merged[index]
+        total.merge(histogram)
+        intervals.append(Interval(index, index * interval, histogram, statuses, errors))
+    return EngineResult(started, min(run_duration, duration), interval, total, intervals)
+
+
+def get_report(result):
+    """Summarizes engine result."""
+    statuses = collections.Counter()
+    errors = collections.Counter()
+    for interval in result.intervals:
+        statuses.update(interval.statuses)
+        errors.update(interval.errors)
+    return {
+        'started': result.started,
+        'duration': result.duration,
+        'total': result.total.summarize(result.duration),
+        'intervals': [
+            dict(interval.histogram.summarize(result.interval),
+                 start=interval.start, errors=sum(interval.errors.values()))
+            for interval in result.intervals
+        ],
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'errors': dict(errors),
+    }
+
+
+def print_report(report):
+    """Prints engine report."""
+    print(stats.format_header('interval') + ' {:>8}'.format('errors'))
+    for interval in report['intervals']:
+        print(stats.format_summary('{:g} s'.format(interval['start']), interval) +
+              ' {:>8}'.format(interval['errors']))
+    print(stats.format_summary('TOTAL', report['total']) +
+          ' {:>8}'.format(sum(report['errors'].values())))
+    print()
+    print('Duration: {:.2f} s, throughput: {:.2f} req/s'.format(
+        report['duration'], report['total'].get('throughput', 0)))
+    print('HTTP statuses: {}'.format(stats.format_counts(report['statuses'])))
+    if report['errors']:
+        print('Errors: {}'.format(stats.format_counts(report['errors'])))
+
+
+def latency_timeline(result):
+    """Returns ``(start, end, p99)`` wall clock timeline of engine result."""
+    return [
+        (result.started + interval.start,
+         result.started + interval.start + result.interval,
+         interval.histogram.percentile(99))
+        for interval in result.intervals
+    ]
+
+
+def baseline_records(result, endpoint='updates'):
+    """Converts engine result to records accepted by ``baseline.new_baseline``."""
+    for latency in result.total.samples():
+        yield endpoint, latency, True
+    for interval in result.intervals:
+        for __ in range(sum(interval.errors.values())):
+            yield endpoint, None, False
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Data freshness and cold-start latency after sync.
+
+Fixed set of probe queries is sent repeatedly (every probe over its own keep-alive
+connection) before, during and after a sync. Time to fresh data is the time from
+triggering the sync until ``exported`` reported by ``dbchange`` changes, i.e. until
+the webapp serves the new data. Latency of probes after that is summarized in bins
+of growing length to show how it decays while the caches warm up again.
+"""
+
+import asyncio
+import collections
+import functools
+import json
+import time
+
+from vmaas.perf import stats
+from vmaas.perf.http import Connection, HTTPError
+from vmaas.perf.soak import SYNC_ACTIONS
+
+DBCHANGE_PATH = '/api/v1/dbchange'
+
+# bounds of bins (seconds after export) of the latency decay curve
+DECAY_BINS = (0, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+# latency (median of a bin) considered recovered, relative to median before sync
+RECOVERED_RATIO = 1.2
+
+Probe = collections.namedtuple('Probe', 'name method path body')
+
+# ``offset`` is start of the probe in seconds from triggering the sync
+ProbeRecord = collections.namedtuple('ProbeRecord', 'probe offset latency ok')
+
+FreshnessResult = collections.namedtuple(
+    'FreshnessResult', 'kind exported_before exported_after time_to_fresh records error')
+
+
+def default_probes(packages, cve_regex, erratum_regex):
+    """Returns ``updates``, ``cves`` and ``errata`` probes."""
+    return [
+        Probe('updates', 'POST', '/api/v1/updates/', {'package_list': list(packages)}),
+        Probe('cves', 'POST', '/api/v1/cves', {'cve_list': [cve_regex]}),
+        Probe('errata', 'POST', '/api/v1/errata', {'errata_list': [erratum_regex]}),
+    ]
+
+
+async def _get_exported(conn):
+    try:
+        response = await conn.request('GET', DBCHANGE_PATH)
+        return json.loads(response.body.decode('utf-8')).get('exported')
+    except (OSError, HTTPError, asyncio.TimeoutError, ValueError, AttributeError):
+        return None
+
+
+# pylint: disable=too-many-arguments
+async def _probe_loop(server, probe, interval, stop, records, timeout):
+    """Sends probe every ``interval`` seconds (or right after the previous one ends)."""
+    conn = Connection(server.host, server.port, timeout)
+    next_time = time.monotonic()
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                response = await conn.request(probe.method, probe.path, probe.body)
+                records.append((probe.name, started, response.timings.latency,
+                                response.status < 400))
+            except (OSError, HTTPError, asyncio.TimeoutError):
+                records.append((probe.name, started, None, False))
+            next_time = max(next_time + interval, time.monotonic())
+            try:
+                await asyncio.wait_for(stop.wait(), next_time - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        conn.close()
+
+
+def _trigger(api, kind):
+    """Starts sync; returns error or ``None``."""
+    try:
+        response = getattr(api, SYNC_ACTIONS[kind])()
+    except Exception as err:  # pylint: disable=broad-except
+        return type(err).__name__
+    if response.raw.status_code >= 400:
+        return 'http_{}'.format(response.raw.status_code)
+    return None
+
+
+async def _run(server, api, kind, probes, interval, before, after, poll_interval,
+               sync_timeout, timeout):
+    # pylint: disable=too-many-locals
+    # imported here so the perf tools don't need REST client deps unless syncs are used
+    from vmaas.rest import exceptions, tools
+    from wait_for import TimedOutError
+
+    loop = asyncio.get_event_loop()
+    stop = asyncio.Event()
+    raw = []
+    tasks = [asyncio.ensure_future(_probe_loop(server, probe, interval, stop, raw, timeout))
+             for probe in probes]
+    dbchange = Connection(server.host, server.port, timeout)
+    exported_before = exported_after = fresh = error = None
+    triggered = time.monotonic()
+    try:
+        exported_before = await _get_exported(dbchange)
+        await asyncio.sleep(before)
+        triggered = time.monotonic()
+        error = await loop.run_in_executor(None, _trigger, api, kind)
+        if error is None:
+            try:
+                await loop.run_in_executor(None, functools.partial(
+                    tools.wait_for_sync, 'export', since=exported_before, timeout=sync_timeout,
+                    delay=poll_interval, max_delay=poll_interval, api=api))
+                fresh = time.monotonic()
+                exported_after = await _get_exported(dbchange)
+            except TimedOutError:
+                error = 'timeout'
+            except (exceptions.ClientConnectionError, exceptions.ServerError) as err:
+                error = type(err).__name__
+        if fresh is not None:
+            await asyncio.sleep(after)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+        dbchange.close()
+
+    records = [ProbeRecord(name, started - triggered, latency, ok)
+               for name, started, latency, ok in sorted(raw, key=lambda rec: rec[1])]
+    return FreshnessResult(kind, exported_before, exported_after,
+                           fresh - triggered if fresh is not None else None, records, error)
+
+
+# pylint: disable=too-many-arguments
+def run(server, api, probes, kind='all', interval=0.05, before=10, after=60,
+        poll_interval=0.1, sync_timeout=1800, timeout=30):
+    """Triggers sync and measures probes around it.
+
+    Args:
+        server: ``Server`` record of the query API
+        api: ``VMaaSClient`` instance used to trigger the sync
+        probes: List of ``Probe``
+        kind: Sync kind (key of ``SYNC_ACTIONS``)
+        interval: Seconds between starts of two requests of the same probe
+        before: Seconds of probing before the sync, used as reference
+        after: Seconds of probing after the new data are exported
+        poll_interval: How often ``dbchange`` is checked, limits precision of time to fresh data
+        sync_timeout: How long to wait for the export
+        timeout: Timeout for single request in seconds
+
+    Returns:
+        ``FreshnessResult``
+    """
+    return asyncio.run(_run(server, api, kind, probes, interval, before, after,
+                            poll_interval, sync_timeout, timeout))
+
+
+def _latencies(records, probe, start, end):
+    return [rec.latency for rec in records
+            if rec.probe == probe and rec.ok and start <= rec.offset < end]
+
+
+def probe_report(result, probe, bins=DECAY_BINS):
+    """Summarizes one probe: before sync, during sync, first request and decay after export."""
+    records = result.records
+    report = {
+        'probe': probe,
+        'before': stats.summarize(_latencies(records, probe, float('-inf'), 0)),
+        'errors': sum(1 for rec in records if rec.probe == probe and not rec.ok),
+        'first': None,
+        'during': None,
+        'decay': [],
+        'recovered_after': None,
+    }
+    fresh = result.time_to_fresh
+    if fresh is None:
+        report['during'] = stats.summarize(_latencies(records, probe, 0, float('inf')))
+        return report
+    report['during'] = stats.summarize(_latencies(records, probe, 0, fresh))
+    after = [rec for rec in records if rec.probe == probe and rec.offset >= fresh]
+    if after:
+        report['first'] = after[0].latency
+    last = max((rec.offset - fresh for rec in after), default=0)
+    for start, end in zip(bins, bins[1:]):
+        if start > last:
+            break
+        summary = stats.summarize(_latencies(records, probe, fresh + start, fresh + end))
+        summary.update({'start': start, 'end': end})
+        report['decay'].append(summary)
+
+    reference = report['before'].get('p50')
+    if reference:
+        recovered = None
+        for summary in reversed(report['decay']):
+            if summary.get('p50') is None or summary['p50'] > reference * RECOVERED_RATIO:
+                break
+            recovered = summary['start']
+        report['recovered_after'] = recovered
+    return report
+
+
+def get_report(result, probes):
+    """Returns JSON-serializable report of the whole run."""
+    return {
+        'kind': result.kind,
+        'error': result.error,
+        'exported_before': result.exported_before,
+        'exported_after': result.exported_after,
+        'time_to_fresh': result.time_to_fresh,
+        'probes': [probe_report(result, probe.name) for probe in probes],
+    }
+
+
+def print_report(report):
+    """Prints time to fresh data and latency decay of every probe."""
+    if report['time_to_fresh'] is None:
+        print('Fresh data not seen: {}'.format(report['error']))
+    else:
+        print('Time to fresh data: {:.2f} s ({} sync, exported {} -> {})'.format(
+            report['time_to_fresh'], report['kind'], report['exported_before'],
+            report['exported_after']))
+    for item in report['probes']:
+        print()
+        print(stats.format_header(item['probe']))
+        print(stats.format_summary('before sync', item['before']))
+        print(stats.format_summary('during sync', item['during']))
+        for summary in item['decay']:
+            print(stats.format_summary('+{:g}-{:g} s'.format(summary['start'], summary['end']),
+                                       summary))
+        if item['first'] is not None:
+            print('First request after export: {:.2f} ms'.format(item['first'] * 1000))
+        if item['recovered_after'] is not None:
+            print('Median within {:g}x of before sync since +{:g} s'.format(
+                RECOVERED_RATIO, item['recovered_after']))
+        elif item['decay']:
+            print('Median not recovered within the run')
+        if item['errors']:
+            print('Errors: {}'.format(item['errors']))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Mergeable latency histogram.
+
+Values are stored in microseconds in log-linear buckets with fixed layout, i.e. with
+relative precision better than 1 %. Because the layout is the same everywhere,
+histograms recorded in different processes can be merged exactly by adding counts.
+"""
+
+from vmaas.perf import stats
+
+
+# number of significant bits kept for every value
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+HALF_COUNT = SUB_COUNT >> 1
+
+
+def bucket_index(value):
+    """Returns index of bucket for value in microseconds."""
+    if value < SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS
+    return SUB_COUNT + (shift - 1) * HALF_COUNT + (value >> shift) - HALF_COUNT
+
+
+def bucket_bounds(index):
+    """Returns lowest and highest value in microseconds belonging to bucket."""
+    if index < SUB_COUNT:
+        return index, index
+    shift, sub = divmod(index - SUB_COUNT, HALF_COUNT)
+    shift += 1
+    lowest = (sub + HALF_COUNT) << shift
+    return lowest, lowest + (1 << shift) - 1
+
+
+class Histogram(object):
+    """Latency histogram; values are recorded and reported in seconds."""
+    def __init__(self, counts=None, total=0.0, minimum=None, maximum=None):
+        self.counts = dict(counts or {})
+        self.total = total
+        self.min = minimum
+        self.max = maximum
+
+    def record(self, value):
+        """Records latency in seconds."""
+        index = bucket_index(max(int(value * 1e6), 0))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Adds all values recorded in other histogram."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def percentile(self, pct):
+        """Returns percentile (nearest-rank method) with bucket precision."""
+        count = self.count
+        if not count:
+            return None
+        rank = max(int(-(-pct * count // 100)), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self._value(index)
+        return self.max
+
+    def fraction_below(self, value):
+        """Returns fraction of recorded values lower than value (with bucket precision)."""
+        count = self.count
+        if not count:
+            return None
+        limit = bucket_index(max(int(value * 1e6), 0))
+        return sum(num for index, num in self.counts.items() if index < limit) / count
+
+    def _value(self, index):
+        lowest, highest = bucket_bounds(index)
+        value = (lowest + highest) / 2.0 / 1e6
+        # keep reported percentiles within the recorded range
+        return min(max(value, self.min), self.max)
+
+    def samples(self):
+        """Yields representative value of every recorded sample, sorted."""
+        for index in sorted(self.counts):
+            value = self._value(index)
+            for __ in range(self.counts[index]):
+                yield value
+
+    def summarize(self, duration=None):
+        """Returns the same statistics as ``stats.summarize``."""
+        count = self.count
+        summary = {'count': count}
+        if duration:
+            summary['throughput'] = count / duration
+        if not count:
+            return summary
+        summary.update({'mean': self.total / count, 'min': self.min, 'max': self.max})
+        for pct in stats.PERCENTILES:
+            summary['p{}'.format(pct)] = self.percentile(pct)
+        return summary
+
+    def to_dict(self):
+        """Returns plain data suitable for JSON or sending to other process."""
+        return {'counts': self.counts, 'total': self.total, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates histogram from ``to_dict`` output."""
+        counts = {int(index): count for index, count in data['counts'].items()}
+        return cls(counts, data['total'], data['min'], data['max'])
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Load generating clients and target servers specification.
+"""
+
+import collections
+
+
+Client = collections.namedtuple('Client', 'host cpus maxusers')
+# cpus and maxusers are optional
+Client.__new__.__defaults__ = (1, 600)
+
+Server = collections.namedtuple('Server', 'host port')
+# port defaults to 80
+Server.__new__.__defaults__ = (80,)
+
+
+def _get_objs_list(klass, data):
+    objs_list = []
+    if isinstance(data, str):
+        data = [data]
+    for rec in data:
+        if ':' in rec:
+            args = rec.split(':')
+            objs_list.append(klass(*args))
+        else:
+            objs_list.append(klass(rec))
+    return objs_list
+
+
+def get_servers(servers):
+    """Gets list of server data."""
+    return _get_objs_list(Server, servers)
+
+
+def get_clients(clients):
+    """Gets list of clients data."""
+    return _get_objs_list(Client, clients)
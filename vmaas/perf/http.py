@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal asyncio HTTP/1.1 client used by the native load engine.
+
+Only what is needed for measuring VMaaS API is implemented: keep-alive connections,
+``Content-Length`` and chunked response bodies and per-request timings.
+"""
+
+import asyncio
+import collections
+import json
+import time
+
+
+Response = collections.namedtuple('Response', 'status headers body request_size timings')
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Timings(collections.namedtuple('Timings', 'start sent first_byte end')):
+    """Monotonic timestamps of request phases."""
+    __slots__ = ()
+
+    @property
+    def latency(self):
+        """Time from start of sending the request to the last byte of response."""
+        return self.end - self.start
+
+    @property
+    def ttfb(self):
+        """Time from sent request to the first byte of response."""
+        return self.first_byte - self.sent
+
+    @property
+    def transfer(self):
+        """Time from the first to the last byte of response."""
+        return self.end - self.first_byte
+
+
+def encode_body(body):
+    """Encodes request body the compact way."""
+    if body is None:
+        return b''
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    return json.dumps(body, separators=(',', ':')).encode('utf-8')
+
+
+class Connection(object):
+    """Keep-alive HTTP connection to one server.
+
+    Args:
+        host: Server hostname
+        port: Server port
+        timeout: Timeout for single request in seconds
+    """
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        """Closes the underlying socket."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, method, path, body=None):
+        """Sends request and returns ``Response``; reconnects when needed."""
+        reused = self._writer is not None
+        try:
+            return await asyncio.wait_for(self._request(method, path, body), self.timeout)
+        except (HTTPError, ConnectionError):
+            self.close()
+            if not reused:
+                raise
+        except Exception:
+            self.close()
+            raise
+        # server could have closed idle keep-alive connection, try once more with a fresh one
+        return await self.request(method, path, body)
+
+    async def _request(self, method, path, body):
+        payload = encode_body(body)
+        head = (
+            '{} {} HTTP/1.1\r\n'
+            'Host: {}:{}\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: {}\r\n'
+            'Connection: keep-alive\r\n'
+            '\r\n'
+        ).format(method.upper(), path, self.host, self.port, len(payload)).encode('ascii')
+
+        if self._writer is None:
+            await self._connect()
+        start = time.monotonic()
+        self._writer.write(head + payload)
+        await self._writer.drain()
+        sent = time.monotonic()
+        try:
+            status, headers, data, first_byte = await self._read_response()
+        except (asyncio.IncompleteReadError, ValueError) as err:
+            # truncated body or malformed framing (chunk size, Content-Length, too long line)
+            raise HTTPError('Malformed response: {}'.format(err))
+        end = time.monotonic()
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+
+        return Response(
+            status, headers, data, len(head) + len(payload), Timings(start, sent, first_byte, end))
+
+    async def _read_response(self):
+        status_line = await self._reader.readline()
+        first_byte = time.monotonic()
+        if not status_line:
+            raise HTTPError('Connection closed by server')
+        try:
+            status = int(status_line.split(None, 2)[1])
+        except (IndexError, ValueError):
+            raise HTTPError('Malformed status line {!r}'.format(status_line))
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, __, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif 'content-length' in headers:
+            data = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            data = await self._reader.read()
+            headers['connection'] = 'close'
+        return status, headers, data, first_byte
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self._reader.readline()).split(b';', 1)[0], 16)
+            if not size:
+                # skip trailers
+                while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readline()
+
+
+class ConnectionPool(object):
+    """Pool of keep-alive connections spread over servers in round-robin fashion.
+
+    Args:
+        servers: List of ``Server`` records
+        size: Total number of connections
+        timeout: Timeout for single request in seconds
+    """
+    def __init__(self, servers, size, timeout=30):
+        self.connections = [
+            Connection(servers[i % len(servers)].host, servers[i % len(servers)].port, timeout)
+            for i in range(size)
+        ]
+        self._idle = asyncio.Queue()
+        for conn in self.connections:
+            self._idle.put_nowait(conn)
+
+    async def request(self, method, path, body=None):
+        """Sends request using the first idle connection."""
+        conn = await self._idle.get()
+        try:
+            return await conn.request(method, path, body)
+        finally:
+            self._idle.put_nowait(conn)
+
+    def close(self):
+        """Closes all connections."""
+        for conn in self.connections:
+            conn.close()
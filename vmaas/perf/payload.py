@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Scaling of ``updates`` request cost with the number of packages per request.
+
+Requests of growing size are sent one by one over a single keep-alive connection.
+For every request sizes of request and response, server time to the first byte,
+response transfer time and client JSON decode time are measured, and a cost model
+is fitted over the sizes: linear ``fixed + per_package * n`` and power law
+``base + coefficient * n ** exponent`` with ``base`` being cost of the smallest
+request; exponent notably above 1 means super-linear cost.
+"""
+
+import asyncio
+import collections
+import json
+import math
+import time
+
+from vmaas.perf import stats
+from vmaas.perf.cache import unique_bodies
+from vmaas.perf.engine import UPDATES_PATH
+from vmaas.perf.http import Connection, HTTPError, encode_body
+from vmaas.perf.workload import gen_packages_query
+
+
+SIZES = (1, 10, 100, 1000, 10000, 50000)
+
+METRICS = ('request_bytes', 'response_bytes', 'ttfb', 'transfer', 'decode', 'total')
+
+# power law exponent above which the cost is reported as super-linear
+SUPERLINEAR_EXPONENT = 1.1
+
+# ``packages`` is the real number of packages in the body, unique bodies have one more
+Measurement = collections.namedtuple(
+    'Measurement', 'size packages request_bytes response_bytes ttfb transfer decode total error')
+
+Fit = collections.namedtuple('Fit', 'fixed per_package r2 coefficient exponent')
+
+
+def gen_bodies(selector, size, count, unique=True):
+    """Generates ``count`` bodies with ``size`` packages.
+
+    Unique bodies contain one extra non-existent package, so they can't be served
+    from the server cache.
+
+    Returns:
+        Real number of packages in every body and list of bodies.
+    """
+    if unique:
+        return size + 1, unique_bodies(selector, size, count)
+    return size, [encode_body(gen_packages_query(selector.select(size))) for __ in range(count)]
+
+
+async def _measure(server, bodies_by_size, timeout):
+    conn = Connection(server.host, server.port, timeout)
+    measurements = []
+    try:
+        for size, packages, bodies in bodies_by_size:
+            for body in bodies:
+                try:
+                    response = await conn.request('POST', UPDATES_PATH, body)
+                except (OSError, HTTPError, asyncio.TimeoutError) as err:
+                    measurements.append(Measurement(
+                        size, packages, len(body), None, None, None, None, None,
+                        type(err).__name__))
+                    continue
+                started = time.perf_counter()
+                try:
+                    json.loads(response.body.decode('utf-8'))
+                except ValueError:
+                    pass
+                decode = time.perf_counter() - started
+                timings = response.timings
+                measurements.append(Measurement(
+                    size, packages, response.request_size, len(response.body), timings.ttfb,
+                    timings.transfer, decode, timings.latency + decode,
+                    None if response.status < 400 else 'http_{}'.format(response.status)))
+    finally:
+        conn.close()
+    return measurements
+
+
+# pylint: disable=too-many-arguments
+def run(server, selector, sizes=SIZES, repeats=10, unique=True, timeout=120):
+    """Measures requests of given sizes.
+
+    Args:
+        server: ``Server`` record
+        selector: ``PackageSelector`` used for generating bodies
+        sizes: Numbers of packages per request
+        repeats: How many requests of every size are sent
+        unique: Whether bodies should be unique, i.e. never served from cache
+        timeout: Timeout for single request in seconds
+
+    Returns:
+        List of ``Measurement``.
+    """
+    # bodies are generated before measuring, so generation doesn't affect the server
+    bodies_by_size = [(size,) + gen_bodies(selector, size, repeats, unique) for size in sizes]
+    return asyncio.run(_measure(server, bodies_by_size, timeout))
+
+
+def _median(values):
+    values = sorted(values)
+    return stats.percentile(values, 50) if values else None
+
+
+def summarize(measurements):
+    """Returns list of per-size dicts with median of every metric and error count."""
+    by_size = collections.OrderedDict()
+    for rec in measurements:
+        by_size.setdefault(rec.size, []).append(rec)
+    summary = []
+    for size, records in by_size.items():
+        ok = [rec for rec in records if rec.error is None]
+        item = {'size': size, 'packages': records[0].packages, 'count': len(ok),
+                'errors': len(records) - len(ok)}
+        for metric in METRICS:
+            item[metric] = _median([getattr(rec, metric) for rec in ok])
+        summary.append(item)
+    return summary
+
+
+def fit_linear(points):
+    """Fits ``y = fixed + per_package * x`` using least squares; returns it with R^2."""
+    num = len(points)
+    mean_x = sum(x for x, __ in points) / num
+    mean_y = sum(y for __, y in points) / num
+    var_x = sum((x - mean_x) ** 2 for x, __ in points)
+    if not var_x:
+        return mean_y, 0.0, None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+    intercept = mean_y - slope * mean_x
+    total = sum((y - mean_y) ** 2 for __, y in points)
+    residual = sum((y - intercept - slope * x) ** 2 for x, y in points)
+    return intercept, slope, 1.0 - residual / total if total else None
+
+
+def fit_power(points):
+    """Fits ``y = base + coefficient * x ** exponent`` in log-log space.
+
+    ``base`` is the value at the smallest ``x``, so the fixed per-request cost doesn't
+    hide the growth of the size dependent part.
+    """
+    smallest, base = min(points)
+    logs = [(math.log(x), math.log(y - base)) for x, y in points if x > smallest and y > base]
+    if len(logs) < 2:
+        return None, None
+    intercept, slope, __ = fit_linear(logs)
+    return math.exp(intercept), slope
+
+
+def fit_model(summary):
+    """Fits cost model of every metric over real numbers of packages; returns ``Fit`` dict."""
+    model = {}
+    for metric in METRICS:
+        points = [(item['packages'], item[metric]) for item in summary if item[metric] is not None]
+        if len(points) < 2:
+            continue
+        fixed, per_package, r2 = fit_linear(points)
+        coefficient, exponent = fit_power(points)
+        model[metric] = Fit(fixed, per_package, r2, coefficient, exponent)
+    return model
+
+
+def best_chunk_size(summary, latency_budget=None):
+    """Returns measured size with the lowest total time per package.
+
+    Only sizes with median total time within ``latency_budget`` seconds are considered.
+    """
+    candidates = [
+        item for item in summary
+        if item['total'] is not None and
+        (latency_budget is None or item['total'] <= latency_budget)
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda item: item['total'] / item['packages'])['size']
+
+
+def _ms(value):
+    return '-' if value is None else '{:.2f}'.format(value * 1000)
+
+
+def print_report(summary, model, latency_budget=None):
+    """Prints per-size medians, fitted model and recommended chunk size."""
+    print('{:>8} {:>6} {:>12} {:>12} {:>10} {:>10} {:>10} {:>10} {:>12}'.format(
+        'packages', 'errors', 'request B', 'response B', 'ttfb ms', 'transfer ms', 'decode ms',
+        'total ms', 'us/package'))
+    for item in summary:
+        print('{:>8} {:>6} {:>12} {:>12} {:>10} {:>10} {:>10} {:>10} {:>12}'.format(
+            item['packages'], item['errors'],
+            '-' if item['request_bytes'] is None else '{:.0f}'.format(item['request_bytes']),
+            '-' if item['response_bytes'] is None else '{:.0f}'.format(item['response_bytes']),
+            _ms(item['ttfb']), _ms(item['transfer']), _ms(item['decode']), _ms(item['total']),
+            '-' if item['total'] is None else
+            '{:.1f}'.format(item['total'] / item['packages'] * 1e6)))
+    print()
+    print('{:<16} {:>14} {:>16} {:>8} {:>10}'.format(
+        'metric', 'fixed', 'per package', 'R^2', 'exponent'))
+    for metric in METRICS:
+        fit = model.get(metric)
+        if fit is None:
+            continue
+        scale, unit = (1, 'B') if metric.endswith('_bytes') else (1000, 'ms')
+        print('{:<16} {:>14} {:>16} {:>8} {:>10}{}'.format(
+            metric,
+            '{:.3f} {}'.format(fit.fixed * scale, unit),
+            '{:.5f} {}'.format(fit.per_package * scale, unit),
+            '-' if fit.r2 is None else '{:.3f}'.format(fit.r2),
+            '-' if fit.exponent is None else '{:.2f}'.format(fit.exponent),
+            '  super-linear' if fit.exponent and fit.exponent > SUPERLINEAR_EXPONENT else ''))
+    best = best_chunk_size(summary, latency_budget)
+    if best is not None:
+        print()
+        print('Lowest time per package at {} packages per request{}'.format(
+            best, '' if latency_budget is None else
+            ' (within {:.0f} ms budget)'.format(latency_budget * 1000)))
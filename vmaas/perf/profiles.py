@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-phase load profiles.
+
+Profile is a list of phases, every phase is expanded into stages with constant
+request rate. Stages become tsung arrival phases (one request per user, so user
+arrival rate is the request rate) or the schedule of the native engine, and
+statistics are reported per stage.
+
+Phases on command line (rates are in requests per second, durations in seconds):
+
+* ``plateau:RATE:DURATION``
+* ``step:FROM:TO:STEPS:DURATION`` - ``STEPS`` stages of the same length
+* ``linear:FROM:TO:DURATION`` - approximated by stages ``ramp_step`` seconds long
+* ``spike:BASE:PEAK:DURATION:SPIKE`` - ``PEAK`` rate for ``SPIKE`` seconds in the middle
+"""
+
+import collections
+import math
+
+from vmaas.perf import stats
+from vmaas.perf.histogram import Histogram
+
+
+PHASE_TYPES = collections.OrderedDict((
+    ('plateau', ('rate', 'duration')),
+    ('step', ('from', 'to', 'steps', 'duration')),
+    ('linear', ('from', 'to', 'duration')),
+    ('spike', ('base', 'peak', 'duration', 'spike')),
+))
+
+# default length of stages approximating linear ramps, in seconds
+RAMP_STEP = 5
+
+Stage = collections.namedtuple('Stage', 'name start duration rate')
+
+
+def parse_phase(text):
+    """Parses ``TYPE:VALUE:...`` phase specification to dict."""
+    phase_type, __, values = text.partition(':')
+    if phase_type not in PHASE_TYPES:
+        raise ValueError('Unknown phase type {!r} ({} available)'.format(
+            phase_type, ', '.join(PHASE_TYPES)))
+    keys = PHASE_TYPES[phase_type]
+    values = values.split(':') if values else []
+    if len(values) != len(keys):
+        raise ValueError('Phase {!r} expects {}'.format(
+            phase_type, ':'.join([phase_type] + [key.upper() for key in keys])))
+    phase = {'type': phase_type}
+    for key, value in zip(keys, values):
+        phase[key] = float(value)
+    return phase
+
+
+def load_profile(profile_file):
+    """Loads list of phases from YAML file.
+
+    The file holds list of mappings (or mapping with ``phases`` list) with ``type``
+    and the same keys as the command line specification, e.g.
+    ``{type: linear, from: 10, to: 100, duration: 120}``.
+    """
+    # imported here so the perf tools don't need YAML unless profile file is used
+    import yaml
+
+    with open(profile_file) as input_file:
+        data = yaml.safe_load(input_file)
+    if isinstance(data, dict):
+        data = data.get('phases')
+    if not isinstance(data, list):
+        raise ValueError('List of phases expected in {}'.format(profile_file))
+    phases = []
+    for item in data:
+        phase_type = item.get('type')
+        if phase_type not in PHASE_TYPES:
+            raise ValueError('Unknown phase type {!r} in {}'.format(phase_type, profile_file))
+        missing = [key for key in PHASE_TYPES[phase_type] if key not in item]
+        if missing:
+            raise ValueError('Phase {!r} in {} is missing {}'.format(
+                phase_type, profile_file, ', '.join(missing)))
+        phase = {'type': phase_type}
+        phase.update({key: float(item[key]) for key in PHASE_TYPES[phase_type]})
+        phases.append(phase)
+    return phases
+
+
+def _check_rate(rate):
+    if rate <= 0:
+        raise ValueError('Rate must be positive, got {:g}'.format(rate))
+    return rate
+
+
+def _phase_stages(phase, ramp_step):
+    """Yields ``(name, duration, rate)`` of phase stages."""
+    phase_type = phase['type']
+    duration = phase['duration']
+    if duration <= 0:
+        raise ValueError('Duration of {} phase must be positive'.format(phase_type))
+    if phase_type == 'plateau':
+        yield 'plateau', duration, _check_rate(phase['rate'])
+    elif phase_type == 'step':
+        steps = int(phase['steps'])
+        if steps < 1:
+            raise ValueError('Step phase needs at least one step')
+        for num in range(steps):
+            rate = phase['from'] + (phase['to'] - phase['from']) * num / max(steps - 1, 1)
+            yield 'step {}/{}'.format(num + 1, steps), duration / steps, _check_rate(rate)
+    elif phase_type == 'linear':
+        steps = max(int(math.ceil(duration / ramp_step)), 1)
+        for num in range(steps):
+            # rate in the middle of the stage
+            rate = phase['from'] + (phase['to'] - phase['from']) * (num + 0.5) / steps
+            yield 'linear {}/{}'.format(num + 1, steps), duration / steps, _check_rate(rate)
+    elif phase_type == 'spike':
+        spike = phase['spike']
+        if not 0 < spike < duration:
+            raise ValueError('Spike must be shorter than the whole spike phase')
+        base = _check_rate(phase['base'])
+        yield 'spike base', (duration - spike) / 2, base
+        yield 'spike peak', spike, _check_rate(phase['peak'])
+        yield 'spike base', (duration - spike) / 2, base
+
+
+def expand(phases, ramp_step=RAMP_STEP):
+    """Expands phases into list of ``Stage`` records with constant rate."""
+    stages = []
+    start = 0.0
+    for num, phase in enumerate(phases, 1):
+        for name, duration, rate in _phase_stages(phase, ramp_step):
+            stages.append(Stage('{} {}'.format(num, name), start, duration, rate))
+            start += duration
+    return stages
+
+
+def total_duration(stages):
+    """Returns duration of the whole profile in seconds."""
+    return sum(stage.duration for stage in stages)
+
+
+def stage_index(stages, offset):
+    """Returns index of stage running at ``offset`` seconds from start, ``None`` after the end."""
+    for index, stage in enumerate(stages):
+        if stage.start <= offset < stage.start + stage.duration:
+            return index
+    return None
+
+
+def stage_report(stages, records):
+    """Summarizes results per stage.
+
+    Args:
+        stages: List of ``Stage``
+        records: Iterable of ``(offset, latency, ok)`` tuples, where offset is
+            request start in seconds from the start of the run
+
+    Returns:
+        List of dicts with stage data and statistics.
+    """
+    histograms = [Histogram() for __ in stages]
+    errors = [0] * len(stages)
+    for offset, latency, ok in records:
+        index = stage_index(stages, offset)
+        if index is None:
+            continue
+        if ok:
+            histograms[index].record(latency)
+        else:
+            errors[index] += 1
+    report = []
+    for stage, histogram, stage_errors in zip(stages, histograms, errors):
+        summary = histogram.summarize(stage.duration)
+        summary.update(stage._asdict())
+        summary['errors'] = stage_errors
+        report.append(summary)
+    return report
+
+
+def engine_records(result):
+    """Converts native engine result into records accepted by ``stage_report``.
+
+    Latency of every request is represented by its bucket value and request start
+    by start of its reporting interval.
+    """
+    for interval in result.intervals:
+        for latency in interval.histogram.samples():
+            yield interval.start, latency, True
+        for __ in range(sum(interval.errors.values())):
+            yield interval.start, None, False
+
+
+def print_stage_report(report):
+    """Prints per stage statistics next to target rate."""
+    print(stats.format_header('stage') + ' {:>8} {:>10} {:>10} {:>8}'.format(
+        'start s', 'rate', 'req/s', 'errors'))
+    for item in report:
+        print(stats.format_summary(item['name'], item) + ' {:>8} {:>10.2f} {:>10.2f} {:>8}'.format(
+            '{:g}'.format(round(item['start'], 3)), item['rate'],
+            item.get('throughput', 0), item['errors']))
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Replay of captured production requests.
+
+Capture is a JSONL file, one request per line::
+
+    {"timestamp": 1530000000.123, "method": "POST", "path": "/api/v1/updates",
+     "body": {"package_list": ["bash-0:4.2.46-20.el7_2.x86_64"]}, "latency": 0.042}
+
+``timestamp`` is either epoch seconds or ISO 8601 string, ``body`` is optional
+and ``latency`` (in seconds) is the latency recorded in the original capture, if known.
+Only requests for ``/api/v1`` endpoints are replayed.
+"""
+
+import asyncio
+import bisect
+import collections
+import json
+import time
+
+import iso8601
+
+from vmaas.perf import stats
+from vmaas.perf.http import ConnectionPool, HTTPError
+
+
+API_PREFIX = '/api/v1/'
+
+# upper bounds (in seconds) of buckets of latency recorded in the original capture
+CAPTURED_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0)
+
+CapturedRequest = collections.namedtuple(
+    'CapturedRequest', 'timestamp method path body latency')
+
+Result = collections.namedtuple('Result', 'request status latency error')
+
+
+def _parse_timestamp(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return iso8601.parse_date(value).timestamp()
+
+
+def load_capture(capture_file):
+    """Loads captured requests for API endpoints, sorted by timestamp."""
+    entries = []
+    with open(capture_file) as capture:
+        for num, line in enumerate(capture, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+                entry = CapturedRequest(
+                    _parse_timestamp(rec['timestamp']),
+                    rec['method'].upper(),
+                    rec['path'],
+                    rec.get('body'),
+                    rec.get('latency'),
+                )
+            except (ValueError, KeyError, TypeError, iso8601.ParseError) as err:
+                raise ValueError('{}:{}: malformed capture record: {}'.format(
+                    capture_file, num, err))
+            if entry.path.startswith(API_PREFIX):
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry.timestamp)
+    return entries
+
+
+def endpoint_name(path):
+    """Returns name of API endpoint, e.g. ``updates`` for ``/api/v1/updates/bash``."""
+    return path[len(API_PREFIX):].split('/', 1)[0].split('?', 1)[0]
+
+
+def _bucket_labels():
+    labels = []
+    lower = 0
+    for upper in CAPTURED_BUCKETS:
+        labels.append('{:g}-{:g}ms'.format(lower * 1000, upper * 1000))
+        lower = upper
+    labels.append('>={:g}ms'.format(lower * 1000))
+    labels.append('unknown')
+    return labels
+
+
+BUCKET_LABELS = _bucket_labels()
+
+
+def captured_bucket(latency):
+    """Returns label of bucket of latency recorded in the original capture."""
+    if latency is None:
+        return 'unknown'
+    return BUCKET_LABELS[bisect.bisect_right(CAPTURED_BUCKETS, latency)]
+
+
+async def _send(pool, entry, results):
+    start = time.monotonic()
+    try:
+        response = await pool.request(entry.method, entry.path, entry.body)
+    except (OSError, HTTPError, asyncio.TimeoutError) as err:
+        results.append(Result(entry, None, None, str(err) or type(err).__name__))
+        return
+    # measured from the scheduled send time, so waiting for busy connection counts too
+    results.append(Result(entry, response.status, time.monotonic() - start, None))
+
+
+async def _replay_timed(pool, entries, speedup, results):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_ts = entries[0].timestamp
+    tasks = []
+    for entry in entries:
+        delay = (entry.timestamp - first_ts) / speedup - (loop.time() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(_send(pool, entry, results)))
+    await asyncio.gather(*tasks)
+
+
+async def _replay_max(pool, entries, workers, results):
+    pending = iter(entries)
+
+    async def _worker():
+        for entry in pending:
+            await _send(pool, entry, results)
+
+    await asyncio.gather(*[_worker() for __ in range(workers)])
+
+
+async def _replay(entries, servers, connections, speedup, timeout):
+    pool = ConnectionPool(servers, connections, timeout)
+    results = []
+    try:
+        if speedup:
+            await _replay_timed(pool, entries, speedup, results)
+        else:
+            await _replay_max(pool, entries, connections, results)
+    finally:
+        pool.close()
+    return results
+
+
+def replay(entries, servers, connections=10, speedup=1.0, timeout=30):
+    """Replays captured requests against servers.
+
+    Args:
+        entries: List of ``CapturedRequest`` records
+        servers: List of ``Server`` records
+        connections: Number of keep-alive connections
+        speedup: Inter-arrival times are divided by this factor; ``None`` sends
+            requests as fast as the connections allow
+        timeout: Timeout for single request in seconds
+
+    Returns:
+        Tuple of list of ``Result`` records and duration of the replay.
+    """
+    if not entries:
+        return [], 0.0
+    started = time.monotonic()
+    results = asyncio.run(_replay(entries, servers, connections, speedup, timeout))
+    return results, time.monotonic() - started
+
+
+def get_report(results, duration):
+    """Summarizes replay results, split by endpoint and by captured latency."""
+    by_endpoint = collections.defaultdict(list)
+    by_captured = collections.defaultdict(list)
+    captured = collections.defaultdict(list)
+    statuses = collections.Counter()
+    errors = collections.Counter()
+    latencies = []
+    for result in results:
+        if result.error:
+            errors[result.error] += 1
+            continue
+        statuses[result.status] += 1
+        latencies.append(result.latency)
+        by_endpoint[endpoint_name(result.request.path)].append(result.latency)
+        bucket = captured_bucket(result.request.latency)
+        by_captured[bucket].append(result.latency)
+        if result.request.latency is not None:
+            captured[bucket].append(result.request.latency)
+
+    return {
+        'duration': duration,
+        'total': stats.summarize(latencies, duration),
+        'endpoints': {name: stats.summarize(samples, duration)
+                      for name, samples in by_endpoint.items()},
+        'captured': {bucket: {'replayed': stats.summarize(samples),
+                              'captured': stats.summarize(captured[bucket])}
+                     for bucket, samples in by_captured.items()},
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'errors': dict(errors),
+    }
+
+
+def print_report(report):
+    """Prints replay report."""
+    print('Duration: {:.2f} s, throughput: {:.2f} req/s'.format(
+        report['duration'], report['total'].get('throughput', 0)))
+    print()
+    print(stats.format_header('endpoint'))
+    for name in sorted(report['endpoints']):
+        print(stats.format_summary(name, report['endpoints'][name]))
+    print(stats.format_summary('TOTAL', report['total']))
+    print()
+    print(stats.format_header('captured latency'))
+    for bucket in sorted(report['captured'], key=BUCKET_LABELS.index):
+        print(stats.format_summary(
+            bucket + ' replayed', report['captured'][bucket]['replayed']))
+        print(stats.format_summary(
+            bucket + ' captured', report['captured'][bucket]['captured']))
+    print()
+    print('HTTP statuses: {}'.format(stats.format_counts(report['statuses'])))
+    if report['errors']:
+        print('Errors: {}'.format(stats.format_counts(report['errors'])))
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Resource usage sampling of local VMaaS server processes.
+
+Data are read directly from ``/proc``, so only Linux is supported and no extra
+dependencies are needed.
+"""
+
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+Sample = collections.namedtuple('Sample', 'timestamp processes cpu_percent rss fds threads')
+
+# one row of resource usage aligned with latency timeline
+TimelineRow = collections.namedtuple(
+    'TimelineRow', 'start end p99 cpu_percent rss fds threads')
+
+
+def _parent_pids():
+    """Returns ``{pid: parent_pid}`` of all running processes."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry)) as stat_file:
+                parents[int(entry)] = int(stat_file.read().rsplit(')', 1)[1].split()[1])
+        except (IOError, OSError, IndexError, ValueError):
+            continue
+    return parents
+
+
+def own_process_tree(parents=None):
+    """Returns PIDs of this process, its ancestors and its descendants.
+
+    Command lines of the perf script and of its workers usually contain the pattern
+    of the sampled server processes, so they have to be excluded.
+    """
+    parents = _parent_pids() if parents is None else parents
+    own_pid = os.getpid()
+    pids = {own_pid}
+    pid = parents.get(own_pid)
+    while pid:
+        pids.add(pid)
+        pid = parents.get(pid)
+    children = collections.defaultdict(list)
+    for child, parent in parents.items():
+        children[parent].append(child)
+    stack = [own_pid]
+    while stack:
+        for child in children[stack.pop()]:
+            if child not in pids:
+                pids.add(child)
+                stack.append(child)
+    return pids
+
+
+def find_pids(pattern):
+    """Returns PIDs of processes whose command line matches regular expression.
+
+    Processes of the sampler's own process tree are never returned.
+    """
+    regex = re.compile(pattern)
+    parents = _parent_pids()
+    excluded = own_process_tree(parents)
+    pids = []
+    for pid in parents:
+        if pid in excluded:
+            continue
+        try:
+            with open('/proc/{}/cmdline'.format(pid), 'rb') as cmdline_file:
+                cmdline = cmdline_file.read().replace(b'\0', b' ').decode('utf-8', 'replace')
+        except (IOError, OSError):
+            continue
+        if cmdline and regex.search(cmdline):
+            pids.append(pid)
+    return sorted(pids)
+
+
+def read_process(pid):
+    """Reads CPU time (seconds), RSS (bytes), open file descriptors and threads of process.
+
+    Returns ``None`` when the process doesn't exist anymore.
+    """
+    try:
+        with open('/proc/{}/stat'.format(pid)) as stat_file:
+            # command name can contain spaces, fields are counted after it
+            fields = stat_file.read().rsplit(')', 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        threads = int(fields[17])
+        rss = 0
+        with open('/proc/{}/status'.format(pid)) as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024
+                    break
+        fds = len(os.listdir('/proc/{}/fd'.format(pid)))
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+    return cpu, rss, fds, threads
+
+
+class ResourceSampler(object):
+    """Samples resources of processes in background thread.
+
+    Args:
+        pids: List of PIDs to sample
+        patterns: List of regular expressions matching command lines of processes
+            to sample; matching processes are looked up again for every sample,
+            so restarted server processes are followed
+        interval: Sampling interval in seconds
+    """
+    def __init__(self, pids=None, patterns=None, interval=1.0):
+        self.pids = list(pids or [])
+        self.patterns = list(patterns or [])
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_cpu = {}
+        self._last_time = None
+
+    def _current_pids(self):
+        pids = set(self.pids)
+        for pattern in self.patterns:
+            pids.update(find_pids(pattern))
+        return pids
+
+    def sample(self):
+        """Takes one sample of all sampled processes."""
+        now = time.time()
+        cpu_used = 0.0
+        rss = fds = threads = processes = 0
+        current_cpu = {}
+        for pid in self._current_pids():
+            data = read_process(pid)
+            if data is None:
+                continue
+            cpu, proc_rss, proc_fds, proc_threads = data
+            current_cpu[pid] = cpu
+            cpu_used += cpu - self._last_cpu.get(pid, cpu)
+            rss += proc_rss
+            fds += proc_fds
+            threads += proc_threads
+            processes += 1
+
+        cpu_percent = None
+        if self._last_time is not None and now > self._last_time:
+            cpu_percent = 100.0 * cpu_used / (now - self._last_time)
+        self._last_cpu = current_cpu
+        self._last_time = now
+        self.samples.append(Sample(now, processes, cpu_percent, rss, fds, threads))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Starts sampling in background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops sampling and takes the final sample."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def timeline(samples, latency_timeline):
+    """Aligns resource samples with latency timeline.
+
+    Args:
+        samples: List of ``Sample`` records
+        latency_timeline: List of ``(start, end, p99)`` tuples with wall clock times
+
+    Returns:
+        List of ``TimelineRow``, one per latency timeline item; CPU usage is averaged,
+        for the rest maximum in the interval is used.
+    """
+    rows = []
+    for start, end, p99 in latency_timeline:
+        # CPU percent of sample covers period before it, so sample at the end counts too
+        in_interval = [smp for smp in samples if start < smp.timestamp <= end]
+        cpu = [smp.cpu_percent for smp in in_interval if smp.cpu_percent is not None]
+        rows.append(TimelineRow(
+            start, end, p99,
+            sum(cpu) / len(cpu) if cpu else None,
+            max((smp.rss for smp in in_interval), default=None),
+            max((smp.fds for smp in in_interval), default=None),
+            max((smp.threads for smp in in_interval), default=None),
+        ))
+    return rows
+
+
+def _format(value, fmt):
+    return '-' if value is None else fmt.format(value)
+
+
+def print_timeline(rows, started):
+    """Prints resource usage next to p99 latency."""
+    print('{:>8} {:>10} {:>8} {:>10} {:>8} {:>8}'.format(
+        'time s', 'p99 ms', 'cpu %', 'rss MiB', 'fds', 'threads'))
+    for row in rows:
+        print('{:>8} {:>10} {:>8} {:>10} {:>8} {:>8}'.format(
+            '{:g}'.format(round(row.start - started, 3)),
+            _format(row.p99 and row.p99 * 1000, '{:.2f}'),
+            _format(row.cpu_percent, '{:.1f}'),
+            _format(row.rss and row.rss / 2.0 ** 20, '{:.1f}'),
+            _format(row.fds, '{}'),
+            _format(row.threads, '{}')))
+
+
+def save_timeline(rows, samples, out_file):
+    """Saves aligned timeline and raw samples as JSON."""
+    with open(out_file, 'w') as out:
+        json.dump({
+            'timeline': [row._asdict() for row in rows],
+            'samples': [smp._asdict() for smp in samples],
+        }, out)
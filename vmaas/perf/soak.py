@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Soak test measuring query latency while data are synced and reloaded.
+
+Steady query load runs for the whole test while syncs are triggered on a schedule.
+Sync is considered finished once the ``exported`` timestamp reported by ``dbchange``
+changes, i.e. when the webapp got new data to reload. Latency and errors in a window
+before each sync are compared with the period from its start until a window after its end.
+"""
+
+import collections
+import threading
+import time
+
+from vmaas.perf import stats
+from vmaas.perf.histogram import Histogram
+
+
+# sync kinds and actions of ``SyncApiActions`` triggering them
+SYNC_ACTIONS = collections.OrderedDict((
+    ('cve', 'cvescan'),
+    ('repo', 'reporefresh'),
+    ('all', 'sync_all'),
+    ('export', 'export'),
+))
+
+SyncEvent = collections.namedtuple('SyncEvent', 'kind started finished error')
+
+
+def get_api(server, sync_server=None):
+    """Creates REST API client for query server and sync server."""
+    # imported here so the perf tools don't need REST client deps unless syncs are used
+    from vmaas.rest.client import VMaaSClient
+
+    if sync_server is None:
+        return VMaaSClient(server.host, port=server.port)
+    return VMaaSClient(server.host, port=server.port,
+                       address2=sync_server.host, port2=sync_server.port)
+
+
+class SyncScheduler(object):
+    """Triggers syncs in background thread and records when they start and finish.
+
+    Args:
+        api: ``VMaaSClient`` instance
+        kinds: List of sync kinds (keys of ``SYNC_ACTIONS``) triggered in turns
+        every: Seconds between starts of syncs; next sync is never started before
+            the previous one finishes
+        first: Seconds before the first sync, ``every`` by default
+        poll_interval: How often ``dbchange`` is checked while sync is running
+        sync_timeout: How long to wait for sync to finish
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, api, kinds, every, first=None, poll_interval=1.0, sync_timeout=1800):
+        self.api = api
+        self.kinds = list(kinds)
+        self.every = every
+        self.first = every if first is None else first
+        self.poll_interval = poll_interval
+        self.sync_timeout = sync_timeout
+        self.events = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync(self, kind):
+        """Triggers sync and waits until it's finished; returns ``SyncEvent``."""
+        # imported here so the perf tools don't need REST client deps unless syncs are used
+        from vmaas.rest import tools
+        from wait_for import TimedOutError
+
+        started = time.time()
+        try:
+            since = tools.get_dbchange_time(self.api, 'exported')
+            response = getattr(self.api, SYNC_ACTIONS[kind])()
+            status = response.raw.status_code
+        except Exception as err:  # pylint: disable=broad-except
+            return SyncEvent(kind, started, None, type(err).__name__)
+        if status >= 400:
+            return SyncEvent(kind, started, None, 'http_{}'.format(status))
+
+        try:
+            waited = tools.wait_for_sync(
+                'export', since=since, timeout=self.sync_timeout, delay=self.poll_interval,
+                max_delay=self.poll_interval, api=self.api, stop=self._stop)
+        except TimedOutError:
+            return SyncEvent(kind, started, None, 'timeout')
+        except Exception as err:  # pylint: disable=broad-except
+            return SyncEvent(kind, started, None, type(err).__name__)
+        if waited is None:
+            return SyncEvent(kind, started, None, 'stopped')
+        return SyncEvent(kind, started, time.time(), None)
+
+    def _run(self):
+        next_time = time.time() + self.first
+        position = 0
+        while not self._stop.wait(max(next_time - time.time(), 0)):
+            event = self.sync(self.kinds[position % len(self.kinds)])
+            self.events.append(event)
+            position += 1
+            next_time = max(next_time + self.every, time.time())
+
+    def start(self, *__):
+        """Starts triggering syncs in background thread; usable as ``on_start`` callback."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sync-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops triggering syncs, sync in progress is not waited for."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+
+def _merge_window(result, start, end):
+    """Merges engine intervals starting in ``[start, end)`` wall clock window."""
+    histogram = Histogram()
+    errors = 0
+    peak = None
+    for interval in result.intervals:
+        interval_start = result.started + interval.start
+        if not start <= interval_start < end:
+            continue
+        histogram.merge(interval.histogram)
+        errors += sum(interval.errors.values())
+        p99 = interval.histogram.percentile(99)
+        if p99 is not None and (peak is None or p99 > peak[1]):
+            peak = (interval.start, p99)
+    return histogram, errors, peak
+
+
+def reload_report(result, events, window=30):
+    """Summarizes latency and errors around every sync.
+
+    Args:
+        result: ``EngineResult`` of the query load
+        events: List of ``SyncEvent``
+        window: Seconds before sync used as reference and seconds after sync
+            end still counted to the sync
+
+    Returns:
+        List of dicts, one per sync.
+    """
+    report = []
+    for event in events:
+        # interval in which the sync started already counts to the sync
+        start = result.started + (event.started - result.started) // result.interval * \
+            result.interval
+        end = (event.finished or event.started) + window
+        before, before_errors, __ = _merge_window(result, start - window, start)
+        during, during_errors, peak = _merge_window(result, start, end)
+        before_summary = before.summarize(window)
+        during_summary = during.summarize(end - start)
+        before_summary['errors'] = before_errors
+        during_summary['errors'] = during_errors
+        report.append({
+            'kind': event.kind,
+            'start': event.started - result.started,
+            'sync_duration': event.finished - event.started if event.finished else None,
+            'error': event.error,
+            'before': before_summary,
+            'during': during_summary,
+            'peak_time': peak[0] if peak else None,
+            'peak_p99': peak[1] if peak else None,
+        })
+    return report
+
+
+def _ratio(new, old):
+    if not new or not old:
+        return '-'
+    return '{:.2f}x'.format(new / old)
+
+
+def print_timeline(result, events):
+    """Prints per-interval latency with sync start and end marks."""
+    marks = collections.defaultdict(list)
+    for event in events:
+        marks[int((event.started - result.started) // result.interval)].append(
+            '{} sync started'.format(event.kind))
+        if event.finished:
+            marks[int((event.finished - result.started) // result.interval)].append(
+                '{} data exported'.format(event.kind))
+        elif event.error:
+            marks[int((event.started - result.started) // result.interval)].append(
+                '{} sync failed: {}'.format(event.kind, event.error))
+    print(stats.format_header('interval') + ' {:>8}  {}'.format('errors', 'sync'))
+    for interval in result.intervals:
+        print(stats.format_summary(
+            '{:g} s'.format(interval.start), interval.histogram.summarize(result.interval)) +
+              ' {:>8}  {}'.format(
+                  sum(interval.errors.values()), ', '.join(marks.get(interval.index, []))))
+
+
+def print_reload_report(report, window):
+    """Prints latency and errors before and around every sync."""
+    print('Window: {:g} s'.format(window))
+    print('{:>8} {:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>8} {:>8} {:>10}'.format(
+        'kind', 'start s', 'sync s', 'p99 ms', 'p99 ms', 'p99', 'peak ms', 'errors', 'errors',
+        'peak at s'))
+    print('{:>8} {:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>8} {:>8} {:>10}'.format(
+        '', '', '', 'before', 'during', 'change', '', 'before', 'during', ''))
+    for item in report:
+        before = item['before']
+        during = item['during']
+        print('{:>8} {:>8.0f} {:>8} {:>10} {:>10} {:>10} {:>10} {:>8} {:>8} {:>10}'.format(
+            item['kind'],
+            item['start'],
+            '{:.0f}'.format(item['sync_duration']) if item['sync_duration'] else
+            (item['error'] or '-'),
+            '{:.2f}'.format(before['p99'] * 1000) if before.get('p99') else '-',
+            '{:.2f}'.format(during['p99'] * 1000) if during.get('p99') else '-',
+            _ratio(during.get('p99'), before.get('p99')),
+            '{:.2f}'.format(item['peak_p99'] * 1000) if item['peak_p99'] else '-',
+            before['errors'],
+            during['errors'],
+            '{:g}'.format(item['peak_time']) if item['peak_time'] is not None else '-'))
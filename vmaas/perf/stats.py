@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Latency statistics helpers.
+"""
+
+import math
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_samples, pct):
+    """Returns percentile of already sorted samples (nearest-rank method)."""
+    if not sorted_samples:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[max(rank, 1) - 1]
+
+
+def summarize(samples, duration=None):
+    """Summarizes latency samples (in seconds) into dict of statistics."""
+    samples = sorted(samples)
+    summary = {'count': len(samples)}
+    if duration:
+        summary['throughput'] = len(samples) / duration
+    if not samples:
+        return summary
+    summary.update({
+        'mean': sum(samples) / len(samples),
+        'min': samples[0],
+        'max': samples[-1],
+    })
+    for pct in PERCENTILES:
+        summary['p{}'.format(pct)] = percentile(samples, pct)
+    return summary
+
+
+def format_summary(name, summary):
+    """Formats summary as one line of report, latencies in milliseconds."""
+    line = '{:<24} {:>8}'.format(name, summary['count'])
+    for key in ('mean', 'p50', 'p90', 'p99', 'max'):
+        value = summary.get(key)
+        line += ' {:>10}'.format('-' if value is None else '{:.2f}'.format(value * 1000))
+    return line
+
+
+def format_header(name='name'):
+    """Formats header matching ``format_summary`` lines."""
+    return '{:<24} {:>8}'.format(name, 'count') + ''.join(
+        ' {:>10}'.format(key + ' ms') for key in ('mean', 'p50', 'p90', 'p99', 'max'))
+
+
+def format_counts(counts):
+    """Formats dict of counts (e.g. HTTP statuses) as one line."""
+    return ', '.join('{}: {}'.format(*item) for item in sorted(counts.items()))
+
+
+def _ranks(values):
+    """Returns ranks of values (ties get average rank) and sum of ``t^3 - t`` over ties."""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    ties = 0.0
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        rank = (i + j) / 2.0 + 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = rank
+        size = j - i + 1
+        ties += size ** 3 - size
+        i = j + 1
+    return ranks, ties
+
+
+def mann_whitney_u(old, new):
+    """One-sided Mann-Whitney U test that ``new`` samples tend to be greater than ``old``.
+
+    Uses normal approximation with tie and continuity correction, which is accurate
+    for the sample sizes perf runs produce.
+
+    Returns:
+        Tuple of U statistic of ``new`` samples and p-value.
+    """
+    n_old, n_new = len(old), len(new)
+    if not n_old or not n_new:
+        return None, 1.0
+    ranks, ties = _ranks(list(old) + list(new))
+    u_new = sum(ranks[n_old:]) - n_new * (n_new + 1) / 2.0
+    total = n_old + n_new
+    mean = n_old * n_new / 2.0
+    variance = n_old * n_new / 12.0 * ((total + 1) - ties / (total * (total - 1) or 1))
+    if variance <= 0:
+        return u_new, 1.0
+    z_score = (u_new - mean - 0.5) / math.sqrt(variance)
+    return u_new, 0.5 * math.erfc(z_score / math.sqrt(2))
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Readers of tsung output files.
+
+Metrics are computed directly from ``tsung.log`` (and ``tsung.dump`` when traffic
+dump was enabled), so no ``tsung_stats`` (Perl, gnuplot) is needed to get the numbers.
+"""
+
+import bisect
+import collections
+import csv
+import json
+import os
+
+from vmaas.perf import stats
+
+
+LOG_FILE = 'tsung.log'
+DUMP_FILE = 'tsung.dump'
+
+# sample lines have format "stats: name count mean stddev max min global_mean global_count",
+# counter lines have format "stats: name count total"
+SAMPLE_VALUES = 7
+
+# one record of ``tsung.dump`` written when ``dumptraffic="protocol"`` is set;
+# duration is converted from milliseconds to seconds
+DumpRecord = collections.namedtuple(
+    'DumpRecord', 'timestamp method host url status size duration error')
+
+
+def read_dump(dump_file):
+    """Streams records of tsung protocol dump file.
+
+    Lines have format ``date;pid;id;http method;host;URL;HTTP status;size;duration;
+    transaction;match;error;tag``.
+    """
+    with open(dump_file) as dump:
+        for line in dump:
+            if line.startswith('#') or not line.strip():
+                continue
+            fields = line.rstrip('\n').split(';')
+            if len(fields) < 9:
+                continue
+            try:
+                status = int(fields[6])
+            except ValueError:
+                status = None
+            yield DumpRecord(
+                timestamp=float(fields[0]),
+                method=fields[3].upper(),
+                host=fields[4],
+                url=fields[5],
+                status=status,
+                size=int(fields[7] or 0),
+                duration=float(fields[8]) / 1000.0,
+                error=fields[11] if len(fields) > 11 else '',
+            )
+
+
+def read_log(log_file):
+    """Streams intervals of tsung log.
+
+    Yields:
+        Tuple of timestamp of the dump and dict mapping name of statistics
+        to list of its values.
+    """
+    timestamp = None
+    values = {}
+    with open(log_file) as log:
+        for line in log:
+            if line.startswith('# stats: dump at '):
+                if timestamp is not None:
+                    yield timestamp, values
+                timestamp = float(line.rsplit(None, 1)[1])
+                values = {}
+            elif line.startswith('stats: ') and timestamp is not None:
+                fields = line.split()[1:]
+                try:
+                    values[fields[0]] = [float(val) for val in fields[1:]]
+                except (IndexError, ValueError):
+                    continue
+    if timestamp is not None:
+        yield timestamp, values
+
+
+def _interval_metrics(timestamp, duration, values):
+    metrics = collections.OrderedDict()
+    metrics['timestamp'] = timestamp
+    metrics['duration'] = duration
+    metrics['users'] = int(values.get('users', [0])[0])
+
+    request = values.get('request')
+    count = int(request[0]) if request else 0
+    metrics['requests'] = count
+    metrics['request_rate'] = count / duration if duration else None
+    if count and len(request) >= SAMPLE_VALUES:
+        metrics['mean_ms'] = request[1]
+        metrics['max_ms'] = request[3]
+        metrics['min_ms'] = request[4]
+    else:
+        metrics['mean_ms'] = metrics['max_ms'] = metrics['min_ms'] = None
+
+    metrics['errors'] = 0
+    for name in sorted(values):
+        if name.isdigit():
+            metrics['status_{}'.format(name)] = int(values[name][0])
+        elif name.startswith('error_'):
+            metrics[name] = int(values[name][0])
+            metrics['errors'] += int(values[name][0])
+    return metrics
+
+
+def get_metrics(log_dir, interval=None):
+    """Computes per-interval metrics of tsung run.
+
+    Percentiles of response time are computed only when ``tsung.dump`` is present
+    in ``log_dir``.
+
+    Args:
+        log_dir: Tsung log directory
+        interval: Length of the first interval; tsung dumps stats every 10 seconds
+            by default, later intervals are computed from timestamps of dumps
+
+    Returns:
+        List of dicts, one per interval.
+    """
+    intervals = []
+    previous = None
+    for timestamp, values in read_log(os.path.join(log_dir, LOG_FILE)):
+        if previous is None:
+            duration = interval or 10.0
+        else:
+            duration = timestamp - previous
+        intervals.append(_interval_metrics(timestamp, duration, values))
+        previous = timestamp
+
+    dump_file = os.path.join(log_dir, DUMP_FILE)
+    if intervals and os.path.exists(dump_file):
+        _add_percentiles(intervals, dump_file)
+    return intervals
+
+
+def _add_percentiles(intervals, dump_file):
+    ends = [metrics['timestamp'] for metrics in intervals]
+    samples = [[] for __ in intervals]
+    for rec in read_dump(dump_file):
+        index = bisect.bisect_left(ends, rec.timestamp)
+        if index < len(samples):
+            samples[index].append(rec.duration)
+    for metrics, interval_samples in zip(intervals, samples):
+        interval_samples.sort()
+        for pct in stats.PERCENTILES:
+            value = stats.percentile(interval_samples, pct)
+            metrics['p{}_ms'.format(pct)] = None if value is None else value * 1000
+
+
+def latency_timeline(intervals):
+    """Returns ``(start, end, p99)`` wall clock timeline of tsung metrics."""
+    return [
+        (metrics['timestamp'] - metrics['duration'],
+         metrics['timestamp'],
+         metrics['p99_ms'] / 1000 if metrics.get('p99_ms') is not None else None)
+        for metrics in intervals
+    ]
+
+
+def write_json(intervals, out):
+    """Writes metrics as JSON."""
+    json.dump(intervals, out, indent=2)
+    out.write('\n')
+
+
+def write_csv(intervals, out):
+    """Writes metrics as CSV, one row per interval."""
+    fields = []
+    for metrics in intervals:
+        fields.extend(key for key in metrics if key not in fields)
+    writer = csv.DictWriter(out, fields, restval=0)
+    writer.writeheader()
+    for metrics in intervals:
+        writer.writerow({key: '' if value is None else value for key, value in metrics.items()})
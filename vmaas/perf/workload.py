@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Package selection for generated perf workloads.
+"""
+
+import bisect
+import collections.abc
+import heapq
+import itertools
+import math
+import mmap
+import os
+import random
+import re
+
+from array import array
+
+from vmaas.perf.catalog import Catalog
+
+
+DISTRIBUTIONS = ('uniform', 'zipf', 'profile')
+
+# weighted selection draws at most this many times the number of requested packages
+# before falling back to weighting of the whole population
+REJECTION_ATTEMPTS = 10
+
+
+class LineIndex(collections.abc.Sequence):
+    """Read-only sequence of lines of memory-mapped file.
+
+    Only offsets of lines are kept in memory, lines are decoded on access. This makes
+    lists with millions of packages cheap to load and to share with forked processes.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as mapped_file:
+            size = os.fstat(mapped_file.fileno()).st_size
+            self._map = mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ) \
+                if size else b''
+        self._offsets = array('Q', [0])
+        self._offsets.extend(match.end() for match in re.finditer(b'\n', self._map))
+        if self._offsets[-1] != size:
+            # last line without trailing newline
+            self._offsets.append(size)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('line index out of range')
+        line = self._map[self._offsets[index]:self._offsets[index + 1]]
+        return line.rstrip(b'\r\n').decode('utf-8')
+
+    def __reduce__(self):
+        # mapping can't be pickled, the file is indexed again in the other process
+        return LineIndex, (self.path,)
+
+
+def load_package_list(packages_file):
+    """Loads list of packages from file as ``LineIndex``."""
+    return LineIndex(packages_file)
+
+
+def load_frequencies(frequency_file):
+    """Loads packages and their weights from file.
+
+    Every line holds number of occurrences and package name separated by whitespace,
+    i.e. the output of ``sort | uniq -c``. Empty lines and lines starting with ``#``
+    are ignored.
+    """
+    packages = []
+    weights = array('d')
+    with open(frequency_file) as freqs:
+        for line in freqs:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                count, package = line.split(None, 1)
+                weight = float(count)
+            except ValueError:
+                raise ValueError('Malformed line in {}: {!r}'.format(frequency_file, line))
+            if weight <= 0:
+                continue
+            packages.append(package.strip())
+            weights.append(weight)
+    return packages, weights
+
+
+def zipf_weights(num, skew):
+    """Returns Zipf weights for ``num`` ranks, most popular rank first."""
+    return array('d', (1.0 / rank ** skew for rank in range(1, num + 1)))
+
+
+class PackageSelector(object):
+    """Selects distinct packages for requests according to workload distribution.
+
+    Args:
+        packages: Sequence of packages to select from
+        distribution: One of ``DISTRIBUTIONS``
+        skew: Exponent of Zipf distribution; higher value means hotter hot packages
+        weights: Weight of each package, required for ``profile`` distribution
+        seed: Seed for random generator; same seed produces the same requests
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, packages, distribution='uniform', skew=1.0, weights=None, seed=None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError('Unknown distribution {!r} ({} available)'.format(
+                distribution, ', '.join(DISTRIBUTIONS)))
+        if not packages:
+            raise ValueError('No packages to select from')
+        self.packages = packages
+        self.distribution = distribution
+        self.rng = random.Random(seed)
+        # maps popularity rank to index of package
+        self.order = None
+
+        if distribution == 'zipf':
+            # popularity rank is assigned to packages randomly but only once,
+            # so the same packages are hot in all generated requests
+            self.order = array('Q', range(len(packages)))
+            self.rng.shuffle(self.order)
+            weights = zipf_weights(len(packages), skew)
+        elif distribution == 'profile':
+            if weights is None or len(weights) != len(packages):
+                raise ValueError('Weight must be specified for each package')
+        else:
+            weights = None
+        self.weights = weights
+        self.cumulative = None if weights is None else array('d', itertools.accumulate(weights))
+
+    def select(self, num, rng=None):
+        """Returns list of exactly ``num`` distinct packages.
+
+        Random generator of the selector is used unless ``rng`` is given.
+        """
+        rng = rng or self.rng
+        if num > len(self.packages):
+            raise ValueError('Requested {} packages, only {} available'.format(
+                num, len(self.packages)))
+        if self.weights is None:
+            return rng.sample(self.packages, num)
+
+        selected = self._draw(num, rng)
+        if selected is None:
+            # weighted sampling without replacement (Efraimidis-Spirakis): each item gets
+            # an exponentially distributed key scaled by its weight, the smallest keys win
+            rnd = rng.random
+            keys = [-math.log(1.0 - rnd()) / weight for weight in self.weights]
+            selected = heapq.nsmallest(num, range(len(keys)), key=keys.__getitem__)
+        if self.order is not None:
+            selected = [self.order[i] for i in selected]
+        return [self.packages[i] for i in selected]
+
+    def _draw(self, num, rng):
+        """Draws weighted items with replacement until ``num`` distinct are found.
+
+        Skipping duplicates gives the same distribution as sampling without
+        replacement, but costs ``O(num log n)`` instead of weighting all ``n`` items.
+        Returns ``None`` when hot items repeat too often.
+        """
+        cumulative = self.cumulative
+        total = cumulative[-1]
+        last = len(cumulative) - 1
+        selected = {}
+        for __ in range(REJECTION_ATTEMPTS * num):
+            if len(selected) == num:
+                break
+            index = bisect.bisect_right(cumulative, rng.random() * total)
+            selected[min(index, last)] = None
+        if len(selected) < num:
+            return None
+        return list(selected)
+
+
+def gen_packages_query(packages):
+    """Generates request body for package updates query out of list of packages."""
+    return dict(package_list=list(packages))
+
+
+def add_arguments(parser):
+    """Adds workload selection options to argument parser."""
+    parser.add_argument('-i', '--packages_file',
+                        help='File with list of rpm files'
+                             ' (not needed for "profile" distribution)')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform',
+                        help='How packages are selected into requests'
+                             ' (default: %(default)s)')
+    parser.add_argument('--zipf-skew', type=float, default=1.0, metavar='SKEW',
+                        help='Skew of "zipf" distribution, higher means hotter hot packages'
+                             ' (default: %(default)s)')
+    parser.add_argument('--frequency-file', metavar='FILE',
+                        help='File with "count package" lines (output of "sort | uniq -c")'
+                             ' used as weights by "profile" distribution')
+    parser.add_argument('--arch', action='append',
+                        help='Select only packages of this architecture (can be repeated)')
+    parser.add_argument('--name-prefix', metavar='PREFIX',
+                        help='Select only packages with name starting with PREFIX')
+    parser.add_argument('--min-age', type=int, metavar='AGE',
+                        help='Select only packages with at least AGE newer versions in the list')
+    parser.add_argument('--max-age', type=int, metavar='AGE',
+                        help='Select only packages with at most AGE newer versions in the list,'
+                             ' 0 selects the newest versions')
+    parser.add_argument('--seed', type=int,
+                        help='Seed for package selection, makes requests reproducible'
+                             ' (default: random)')
+
+
+def check_arguments(parser, args):
+    """Checks workload selection options, generates seed if not specified."""
+    if args.distribution == 'profile':
+        if not args.frequency_file:
+            parser.error('--frequency-file is required for "profile" distribution')
+    elif not args.packages_file:
+        parser.error('--packages_file is required for "{}" distribution'.format(
+            args.distribution))
+    if args.seed is None:
+        args.seed = random.randrange(2 ** 32)
+
+
+def has_filter(args):
+    """Returns ``True`` when packages are filtered by their NEVRA."""
+    return any(value is not None for value in (
+        args.arch, args.name_prefix, args.min_age, args.max_age))
+
+
+def filter_packages(args, packages, weights=None):
+    """Filters packages (and their weights) by NEVRA using package catalog."""
+    catalog = Catalog.from_lines(packages)
+    view = catalog.select(args.arch, args.name_prefix, args.min_age, args.max_age)
+    if weights is not None:
+        weights = array('d', (weights[catalog.line(i)] for i in view.indexes))
+    return view, weights
+
+
+def get_selector(args):
+    """Creates package selector out of parsed workload selection options."""
+    weights = None
+    if args.distribution == 'profile':
+        packages, weights = load_frequencies(args.frequency_file)
+    else:
+        packages = load_package_list(args.packages_file)
+    if has_filter(args):
+        packages, weights = filter_packages(args, packages, weights)
+    return PackageSelector(
+        packages,
+        distribution=args.distribution,
+        skew=args.zipf_skew,
+        weights=weights,
+        seed=args.seed,
+    )
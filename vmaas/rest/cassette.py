@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Record/replay cassettes for the REST client.
+
+In ``record`` mode every response returned by ``VMaaSClient`` actions is appended
+to the cassette file as one JSON line, keyed by action name, URL arguments and
+canonical (sorted, compact) JSON of the request body. Repeated requests (e.g.
+polling of ``dbchange``) are replayed in the recorded order, after the last
+recorded one the last response is repeated. When recording finishes an index is
+written next to the cassette (``<cassette>.idx``): open-addressing hash table
+with 64-bit key hashes and offsets of the records.
+
+In ``replay`` mode no request reaches the server. Both files are memory-mapped and
+every lookup reads only a few index slots and one record, so it takes the same time
+for cassettes of any size.
+"""
+
+import base64
+import collections
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from simple_rest_client.models import Response
+
+from vmaas.rest.client import CassetteMiss
+
+
+MODES = ('record', 'replay')
+
+INDEX_MAGIC = b'VMCI'
+INDEX_VERSION = 1
+# magic, version, number of slots
+_HEADER = struct.Struct('<4sIQ')
+# key hash (0 marks empty slot), record offset, record length
+_SLOT = struct.Struct('<QQI4x')
+
+
+def request_key(action_name, args=(), body=None, params=None):
+    """Returns canonical key of request."""
+    return json.dumps([action_name, list(args), body, params or {}],
+                      sort_keys=True, separators=(',', ':'), default=str)
+
+
+def key_hash(key, seq=None):
+    """Returns non-zero 64-bit hash of the key (and sequence number of the request)."""
+    if seq is not None:
+        key = '{}#{}'.format(key, seq)
+    value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+def _encode_body(body):
+    if isinstance(body, bytes):
+        return {'bytes': base64.b64encode(body).decode('ascii')}
+    return {'json': body}
+
+
+def _decode_body(data):
+    if 'bytes' in data:
+        return base64.b64decode(data['bytes'])
+    return data['json']
+
+
+def build_index(entries, index_path):
+    """Writes index of ``{key_hash: (offset, length)}`` entries."""
+    slots = 8
+    while slots < 2 * len(entries):
+        slots *= 2
+    table = bytearray(_SLOT.size * slots)
+    for hashed, (offset, length) in entries.items():
+        slot = hashed & (slots - 1)
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[0]:
+            slot = (slot + 1) & (slots - 1)
+        _SLOT.pack_into(table, slot * _SLOT.size, hashed, offset, length)
+    with open(index_path, 'wb') as out:
+        out.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, slots))
+        out.write(table)
+
+
+def _add_entry(entries, key, seq, offset, length):
+    entries[key_hash(key, seq)] = (offset, length)
+    # the last response of the request is replayed after all recorded ones
+    entries[key_hash(key)] = (offset, length)
+
+
+def scan_records(path):
+    """Returns ``{key_hash: (offset, length)}`` of records in cassette."""
+    entries = {}
+    offset = 0
+    with open(path, 'rb') as input_file:
+        for line in input_file:
+            record = json.loads(line.decode('utf-8'))
+            _add_entry(entries, record['key'], record['seq'], offset, len(line))
+            offset += len(line)
+    return entries
+
+
+class Cassette(object):
+    """Cassette of recorded responses.
+
+    Args:
+        path: Path of the cassette file
+        mode: ``record`` (overwrites the cassette) or ``replay``
+    """
+    def __init__(self, path, mode='replay'):
+        if mode not in MODES:
+            raise ValueError('Unknown cassette mode {!r} ({} available)'.format(
+                mode, ', '.join(MODES)))
+        self.path = path
+        self.index_path = path + '.idx'
+        self.mode = mode
+        self._entries = {}
+        self._seq = collections.Counter()
+        self._out = None
+        self._offset = 0
+        self._data = self._index = None
+        self._slots = 0
+        if mode == 'record':
+            self._out = open(path, 'wb')
+        else:
+            self._open_replay()
+
+    def _open_replay(self):
+        if not os.path.exists(self.index_path) or \
+                os.path.getmtime(self.index_path) < os.path.getmtime(self.path):
+            build_index(scan_records(self.path), self.index_path)
+        with open(self.index_path, 'rb') as index_file:
+            self._index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._slots = _HEADER.unpack_from(self._index)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError('{} is not a cassette index'.format(self.index_path))
+        if os.path.getsize(self.path):
+            with open(self.path, 'rb') as data_file:
+                self._data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def record(self, key, response):
+        """Appends response to the cassette."""
+        seq = self._seq[key]
+        self._seq[key] += 1
+        line = json.dumps({
+            'key': key,
+            'seq': seq,
+            'url': response.url,
+            'method': response.method,
+            'status_code': response.status_code,
+            'headers': dict(response.headers or {}),
+            'ok': bool(response.client_response),
+            'body': _encode_body(response.body),
+        }, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+        self._out.write(line)
+        _add_entry(self._entries, key, seq, self._offset, len(line))
+        self._offset += len(line)
+
+    def lookup(self, key):
+        """Returns next recorded ``Response``; raises ``CassetteMiss`` when not recorded."""
+        seq = self._seq[key]
+        self._seq[key] += 1
+        try:
+            return self._lookup(key, seq)
+        except CassetteMiss:
+            return self._lookup(key)
+
+    def _lookup(self, key, seq=None):
+        hashed = key_hash(key, seq)
+        slot = hashed & (self._slots - 1)
+        while True:
+            stored, offset, length = _SLOT.unpack_from(
+                self._index, _HEADER.size + slot * _SLOT.size)
+            if not stored:
+                raise CassetteMiss(key)
+            if stored == hashed:
+                record = json.loads(self._data[offset:offset + length].decode('utf-8'))
+                if record['key'] == key and seq in (None, record['seq']):
+                    # ``client_response`` is only checked for truthiness by the client
+                    return Response(record['url'], record['method'], _decode_body(record['body']),
+                                    record['headers'], record['status_code'], record['ok'])
+            slot = (slot + 1) & (self._slots - 1)
+
+    def wrap(self, action_name, action):
+        """Returns ``simple_rest_client`` action recording or replaying responses."""
+        def cassette_action(*args, body=None, params=None, **kwargs):
+            key = request_key(action_name, args, body, params)
+            if self.mode == 'replay':
+                return self.lookup(key)
+            try:
+                response = action(*args, body=body, params=params, **kwargs)
+            except Exception as err:
+                response = getattr(err, 'response', None)
+                if response is not None:
+                    self.record(key, response)
+                raise
+            self.record(key, response)
+            return response
+        return cassette_action
+
+    def close(self):
+        """Finishes recording (writes the index) or releases mapped files."""
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+            build_index(self._entries, self.index_path)
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._data = self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
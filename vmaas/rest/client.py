@@ -17,6 +17,10 @@ class APIException(ServerError):
     pass
 
 
+class CassetteMiss(KeyError):
+    """Request not found in the replayed cassette."""
+
+
 class QueryApiActions(SimpleResource):
     """Actions available on query API."""
     actions = {
@@ -29,6 +33,7 @@ class QueryApiActions(SimpleResource):
         'get_update': {'method': 'GET', 'url': 'updates/{}'},
         'get_updates': {'method': 'POST', 'url': 'updates'},
         'get_dbchange': {'method': 'GET', 'url': 'dbchange'},
+        'get_version': {'method': 'GET', 'url': 'version'},
     }
 
 
@@ -36,9 +41,11 @@ class SyncApiActions(SimpleResource):
     """Actions available on sync API."""
     actions = {
         'cvescan': {'method': 'GET', 'url': 'sync/cve'},
+        'cvemapscan': {'method': 'GET', 'url': 'sync/cvemap'},
         'reposcan': {'method': 'POST', 'url': 'sync/repo'},
         'reporefresh': {'method': 'GET', 'url': 'sync/repo'},
         'sync_all': {'method': 'GET', 'url': 'sync'},
+        'export': {'method': 'GET', 'url': 'sync/export'},
     }
 
 
@@ -51,10 +58,13 @@ class VMaaSClient(object):
         address2: IP address or hostname of sync service
         port2: Port of sync service
         logger: Instance of logger
+        cassette: ``Cassette`` recording or replaying responses of all actions
     """
     # pylint: disable=too-many-arguments
-    def __init__(self, address, port=8080, address2=None, port2=8081, logger=None):
+    def __init__(self, address, port=8080, address2=None, port2=8081, logger=None,
+                 cassette=None):
         self.logger = logger or logging.getLogger(__name__)
+        self.cassette = cassette
         self.query_api = SimpleAPI(
             api_root_url='http://{}:{}/api/v1/'.format(address, port),  # base api url
             params={},  # default params
@@ -76,22 +86,29 @@ class VMaaSClient(object):
         self.sync_api.add_resource(resource_name='actions', resource_class=SyncApiActions)
 
         for action in QueryApiActions.actions:
-            setattr(self, action, self._wrap_action(self.query_api.actions, action))
+            setattr(self, action, self._wrap_action(self.query_api.actions, action, cassette))
         for action in SyncApiActions.actions:
-            setattr(self, action, self._wrap_action(self.sync_api.actions, action))
+            setattr(self, action, self._wrap_action(self.sync_api.actions, action, cassette))
 
         setattr(self, 'all_actions', self.query_api.actions.actions)
         setattr(self, 'all_sync_actions', self.sync_api.actions.actions)
 
     @staticmethod
-    def _wrap_action(api_obj, action_name):
+    def _wrap_action(api_obj, action_name, cassette=None):
         action = getattr(api_obj, action_name)
+        if cassette is not None:
+            action = cassette.wrap(action_name, action)
 
         def wrapper(*args, **kwargs):
             try:
                 response = action(*args, **kwargs)
+            except CassetteMiss:
+                raise
             except Exception as e:
-                response = e.response
+                # connection errors have no response
+                response = getattr(e, 'response', None)
+                if response is None:
+                    raise
 
             return ResponseContainer(response)
 
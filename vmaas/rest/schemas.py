@@ -7,6 +7,32 @@ from schema import Optional, Or, Schema
 from vmaas.utils.blockers import GH
 
 
+class BlockerSchema(object):
+    """Schema depending on state of blocker, chosen on first use.
+
+    The blocker is not resolved on import so importing schemas doesn't call GitHub.
+
+    Args:
+        blocker: Blocker deciding which schema is used
+        blocked: Schema data used while the blocker blocks
+        fixed: Schema data used when the blocker doesn't block
+    """
+    def __init__(self, blocker, blocked, fixed):
+        self.blocker = blocker
+        self.blocked = blocked
+        self.fixed = fixed
+        self._schema = None
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            self._schema = Schema(self.blocked if self.blocker.blocks else self.fixed)
+        return self._schema
+
+    def __getattr__(self, name):
+        return getattr(self.schema, name)
+
+
 _cves = {
     'cve_list': {
         str: {
@@ -86,10 +112,8 @@ _updates_top = {'update_list': {str: dict}}
 _updates_top_repolist = {'repository_list': [str], 'update_list': {str: dict}}
 _updates_top_basearch = {'basearch': str, 'update_list': {str: dict}}
 
-if GH(241).blocks:
-    _updates_top_releasever = {'relasever': str, 'update_list': {str: dict}}
-else:
-    _updates_top_releasever = {'releasever': str, 'update_list': {str: dict}}
+_updates_top_relasever = {'relasever': str, 'update_list': {str: dict}}
+_updates_top_releasever = {'releasever': str, 'update_list': {str: dict}}
 
 _updates_package = {
     'available_updates': [
@@ -112,5 +136,6 @@ repos_schema = Schema(_repos)
 updates_top_schema = Schema(_updates_top)
 updates_top_repolist_schema = Schema(_updates_top_repolist)
 updates_top_basearch_schema = Schema(_updates_top_basearch)
-updates_top_releasever_schema = Schema(_updates_top_releasever)
+updates_top_releasever_schema = BlockerSchema(
+    GH(241), _updates_top_relasever, _updates_top_releasever)
 updates_package_schema = Schema(_updates_package)
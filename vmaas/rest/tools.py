@@ -4,16 +4,33 @@ REST API helper functions
 """
 
 import datetime
+import time
+
 import iso8601
 
-from wait_for import wait_for
+from wait_for import TimedOutError, wait_for
 
 from vmaas.rest import exceptions
 from vmaas.rest import schemas
 from vmaas.rest.client import VMaaSClient
+from vmaas.utils import nevra
 from vmaas.utils.conf import conf
 
 
+# ``dbchange`` timestamps moved when sync of given kind is finished;
+# every sync ends with export of the data
+SYNC_TIMESTAMPS = {
+    'all': 'exported',
+    'cve': 'cve_changes',
+    'repo': 'exported',
+    'export': 'exported',
+    'last': 'last_change',
+}
+
+# ``Cassette`` used by clients created by ``rest_api()``, set by ``--cassette``
+cassette = None
+
+
 def gen_cves_body(cves, modified_since=None, page_size=None, page=None):
     """Generates request body for CVEs query out of list of CVEs."""
     body = dict(cve_list=cves)
@@ -121,6 +138,23 @@ def check_expected_updates_content(expected_updates, available_updates, exact_ma
     assert not not_found, 'Expected update not found: {!r}'.format(not_found)
 
 
+def check_updates_newer(package_name, available_updates):
+    """Checks that every available update is newer than the queried package."""
+    try:
+        installed = nevra.parse_nevra(package_name)
+    except ValueError:
+        # nothing to compare with, e.g. for invalid package names
+        return
+    not_newer = []
+    for update in available_updates:
+        try:
+            if nevra.nevra_cmp(update['package'], installed) <= 0:
+                not_newer.append(update)
+        except (KeyError, ValueError):
+            not_newer.append(update)
+    assert not not_newer, 'Updates not newer than {}: {!r}'.format(package_name, not_newer)
+
+
 def checks_expected_updates_number(expected_updates, available_updates):
     """Checks number of expected update records."""
     known_repos = [rec['repository'] for rec in expected_updates]
@@ -157,6 +191,9 @@ def validate_package_updates(package, expected_updates, exact_match=False):
     # check that available updates records are unique
     check_updates_uniq(package.available_updates)
 
+    # check that available updates are newer than the package
+    check_updates_newer(package.name, package.available_updates)
+
     if not expected_updates:
         if exact_match:
             assert package.available_updates == []
@@ -224,7 +261,7 @@ def rest_api():
         hostname, port = hostname.split(':')
     except ValueError:
         port = 8080 if hostname in ('localhost', '127.0.0.1') else 80
-    return VMaaSClient(hostname, port=port)
+    return VMaaSClient(hostname, port=port, port2=conf.get('sync_port', 8081), cassette=cassette)
 
 
 def sync_all():
@@ -244,3 +281,73 @@ def sync_all():
     response.response_check()
     response, = response
     assert 'sync task started' in response.msg
+
+
+def get_dbchange_time(api, key):
+    """Returns ``dbchange`` timestamp, ``None`` when it's not set.
+
+    Raises:
+        ClientConnectionError: Server is not reachable.
+        ServerError: Server failed to respond (5xx), e.g. while it's restarted by sync.
+        ClientError: Request was rejected (4xx) or the response is not ``dbchange``.
+    """
+    # pylint: disable=no-member
+    response = api.get_dbchange().raw
+    if response.status_code >= 500:
+        raise exceptions.ServerError(
+            'dbchange failed with status {}'.format(response.status_code), response)
+    if response.status_code >= 400 or not isinstance(response.body, dict):
+        raise exceptions.ClientError(
+            'dbchange rejected with status {}'.format(response.status_code), response)
+    value = response.body.get(key)
+    return iso8601.parse_date(value) if value else None
+
+
+# pylint: disable=too-many-arguments
+def wait_for_sync(kind='all', since=None, timeout=900, delay=0.5, max_delay=10, api=None,
+                  stop=None, max_failures=5):
+    """Waits until sync is finished and returns how long it was waited for in seconds.
+
+    Polls ``dbchange`` with doubling delay until the timestamp of the sync kind
+    (see ``SYNC_TIMESTAMPS``) is newer than ``since``. Take ``since`` from ``dbchange``
+    before triggering the sync; when it's not set, current value is used. Waiting
+    is interrupted (and ``None`` returned) once ``stop`` (``threading.Event``) is set.
+
+    The returned time is an upper bound of the part of the sync after the call: the
+    sync finished at most one polling delay (``max_delay``) before it was noticed.
+    Time the sync ran before the call is not included.
+
+    Unreachable server and server errors are tolerated (the server can restart
+    during the sync) until they happen ``max_failures`` times in a row, then the
+    last error is raised; rejected requests are raised immediately.
+    """
+    key = SYNC_TIMESTAMPS[kind]
+    api = api or rest_api()
+    started = time.monotonic()
+    if since is None:
+        since = get_dbchange_time(api, key)
+    elif not isinstance(since, datetime.datetime):
+        since = iso8601.parse_date(since)
+
+    failures = 0
+    while True:
+        try:
+            current = get_dbchange_time(api, key)
+        except (exceptions.ClientConnectionError, exceptions.ServerError):
+            failures += 1
+            if failures >= max_failures:
+                raise
+            current = None
+        else:
+            failures = 0
+        if current is not None and (since is None or current > since):
+            return time.monotonic() - started
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            raise TimedOutError('{} sync not finished in {} s, {} is still {}'.format(
+                kind, timeout, key, since))
+        if stop is None:
+            time.sleep(min(delay, remaining))
+        elif stop.wait(min(delay, remaining)):
+            return None
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of NEVRA parsing and version comparison.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.utils import nevra  # noqa: E402
+
+
+def gen_versions(rng, num):
+    """Generates version strings resembling real package versions."""
+    versions = []
+    for __ in range(num):
+        parts = [str(rng.randrange(10)) for __ in range(rng.randrange(1, 4))]
+        version = '.'.join(parts)
+        if rng.random() < 0.1:
+            version += rng.choice(('~rc1', '^git1', 'a', 'p2', '.beta'))
+        versions.append(version)
+    return versions
+
+
+def gen_packages(rng, num):
+    """Generates NEVRA strings."""
+    versions = gen_versions(rng, 1000)
+    return [
+        'package{}-{}{}-{}.el7_{}.{}'.format(
+            rng.randrange(num // 10 + 1),
+            rng.choice(('', '', '0:', '2:')),
+            rng.choice(versions),
+            rng.randrange(50),
+            rng.randrange(5),
+            rng.choice(('x86_64', 'noarch', 'i686')))
+        for __ in range(num)
+    ]
+
+
+def _measure(name, func, pairs):
+    started = time.perf_counter()
+    for first, second in pairs:
+        func(first, second)
+    duration = time.perf_counter() - started
+    print('{:<28} {:>10.3f} s {:>14,.0f} ops/s'.format(name, duration, len(pairs) / duration))
+
+
+def main(args=None):
+    """Main function for cli."""
+    parser = argparse.ArgumentParser(description='bench_nevra')
+    parser.add_argument('-n', '--comparisons', type=int, default=1000000,
+                        help='How many comparisons (default: %(default)s)')
+    parser.add_argument('-i', '--packages_file',
+                        help='File with list of rpm files to take versions from'
+                             ' (default: generated)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for generated data (default: %(default)s)')
+    args = parser.parse_args(args)
+
+    rng = random.Random(args.seed)
+    if args.packages_file:
+        with open(args.packages_file) as pkgs:
+            packages = [line.strip() for line in pkgs if line.strip()]
+    else:
+        packages = gen_packages(rng, 100000)
+
+    started = time.perf_counter()
+    parsed = []
+    for package in packages:
+        try:
+            parsed.append(nevra.parse_nevra(package))
+        except ValueError:
+            pass
+    duration = time.perf_counter() - started
+    print('{:<28} {:>10.3f} s {:>14,.0f} ops/s'.format(
+        'parse_nevra', duration, len(packages) / duration))
+
+    versions = [rec.version for rec in parsed]
+    pairs = [(rng.choice(versions), rng.choice(versions)) for __ in range(args.comparisons)]
+    nevra.rpmvercmp.cache_clear()
+    _measure('rpmvercmp (uncached)', nevra.rpmvercmp.__wrapped__, pairs)
+    _measure('rpmvercmp (cold cache)', nevra.rpmvercmp, pairs)
+    _measure('rpmvercmp (warm cache)', nevra.rpmvercmp, pairs)
+    print(nevra.rpmvercmp.cache_info())
+
+    evr_pairs = [(rng.choice(parsed)[1:4], rng.choice(parsed)[1:4])
+                 for __ in range(args.comparisons)]
+    _measure('evr_cmp', nevra.evr_cmp, evr_pairs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
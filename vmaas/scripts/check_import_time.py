@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checks that importing the ``vmaas`` modules is fast and that neither the imports nor
+collecting the tests make network calls.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+# modules imported by the tests before any test runs
+DEFAULT_MODULES = (
+    'vmaas.rest.client',
+    'vmaas.rest.schemas',
+    'vmaas.rest.tools',
+    'vmaas.utils.blockers',
+    'vmaas.misc.packages',
+)
+
+DEFAULT_TESTS = os.path.join(PACKAGE_ROOT, 'vmaas', 'tests')
+
+# run in fresh interpreter; every connection attempt and name lookup is recorded and refused
+_REFUSE_NETWORK = '''
+import importlib, json, socket, sys, time
+calls = []
+def _refuse(name):
+    def refused(*args):
+        calls.append([name, repr(args[-1] if name == 'connect' else args[:2])])
+        raise OSError('network access refused')
+    return refused
+socket.socket.connect = _refuse('connect')
+socket.getaddrinfo = _refuse('getaddrinfo')
+sys.path.insert(0, {root!r})
+'''
+
+_PROBE = _REFUSE_NETWORK + '''
+started = time.perf_counter()
+error = None
+try:
+    for name in {modules!r}:
+        importlib.import_module(name)
+except Exception as err:
+    error = '{{}}: {{}}'.format(type(err).__name__, err)
+print(json.dumps({{'seconds': time.perf_counter() - started, 'network': calls, 'error': error}}))
+'''
+
+_COLLECT_PROBE = _REFUSE_NETWORK + '''
+import pytest
+started = time.perf_counter()
+code = pytest.main(['--collect-only', '-q', '-p', 'no:cacheprovider', {tests!r}])
+error = None if code == 0 else 'pytest exited with {{}}'.format(code)
+print()
+print(json.dumps({{'seconds': time.perf_counter() - started, 'network': calls, 'error': error}}))
+'''
+
+
+def parse_importtime(stderr):
+    """Returns ``[(cumulative_us, module)]`` out of ``-X importtime`` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        __, cumulative, module = line[len('import time:'):].split('|', 2)
+        modules.append((int(cumulative), module.strip()))
+    return modules
+
+
+def _run_probe(args):
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=False)
+    try:
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        result = {'seconds': None, 'network': [],
+                  'error': (proc.stderr or proc.stdout).strip()[-500:]}
+    return result, proc
+
+
+def check(modules, python=sys.executable):
+    """Imports modules in a new interpreter; returns result dict and ``-X importtime`` data."""
+    code = _PROBE.format(root=os.path.abspath(PACKAGE_ROOT), modules=list(modules))
+    result, proc = _run_probe([python, '-X', 'importtime', '-c', code])
+    return result, parse_importtime(proc.stderr)
+
+
+def check_collection(tests=DEFAULT_TESTS, python=sys.executable):
+    """Collects tests in a new interpreter without network; returns result dict."""
+    code = _COLLECT_PROBE.format(root=os.path.abspath(PACKAGE_ROOT),
+                                 tests=os.path.abspath(tests))
+    return _run_probe([python, '-c', code])[0]
+
+
+def main(args=None):
+    """Main function for cli."""
+    parser = argparse.ArgumentParser(description='check_import_time')
+    parser.add_argument('-m', '--module', action='append',
+                        help='Module to import, can be repeated (default: modules used by tests)')
+    parser.add_argument('--budget', type=float, default=200, metavar='MS',
+                        help='Maximal import time in milliseconds (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='How many slowest imports are printed (default: %(default)s)')
+    parser.add_argument('--tests', default=DEFAULT_TESTS,
+                        help='Tests collected without network (default: vmaas/tests)')
+    parser.add_argument('--no-collect', action='store_true',
+                        help='Do not check collection of the tests')
+    args = parser.parse_args(args)
+
+    result, imports = check(args.module or DEFAULT_MODULES)
+    if imports:
+        print('{:>12}  {}'.format('cumulative', 'slowest imports'))
+        for cumulative, module in sorted(imports, reverse=True)[:args.top]:
+            print('{:>9.1f} ms  {}'.format(cumulative / 1000, module))
+        print()
+
+    failed = False
+    if result['error']:
+        print('Import failed: {}'.format(result['error']))
+        failed = True
+    for name, target in result['network']:
+        print('Network access during import: {} {}'.format(name, target))
+        failed = True
+    if result['seconds'] is not None:
+        duration = result['seconds'] * 1000
+        print('Import time: {:.1f} ms (budget {:g} ms)'.format(duration, args.budget))
+        if duration > args.budget:
+            print('Import time over budget')
+            failed = True
+
+    if not args.no_collect:
+        result = check_collection(args.tests)
+        if result['error']:
+            print('Collection failed: {}'.format(result['error']))
+            failed = True
+        for name, target in result['network']:
+            print('Network access during collection: {} {}'.format(name, target))
+            failed = True
+        if result['seconds'] is not None:
+            print('Collection time: {:.1f} ms'.format(result['seconds'] * 1000))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generates synthetic dataset for the fake VMaaS server.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.fake import dataset  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='gen_fake_dataset')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Fixture file, gzipped when the name ends with .gz')
+    parser.add_argument('--packages-out', metavar='FILE',
+                        help='Save base (oldest) NEVRAs, usable as list of installed packages')
+    parser.add_argument('--cves', type=int, default=1000,
+                        help='Number of CVEs (default: %(default)s)')
+    parser.add_argument('--errata', type=int, default=500,
+                        help='Number of errata (default: %(default)s)')
+    parser.add_argument('--packages', type=int, default=1000,
+                        help='Number of package names (default: %(default)s)')
+    parser.add_argument('--repos', type=int, default=20,
+                        help='Number of repository labels (default: %(default)s)')
+    parser.add_argument('--max-versions', type=int, default=5,
+                        help='Maximum versions of one package (default: %(default)s)')
+    parser.add_argument('--max-cves', type=int, default=5,
+                        help='Maximum CVEs fixed by one erratum (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=random.randrange(2 ** 32),
+                        help='Seed of the generator (default: random)')
+    args = parser.parse_args(args)
+    if args.errata > dataset.MAX_ERRATA:
+        parser.error('--errata must be at most {}'.format(dataset.MAX_ERRATA))
+    return args
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    print('Seed: {}'.format(args.seed))
+    fixture = dataset.generate(
+        args.seed, cves=args.cves, errata=args.errata, packages=args.packages,
+        repos=args.repos, max_versions=args.max_versions, max_cves=args.max_cves)
+    dataset.write_fixture(fixture, args.output)
+    print('Fixture: {} ({} CVEs, {} errata, {} repositories, {} packages)'.format(
+        args.output, len(fixture['cves']), len(fixture['errata']), len(fixture['repos']),
+        len(fixture['packages'])))
+    if args.packages_out:
+        with open(args.packages_out, 'w') as out:
+            for nevra in dataset.base_packages(fixture):
+                out.write(nevra + '\n')
+        print('Base packages: {}'.format(args.packages_out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Converts tsung logs to per-interval metrics in JSON or CSV.
+"""
+
+import argparse
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import tsung  # noqa: E402
+
+
+WRITERS = {
+    'json': tsung.write_json,
+    'csv': tsung.write_csv,
+}
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='parse_tsung_log')
+    parser.add_argument('log_dir', help='Tsung log directory with tsung.log')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='json',
+                        help='Output format (default: %(default)s)')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Output file (default: stdout)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    intervals = tsung.get_metrics(args.log_dir)
+    if not intervals:
+        print('No stats found in {}'.format(args.log_dir), file=sys.stderr)
+        return 2
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out:
+            WRITERS[args.format](intervals, out)
+    else:
+        WRITERS[args.format](intervals, sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
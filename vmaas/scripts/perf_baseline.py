@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inspection and comparison of perf baselines.
+"""
+
+import argparse
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import baseline, stats  # noqa: E402
+
+
+def show(args):
+    """Prints summary of baseline."""
+    data = baseline.load(args.baseline)
+    server = data.get('server', {})
+    print('Label: {}'.format(data.get('label') or '-'))
+    print('Created: {}'.format(data.get('created')))
+    print('Server: {} (version {}, exported {})'.format(
+        server.get('host'), server.get('version'), server.get('exported')))
+    print('Duration: {:.2f} s'.format(data['duration']))
+    print()
+    print(stats.format_header('endpoint') + ' {:>10} {:>10}'.format('req/s', 'errors'))
+    for endpoint, ep_data in data['endpoints'].items():
+        print(stats.format_summary(endpoint, stats.summarize(ep_data['samples'])) +
+              ' {:>10.2f} {:>10.2%}'.format(ep_data['throughput'] or 0, ep_data['error_rate']))
+    return 0
+
+
+def compare(args):
+    """Compares baselines, returns non-zero when regression is found."""
+    old = baseline.load(args.old)
+    new = baseline.load(args.new)
+    comparisons = baseline.compare(
+        old, new,
+        threshold=args.threshold,
+        alpha=args.alpha,
+        error_threshold=args.error_threshold,
+        percentile=args.percentile,
+    )
+    baseline.print_comparison(old, new, comparisons, args.percentile)
+    if not comparisons:
+        print('No common endpoints to compare')
+        return 2
+    if any(comp.regressions for comp in comparisons):
+        print()
+        print('Performance regression detected')
+        return 1
+    return 0
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='perf_baseline')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    show_parser = subparsers.add_parser('show', help='Show summary of baseline')
+    show_parser.add_argument('baseline', help='Baseline file')
+    show_parser.set_defaults(func=show)
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare baselines, exit with 1 on regression')
+    compare_parser.add_argument('old', help='Reference baseline file')
+    compare_parser.add_argument('new', help='Baseline file to check')
+    compare_parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                                help='Tolerated relative latency increase and throughput'
+                                     ' decrease (default: %(default)s)')
+    compare_parser.add_argument('-a', '--alpha', type=float, default=0.01,
+                                help='Significance level of Mann-Whitney U test'
+                                     ' (default: %(default)s)')
+    compare_parser.add_argument('-e', '--error-threshold', type=float, default=0.01,
+                                help='Tolerated absolute increase of error rate'
+                                     ' (default: %(default)s)')
+    compare_parser.add_argument('-p', '--percentile', type=int, default=50,
+                                help='Latency percentile checked against threshold'
+                                     ' (default: %(default)s)')
+    compare_parser.set_defaults(func=compare)
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perf test comparing updates requests with cold and warm server cache.
+"""
+
+import argparse
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import cache, workload  # noqa: E402
+from vmaas.perf.hosts import get_servers  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_cache_perf_test')
+    parser.add_argument('-s', '--server', required=True, action='append',
+                        help='Server hostname:port')
+    parser.add_argument('-u', '--connections', type=int, default=10, metavar='CONNECTIONS',
+                        help='How many keep-alive connections'
+                             ' (default: %(default)s)')
+    parser.add_argument('-p', '--packages_num', type=int, default=1000, metavar='PACKAGES',
+                        help='How many packages per request'
+                             ' (default: %(default)s)')
+    parser.add_argument('--requests-num', type=int, default=100, metavar='REQUESTS',
+                        help='How many unique requests to generate'
+                             ' (default: %(default)s)')
+    parser.add_argument('--warm-rounds', type=int, default=1, metavar='ROUNDS',
+                        help='How many times every request is sent in the warm phase'
+                             ' (default: %(default)s)')
+    workload.add_arguments(parser)
+    parsed = parser.parse_args(args)
+    workload.check_arguments(parser, parsed)
+    return parsed
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    print('Seed: {}'.format(args.seed))
+    bodies = cache.unique_bodies(
+        workload.get_selector(args), args.packages_num, args.requests_num)
+    cold, warm = cache.run_cold_warm(
+        get_servers(args.server), bodies, args.connections, args.warm_rounds)
+    cache.print_cold_warm(cold, warm)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
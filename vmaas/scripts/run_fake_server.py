@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runs fake VMaaS server serving data from fixture file.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.fake.server import FakeServer  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_fake_server')
+    parser.add_argument('-f', '--fixture', required=True,
+                        help='Fixture JSON file (can be gzipped)')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port of the query API (default: %(default)s)')
+    parser.add_argument('--sync-port', type=int, default=8081,
+                        help='Port of the sync API (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS',
+                        help='Latency added to every response (default: %(default)s)')
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS',
+                        help='Maximum latency randomly added or subtracted'
+                             ' (default: %(default)s)')
+    parser.add_argument('--item-latency', type=float, default=0, metavar='US',
+                        help='Latency added for every requested item (default: %(default)s)')
+    parser.add_argument('--sync-duration', type=float, default=1, metavar='SEC',
+                        help='How long syncs take (default: %(default)s)')
+    parser.add_argument('--seed', type=int,
+                        help='Seed of the latency jitter')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    server = FakeServer(
+        args.fixture, host=args.host, port=args.port,
+        sync_port=args.sync_port if args.sync_port != args.port else None,
+        latency=args.latency / 1000, jitter=args.jitter / 1000,
+        item_latency=args.item_latency / 1e6, sync_duration=args.sync_duration, seed=args.seed)
+    server.start()
+    print('Serving {} on {}:{} (sync API on port {})'.format(
+        args.fixture, args.host, server.port, server.sync_port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures time until synced data are served and latency of queries after the export.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.misc import packages  # noqa: E402
+from vmaas.perf import freshness, soak  # noqa: E402
+from vmaas.perf.hosts import Server, get_servers  # noqa: E402
+from vmaas.perf.workload import load_package_list  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_freshness_benchmark')
+    parser.add_argument('-s', '--server', required=True,
+                        help='Server hostname:port')
+    parser.add_argument('--sync-server', metavar='HOST:PORT',
+                        help='Sync API hostname:port (default: host of the server with port 8081)')
+    parser.add_argument('--sync', choices=list(soak.SYNC_ACTIONS), default='all',
+                        help='Kind of sync to trigger (default: %(default)s)')
+    parser.add_argument('-i', '--packages_file',
+                        help='File with list of rpm files used in the updates probe'
+                             ' (default: packages of the functional tests)')
+    parser.add_argument('-p', '--packages_num', type=int, default=100, metavar='PACKAGES',
+                        help='How many packages from the file are used (default: %(default)s)')
+    parser.add_argument('--cve', default='CVE-2017-.*', metavar='REGEX',
+                        help='CVE regex of the cves probe (default: %(default)s)')
+    parser.add_argument('--erratum', default='RHSA-2017:.*', metavar='REGEX',
+                        help='Erratum regex of the errata probe (default: %(default)s)')
+    parser.add_argument('-r', '--rate', type=float, default=20,
+                        help='Requests per second of every probe (default: %(default)s)')
+    parser.add_argument('--before', type=float, default=10, metavar='SEC',
+                        help='Seconds of probing before the sync (default: %(default)s)')
+    parser.add_argument('--after', type=float, default=60, metavar='SEC',
+                        help='Seconds of probing after the export (default: %(default)s)')
+    parser.add_argument('--sync-timeout', type=float, default=1800, metavar='SEC',
+                        help='How long to wait for the export (default: %(default)s)')
+    parser.add_argument('--report-out', metavar='FILE',
+                        help='Save report as JSON')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    server, = get_servers(args.server)
+    if args.sync_server:
+        sync_server, = get_servers(args.sync_server)
+    else:
+        sync_server = Server(server.host, 8081)
+
+    if args.packages_file:
+        package_list = load_package_list(args.packages_file)[:args.packages_num]
+    else:
+        package_list = [package for package, __ in packages.PACKAGES_BASIC + packages.PACKAGES]
+    probes = freshness.default_probes(package_list, args.cve, args.erratum)
+
+    result = freshness.run(
+        server, soak.get_api(server, sync_server), probes, kind=args.sync,
+        interval=1 / args.rate, before=args.before, after=args.after,
+        sync_timeout=args.sync_timeout)
+    report = freshness.get_report(result, probes)
+    freshness.print_report(report)
+    if args.report_out:
+        report['records'] = [rec._asdict() for rec in result.records]
+        with open(args.report_out, 'w') as out:
+            json.dump(report, out)
+        print('Report: {}'.format(args.report_out))
+    return 0 if result.time_to_fresh is not None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
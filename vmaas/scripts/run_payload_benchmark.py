@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of updates request cost depending on number of packages per request.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import payload, workload  # noqa: E402
+from vmaas.perf.hosts import get_servers  # noqa: E402
+
+
+def _sizes(value):
+    try:
+        sizes = [int(size) for size in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('comma separated list of numbers expected')
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError('sizes must be positive')
+    return sizes
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_payload_benchmark')
+    parser.add_argument('-s', '--server', required=True,
+                        help='Server hostname:port')
+    parser.add_argument('--sizes', type=_sizes, default=list(payload.SIZES), metavar='N,N,...',
+                        help='Numbers of packages per request (default: {})'.format(
+                            ','.join(str(size) for size in payload.SIZES)))
+    parser.add_argument('-n', '--repeats', type=int, default=10, metavar='REQUESTS',
+                        help='How many requests of every size (default: %(default)s)')
+    parser.add_argument('--allow-cache', action='store_true',
+                        help='Do not make bodies unique, responses can come from server cache')
+    parser.add_argument('--latency-budget', type=float, metavar='MS',
+                        help='Recommend chunk size only among sizes with median latency'
+                             ' within budget')
+    parser.add_argument('--timeout', type=float, default=120, metavar='SEC',
+                        help='Timeout for single request (default: %(default)s)')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Save measurements, summary and model as JSON')
+    workload.add_arguments(parser)
+    parsed = parser.parse_args(args)
+    workload.check_arguments(parser, parsed)
+    return parsed
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    print('Seed: {}'.format(args.seed))
+    selector = workload.get_selector(args)
+    sizes = [size for size in args.sizes if size <= len(selector.packages)]
+    if len(sizes) < len(args.sizes):
+        print('Skipping sizes larger than {} available packages'.format(len(selector.packages)))
+    if not sizes:
+        return 2
+
+    server, = get_servers(args.server)
+    measurements = payload.run(
+        server, selector, sizes, args.repeats, not args.allow_cache, args.timeout)
+    summary = payload.summarize(measurements)
+    model = payload.fit_model(summary)
+    budget = args.latency_budget / 1000 if args.latency_budget else None
+    payload.print_report(summary, model, budget)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump({
+                'measurements': [rec._asdict() for rec in measurements],
+                'summary': summary,
+                'model': {metric: fit._asdict() for metric, fit in model.items()},
+            }, out)
+        print('Results: {}'.format(args.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Soak test measuring updates latency while syncs are triggered on a schedule.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import bodies, engine, soak, workload  # noqa: E402
+from vmaas.perf.hosts import Server, get_servers  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_soak_test')
+    parser.add_argument('-s', '--server', required=True, action='append',
+                        help='Server hostname:port')
+    parser.add_argument('--sync-server', metavar='HOST:PORT',
+                        help='Sync API hostname:port (default: host of the first server'
+                             ' with port 8081)')
+    parser.add_argument('-d', '--duration', type=int, default=3600, metavar='SEC',
+                        help='Duration of test run (in seconds)'
+                             ' (default: %(default)s)')
+    parser.add_argument('-u', '--users_num', type=int, default=10, metavar='USERS',
+                        help='How many keep-alive connections'
+                             ' (default: %(default)s)')
+    parser.add_argument('-r', '--rate', type=float, default=20, metavar='RATE',
+                        help='Steady request rate in requests per second'
+                             ' (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=1, metavar='WORKERS',
+                        help='How many worker processes (default: %(default)s)')
+    parser.add_argument('-p', '--packages_num', type=int, default=100, metavar='PACKAGES',
+                        help='How many packages per request'
+                             ' (default: %(default)s)')
+    parser.add_argument('--requests-num', type=int, default=100, metavar='REQUESTS',
+                        help='How many unique requests to generate'
+                             ' (default: %(default)s)')
+    workload.add_arguments(parser)
+    parser.add_argument('--sync', action='append', choices=list(soak.SYNC_ACTIONS),
+                        help='Kind of sync to trigger, repeated kinds are triggered in turns'
+                             ' (default: all)')
+    parser.add_argument('--sync-every', type=float, default=600, metavar='SEC',
+                        help='Seconds between sync starts (default: %(default)s)')
+    parser.add_argument('--first-sync', type=float, metavar='SEC',
+                        help='Seconds before the first sync (default: --sync-every)')
+    parser.add_argument('--sync-timeout', type=float, default=1800, metavar='SEC',
+                        help='How long to wait for sync to finish (default: %(default)s)')
+    parser.add_argument('--interval', type=float, default=5, metavar='SEC',
+                        help='Length of reporting interval (default: %(default)s)')
+    parser.add_argument('--window', type=float, default=30, metavar='SEC',
+                        help='Seconds before sync used as reference and seconds after sync'
+                             ' end still counted to the sync (default: %(default)s)')
+    parser.add_argument('--report-out', metavar='FILE',
+                        help='Save per-sync report and timeline as JSON')
+    parsed = parser.parse_args(args)
+    workload.check_arguments(parser, parsed)
+    if not parsed.sync:
+        parsed.sync = ['all']
+    return parsed
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    print('Seed: {}'.format(args.seed))
+    servers = get_servers(args.server)
+    if args.sync_server:
+        sync_server, = get_servers(args.sync_server)
+    else:
+        sync_server = Server(servers[0].host, 8081)
+
+    scheduler = soak.SyncScheduler(
+        soak.get_api(servers[0], sync_server), args.sync, args.sync_every, args.first_sync,
+        sync_timeout=args.sync_timeout)
+    counts_list = [args.packages_num] * args.requests_num
+    lazy_bodies = bodies.LazyBodies(workload.get_selector(args), counts_list, args.seed)
+    try:
+        result = engine.run(
+            servers,
+            engine.updates_requests(lazy_bodies),
+            users=args.users_num,
+            duration=args.duration,
+            workers=args.workers,
+            rate=args.rate,
+            interval=args.interval,
+            on_start=scheduler.start,
+        )
+    finally:
+        scheduler.stop()
+
+    soak.print_timeline(result, scheduler.events)
+    print()
+    report = soak.reload_report(result, scheduler.events, args.window)
+    if report:
+        soak.print_reload_report(report, args.window)
+    else:
+        print('No sync was triggered')
+    if args.report_out:
+        with open(args.report_out, 'w') as out:
+            json.dump({
+                'engine': engine.get_report(result),
+                'syncs': [event._asdict() for event in scheduler.events],
+                'reloads': report,
+            }, out)
+        print('Report: {}'.format(args.report_out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
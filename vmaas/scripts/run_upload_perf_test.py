@@ -5,69 +5,56 @@ Perf test for updates requests.
 """
 
 import argparse
-import collections
-import json
+import math
 import os
-import random
 import re
+import shutil
 import subprocess
 import sys
+import tempfile
 
 from contextlib import contextmanager
 from xml.etree import ElementTree
 
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 
-TSUNG_XML = 'updates.xml'
-
+from vmaas.perf import (  # noqa: E402
+    baseline, bodies, engine, profiles, replay, resources, tsung, workload)
+from vmaas.perf.hosts import get_clients, get_servers  # noqa: E402
 
-Client = collections.namedtuple('Client', 'host cpus maxusers')
-# cpus and maxusers are optional
-Client.__new__.__defaults__ = (1, 600)
 
-Server = collections.namedtuple('Server', 'host port')
-# port defaults to 80
-Server.__new__.__defaults__ = (80,)
+TSUNG_XML = 'updates.xml'
+METRICS_JSON = 'metrics.json'
 
 
 # generate package lists
 
-def load_package_list(packages_file):
-    """Loads list of packages from file."""
-    with open(packages_file) as pkgs:
-        packages = pkgs.read().splitlines()
-    return packages
-
-
-def select_packages(packages, num):
-    """Creates random list of packages."""
-    return {random.choice(packages) for __ in range(num)}
-
-
-def gen_packages_query(packages):
-    """Generates request body for package updates query out of list of packages."""
-    return dict(package_list=list(packages))
-
-
-def gen_jsons(packages_file, counts_list):
-    """Generates JSON files with updates requests."""
-    jsons_list = []
-    packages = load_package_list(packages_file)
-    for i, count in enumerate(counts_list):
-        selected = select_packages(packages, count)
-        query = gen_packages_query(selected)
-        json_file = 'updates{}.json'.format(i)
-        with open(json_file, 'w') as out:
-            json.dump(query, out, sort_keys=True, indent=4, separators=(',', ': '))
-        jsons_list.append(json_file)
-
+def gen_jsons(args, counts_list, bodies_dir=None):
+    """Gets JSON files with updates requests.
+
+    Bodies are generated into ``bodies_dir`` when given, otherwise they are cached.
+    """
+    if bodies_dir is not None:
+        jsons_list, cached = bodies.body_files(args, counts_list, bodies_dir)
+    else:
+        jsons_list, cached = bodies.body_files(
+            args, counts_list, args.bodies_cache, args.bodies_cache_size * 1024 ** 2,
+            args.bodies_cache_age * 86400)
+    print('Request bodies: {}{}'.format(
+        os.path.dirname(jsons_list[0]) if jsons_list else '-', ' (cached)' if cached else ''))
     return jsons_list
 
 
 # generate tsung XML
 
-def _top_element():
+def _top_element(dump_traffic=False):
     """Creates top XML element."""
-    top = ElementTree.Element('tsung', {'loglevel': 'warning'})
+    attrs = {'loglevel': 'warning'}
+    if dump_traffic:
+        # needed for per-request latencies stored in baselines
+        attrs['dumptraffic'] = 'protocol'
+    top = ElementTree.Element('tsung', attrs)
     return top
 
 
@@ -96,13 +83,33 @@ def _add_servers(parent_element, servers):
         )
 
 
-def _add_load(parent_element, duration, users, one_req_per_user=False):
-    """Adds load section to XML."""
+def _add_load(parent_element, duration, users, one_req_per_user=False, stages=None):
+    """Adds load section to XML; stages of load profile become arrival phases."""
+    if stages:
+        duration = int(math.ceil(profiles.total_duration(stages)))
     load_element = ElementTree.SubElement(
         parent_element,
         'load',
         {'duration': str(duration), 'unit': 'second'}
     )
+    if stages:
+        for num, stage in enumerate(stages, 1):
+            # tsung accepts only integer durations
+            if stage.duration == int(stage.duration):
+                phase_data = {'phase': str(num), 'duration': str(int(stage.duration)),
+                              'unit': 'second'}
+            else:
+                phase_data = {'phase': str(num), 'duration': str(int(round(stage.duration * 1000))),
+                              'unit': 'millisecond'}
+            phase_element = ElementTree.SubElement(load_element, 'arrivalphase', phase_data)
+            ElementTree.SubElement(
+                phase_element,
+                'users',
+                {'arrivalrate': '{:f}'.format(stage.rate).rstrip('0').rstrip('.'),
+                 'unit': 'second'}
+            )
+        return
+
     phase_element = ElementTree.SubElement(
         load_element,
         'arrivalphase',
@@ -159,40 +166,18 @@ def write_tsung_xml(xml_tree):
 
 # pylint: disable=too-many-arguments
 def gen_tsung_xml(
-        packages_file, counts_list, clients, servers, duration, users_num, one_req_per_user):
+        args, counts_list, clients, servers, duration, users_num, one_req_per_user,
+        dump_traffic=False, stages=None, bodies_dir=None):
     """Generates tsung config."""
-    jsons_list = gen_jsons(packages_file, counts_list)
-    top_element = _top_element()
+    jsons_list = gen_jsons(args, counts_list, bodies_dir)
+    top_element = _top_element(dump_traffic)
     _add_clients(top_element, clients)
     _add_servers(top_element, servers)
-    _add_load(top_element, duration, users_num, one_req_per_user)
+    _add_load(top_element, duration, users_num, one_req_per_user, stages)
     _add_sessions(top_element, jsons_list, one_req_per_user)
     write_tsung_xml(top_element)
 
 
-def _get_objs_list(klass, data):
-    objs_list = []
-    if isinstance(data, str):
-        data = [data]
-    for rec in data:
-        if ':' in rec:
-            args = rec.split(':')
-            objs_list.append(klass(*args))
-        else:
-            objs_list.append(klass(rec))
-    return objs_list
-
-
-def get_servers(servers):
-    """Gets list of server data."""
-    return _get_objs_list(Server, servers)
-
-
-def get_clients(clients):
-    """Gets list of clients data."""
-    return _get_objs_list(Client, clients)
-
-
 def get_counts_list(packages_num, requests_num):
     """Gets list of package numbers per request."""
     return [packages_num for __ in range(requests_num)]
@@ -217,30 +202,186 @@ def gen_graphs(log_path):
         )
 
 
-def run_tsung():
+def save_baseline(baseline_file, records, duration, server, label):
+    """Saves results of the run as baseline."""
+    data = baseline.new_baseline(records, duration, baseline.get_server_info(server), label)
+    baseline.save(data, baseline_file)
+    print('Baseline: {}'.format(baseline_file))
+
+
+def _dump_records(dump_file):
+    """Gets baseline records and duration out of tsung dump file."""
+    records = []
+    first = last = None
+    for rec in tsung.read_dump(dump_file):
+        ok = not rec.error and rec.status is not None and rec.status < 400
+        records.append((replay.endpoint_name(rec.url), rec.duration, ok))
+        first = rec.timestamp if first is None else min(first, rec.timestamp)
+        last = rec.timestamp if last is None else max(last, rec.timestamp)
+    return records, (last - first) if records else 0.0
+
+
+def _dump_stage_records(dump_file):
+    """Gets records for per-stage report out of tsung dump file."""
+    records = [
+        (rec.timestamp - rec.duration, rec.duration,
+         not rec.error and rec.status is not None and rec.status < 400)
+        for rec in tsung.read_dump(dump_file)
+    ]
+    if not records:
+        return []
+    first = min(rec[0] for rec in records)
+    return [(start - first, latency, ok) for start, latency, ok in records]
+
+
+def report_stages(stages, records):
+    """Prints statistics for every stage of load profile."""
+    print()
+    profiles.print_stage_report(profiles.stage_report(stages, records))
+
+
+def save_metrics(log_path):
+    """Saves per-interval metrics of tsung run as JSON."""
+    metrics = tsung.get_metrics(log_path)
+    metrics_file = os.path.join(log_path, METRICS_JSON)
+    with open(metrics_file, 'w') as out:
+        tsung.write_json(metrics, out)
+    print('Metrics: {}'.format(metrics_file))
+    return metrics
+
+
+def get_sampler(pids, patterns, interval):
+    """Creates sampler of server processes resources if any process was specified."""
+    if not pids and not patterns:
+        return None
+    return resources.ResourceSampler(pids, patterns, interval)
+
+
+def report_resources(sampler, latency_timeline, resources_file=None):
+    """Prints resource usage of server processes next to latency."""
+    rows = resources.timeline(sampler.samples, latency_timeline)
+    if not rows:
+        return
+    print()
+    resources.print_timeline(rows, rows[0].start)
+    if resources_file:
+        resources.save_timeline(rows, sampler.samples, resources_file)
+        print('Resources: {}'.format(resources_file))
+
+
+# pylint: disable=too-many-arguments
+def run_tsung(baseline_file=None, server=None, label=None, graphs=True, sampler=None,
+              resources_file=None, stages=None):
     """Runs tsung process."""
-    ret = subprocess.run(
-        ['tsung', '-f', TSUNG_XML, '-l', './', 'start'],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=True
-    )
+    if sampler:
+        sampler.start()
+    try:
+        ret = subprocess.run(
+            ['tsung', '-f', TSUNG_XML, '-l', './', 'start'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+    finally:
+        if sampler:
+            sampler.stop()
 
     log_path_re = re.search(r'Log directory is: (.*)', ret.stdout.decode('utf-8'))
     if not log_path_re:
         return 2
 
     log_path = log_path_re.group(1)
-    gen_graphs(log_path)
+    if graphs:
+        gen_graphs(log_path)
     print('Log path: {}'.format(log_path))
+    metrics = save_metrics(log_path)
+    if sampler:
+        report_resources(sampler, tsung.latency_timeline(metrics), resources_file)
+    if stages:
+        report_stages(stages, _dump_stage_records(os.path.join(log_path, tsung.DUMP_FILE)))
+    if baseline_file:
+        records, duration = _dump_records(os.path.join(log_path, tsung.DUMP_FILE))
+        save_baseline(baseline_file, records, duration, server, label)
+    return 0
+
+
+def run_replay(capture_file, servers, connections, speedup, baseline_file=None, label=None):
+    """Replays captured requests and prints latency report."""
+    entries = replay.load_capture(capture_file)
+    if not entries:
+        print('No API requests found in {}'.format(capture_file))
+        return 2
+    print('Replaying {} requests'.format(len(entries)))
+    results, duration = replay.replay(entries, servers, connections, speedup)
+    report = replay.get_report(results, duration)
+    replay.print_report(report)
+    if baseline_file:
+        records = [
+            (replay.endpoint_name(res.request.path), res.latency,
+             not res.error and res.status < 400)
+            for res in results
+        ]
+        save_baseline(baseline_file, records, duration, servers[0], label)
     return 0
 
 
+# pylint: disable=too-many-arguments
+def run_native(args, counts_list, servers, duration, users_num, workers, one_req_per_user,
+               baseline_file=None, label=None, sampler=None, resources_file=None, stages=None):
+    """Runs load using native multi-process engine."""
+    # bodies are generated in memory by worker processes, no files are written
+    lazy_bodies = bodies.LazyBodies(workload.get_selector(args), counts_list, args.seed)
+    if sampler:
+        sampler.start()
+    try:
+        result = engine.run(
+            servers,
+            engine.updates_requests(lazy_bodies),
+            users=users_num,
+            duration=duration,
+            workers=workers,
+            rate=users_num if one_req_per_user else None,
+            schedule=[(stage.start, stage.duration, stage.rate) for stage in stages or []],
+        )
+    finally:
+        if sampler:
+            sampler.stop()
+    engine.print_report(engine.get_report(result))
+    if stages:
+        report_stages(stages, profiles.engine_records(result))
+    if sampler:
+        report_resources(sampler, engine.latency_timeline(result), resources_file)
+    if baseline_file:
+        save_baseline(
+            baseline_file, engine.baseline_records(result), result.duration, servers[0], label)
+    return 0
+
+
+def _phase(value):
+    try:
+        return profiles.parse_phase(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
+
+
+def get_stages(parser, args):
+    """Expands load profile phases into stages, ``None`` without load profile."""
+    try:
+        phases = profiles.load_profile(args.profile) if args.profile else []
+        phases.extend(args.phase or [])
+        if not phases:
+            return None
+        if args.ramp_step <= 0:
+            raise ValueError('--ramp-step must be positive')
+        return profiles.expand(phases, args.ramp_step)
+    except (OSError, ValueError) as err:
+        parser.error(str(err))
+    return None
+
+
 def get_args(args=None):
     """Gets command line arguments."""
     parser = argparse.ArgumentParser(description='run_upload_test')
-    parser.add_argument('-i', '--packages_file', required=True,
-                        help='File with list of rpm files')
     parser.add_argument('-s', '--server', required=True, action='append',
                         help='Server hostname:port')
     parser.add_argument('-c', '--client', default=['localhost'], action='append',
@@ -261,28 +402,126 @@ def get_args(args=None):
     parser.add_argument('--requests-num', type=int, default=20, metavar='REQUESTS',
                         help='How many unique requests to generate'
                              ' (default: %(default)s)')
-    return parser.parse_args(args)
+    parser.add_argument('--phase', type=_phase, action='append', metavar='TYPE:VALUES',
+                        help='Phase of load profile, can be repeated: plateau:RATE:SEC,'
+                             ' step:FROM:TO:STEPS:SEC, linear:FROM:TO:SEC or'
+                             ' spike:BASE:PEAK:SEC:SPIKE_SEC; rates are requests per second'
+                             ' and replace -d and -u')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='YAML file with list of load profile phases,'
+                             ' --phase phases are added after them')
+    parser.add_argument('--ramp-step', type=float, default=profiles.RAMP_STEP, metavar='SEC',
+                        help='Length of constant rate stages approximating linear ramps'
+                             ' (default: %(default)s)')
+    workload.add_arguments(parser)
+    bodies.add_arguments(parser)
+    parser.add_argument('--engine', choices=('tsung', 'native'), default='tsung',
+                        help='Load generator; "native" runs worker processes of this script'
+                             ' on the local machine (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        metavar='WORKERS',
+                        help='How many worker processes are used by native engine'
+                             ' (default: %(default)s)')
+    parser.add_argument('--replay', metavar='CAPTURE',
+                        help='Replay requests captured in JSONL file instead of running tsung;'
+                             ' USERS is number of connections')
+    parser.add_argument('--speedup', type=float, default=1.0, metavar='FACTOR',
+                        help='Divide inter-arrival times of replayed requests by FACTOR'
+                             ' (default: %(default)s)')
+    parser.add_argument('--max-throughput', action='store_true',
+                        help='Replay requests as fast as possible, ignoring their timing')
+    parser.add_argument('--baseline-out', metavar='FILE',
+                        help='Save results as baseline for comparing with other runs'
+                             ' (see perf_baseline.py)')
+    parser.add_argument('--label', help='Label of the run stored in baseline')
+    parser.add_argument('--no-graphs', action='store_true',
+                        help='Do not generate graphs using tsung_stats (Perl, gnuplot)')
+    parser.add_argument('--sample-pid', type=int, action='append', metavar='PID',
+                        help='Sample CPU, memory, file descriptors and threads of local server'
+                             ' process during the run (can be repeated)')
+    parser.add_argument('--sample-name', action='append', metavar='REGEX',
+                        help='Sample resources of local processes with matching command line,'
+                             ' e.g. "vmaas.*app.py" (can be repeated)')
+    parser.add_argument('--sample-interval', type=float, default=1.0, metavar='SEC',
+                        help='Resource sampling interval (default: %(default)s)')
+    parser.add_argument('--resources-out', metavar='FILE',
+                        help='Save resource samples aligned with latency as JSON')
+    parsed = parser.parse_args(args)
+
+    if parsed.replay:
+        if parsed.speedup <= 0:
+            parser.error('--speedup must be positive')
+    else:
+        # bodies of random seed are never generated again, so they are not cached
+        parsed.random_seed = parsed.seed is None
+        workload.check_arguments(parser, parsed)
+    parsed.stages = get_stages(parser, parsed)
+
+    return parsed
 
 
 def main(args=None):
     """Main function for cli."""
     args = get_args(args)
 
+    if args.replay:
+        return run_replay(
+            args.replay,
+            get_servers(args.server),
+            args.users_num,
+            None if args.max_throughput else args.speedup,
+            args.baseline_out,
+            args.label,
+        )
+
     # remove default value if non-default was specified
     clients = args.client
     if len(clients) > 1:
         clients = clients[1:]
 
-    gen_tsung_xml(
-        args.packages_file,
-        get_counts_list(args.packages_num, args.requests_num),
-        get_clients(clients),
-        get_servers(args.server),
-        args.duration,
-        args.users_num,
-        args.one_per_user,
-    )
-    return run_tsung()
+    print('Seed: {}'.format(args.seed))
+    servers = get_servers(args.server)
+    counts_list = get_counts_list(args.packages_num, args.requests_num)
+    sampler = get_sampler(args.sample_pid, args.sample_name, args.sample_interval)
+    if args.engine == 'native':
+        return run_native(
+            args,
+            counts_list,
+            servers,
+            args.duration,
+            args.users_num,
+            args.workers,
+            args.one_per_user,
+            args.baseline_out,
+            args.label,
+            sampler,
+            args.resources_out,
+            args.stages,
+        )
+
+    bodies_dir = tempfile.mkdtemp(prefix='vmaas-bodies-') if args.random_seed else None
+    try:
+        gen_tsung_xml(
+            args,
+            counts_list,
+            get_clients(clients),
+            servers,
+            args.duration,
+            args.users_num,
+            # every user sends one request, so user arrival rate is request rate of the stage
+            args.one_per_user or bool(args.stages),
+            # percentiles in metrics are needed for p99 next to resource usage,
+            # per-request records for per-stage report
+            dump_traffic=bool(args.baseline_out or sampler or args.stages),
+            stages=args.stages,
+            bodies_dir=bodies_dir,
+        )
+        return run_tsung(
+            args.baseline_out, servers[0], args.label, not args.no_graphs, sampler,
+            args.resources_out, args.stages)
+    finally:
+        if bodies_dir is not None:
+            shutil.rmtree(bodies_dir, ignore_errors=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Probe of server cache capacity using growing working set of updates requests.
+"""
+
+import argparse
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import cache, workload  # noqa: E402
+from vmaas.perf.hosts import get_servers  # noqa: E402
+
+
+def _sizes(value):
+    try:
+        sizes = [int(size) for size in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('comma separated list of numbers expected')
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError('sizes must be positive')
+    return sizes
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='run_workingset_probe')
+    parser.add_argument('-s', '--server', required=True, action='append',
+                        help='Server hostname:port')
+    parser.add_argument('-u', '--connections', type=int, default=10, metavar='CONNECTIONS',
+                        help='How many keep-alive connections'
+                             ' (default: %(default)s)')
+    parser.add_argument('-p', '--packages_num', type=int, default=100, metavar='PACKAGES',
+                        help='How many packages per request'
+                             ' (default: %(default)s)')
+    parser.add_argument('--sizes', type=_sizes,
+                        default=list(cache.WORKING_SET_SIZES), metavar='N,N,...',
+                        help='Working set sizes (numbers of distinct requests) to probe'
+                             ' (default: %(default)s)')
+    parser.add_argument('-r', '--rate', type=float, default=50, metavar='REQ_PER_SEC',
+                        help='Constant request rate (default: %(default)s)')
+    parser.add_argument('-d', '--step-duration', type=int, default=30, metavar='SEC',
+                        help='How long every working set size is probed'
+                             ' (default: %(default)s)')
+    parser.add_argument('--hit-threshold', type=float, metavar='MS',
+                        help='Latency in milliseconds below which request counts as cache hit'
+                             ' (default: {}x median of the smallest working set)'.format(
+                                 cache.HIT_FACTOR))
+    parser.add_argument('--knee-fraction', type=float, default=0.5,
+                        help='Hit fraction under which latency knee is reported'
+                             ' (default: %(default)s)')
+    workload.add_arguments(parser)
+    parsed = parser.parse_args(args)
+    workload.check_arguments(parser, parsed)
+    return parsed
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    print('Seed: {}'.format(args.seed))
+    results, threshold = cache.run_working_set(
+        get_servers(args.server),
+        workload.get_selector(args),
+        args.packages_num,
+        sizes=sorted(args.sizes),
+        rate=args.rate,
+        duration=args.step_duration,
+        connections=args.connections,
+        threshold=args.hit_threshold / 1000 if args.hit_threshold else None,
+    )
+    cache.print_working_set(results, threshold, args.knee_fraction)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
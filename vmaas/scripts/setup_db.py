@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sets up VMaaS DB through the sync API and reports duration of every phase.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# make the ``vmaas`` package importable when the script is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from vmaas.perf import dbsetup  # noqa: E402
+from vmaas.perf.baseline import get_server_info  # noqa: E402
+from vmaas.perf.hosts import Server  # noqa: E402
+from vmaas.perf.soak import get_api  # noqa: E402
+
+
+def get_args(args=None):
+    """Gets command line arguments."""
+    parser = argparse.ArgumentParser(description='setup_db')
+    parser.add_argument('repolist', metavar='REPOLIST_PATH',
+                        help='Path to the repolist.json file')
+    parser.add_argument('hostname', metavar='TARGET_HOSTNAME',
+                        help='Hostname of the machine where VMaaS is running')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port of the query API (default: %(default)s)')
+    parser.add_argument('--sync-port', type=int, default=8081,
+                        help='Port of the sync API (default: %(default)s)')
+    parser.add_argument('--phase', action='append', choices=list(dbsetup.PHASES),
+                        help='Phase to run, can be repeated (default: all in order)')
+    parser.add_argument('--timeout', type=float, default=3600, metavar='SEC',
+                        help='How long to wait for one phase (default: %(default)s)')
+    parser.add_argument('--report-out', metavar='FILE',
+                        help='Save timing report as JSON')
+    parsed = parser.parse_args(args)
+    if not parsed.phase:
+        parsed.phase = list(dbsetup.PHASES)
+    return parsed
+
+
+def main(args=None):
+    """Main function for cli."""
+    args = get_args(args)
+    with open(args.repolist) as input_file:
+        repolist = json.load(input_file)
+    server = Server(args.hostname, args.port)
+    api = get_api(server, Server(args.hostname, args.sync_port))
+
+    results = []
+    for name in args.phase:
+        print('Phase {}...'.format(name))
+        result = dbsetup.run_phase(api, name, repolist, args.timeout)
+        results.append(result)
+        if result.error:
+            print('Phase {} failed: {}'.format(name, result.error))
+            break
+
+    report = dbsetup.get_report(results, get_server_info(server))
+    print()
+    dbsetup.print_report(report)
+    if args.report_out:
+        with open(args.report_out, 'w') as out:
+            json.dump(report, out)
+        print('Report: {}'.format(args.report_out))
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
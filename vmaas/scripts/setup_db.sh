@@ -13,17 +13,20 @@ Optional parameters:
                  are running in the same timezone (VMaaS server runs in UTC by default)
 "
 
+# retries the command with doubling delay (1 s up to 10 s) for 10 minutes at most
 wait_and_run() {
-  count=60
-  while [ "$count" -gt 0 ]; do
+  delay=1
+  waited=0
+  while [ "$waited" -lt 600 ]; do
     resp="$("$@")"
     if [[ "$resp" != *"Another sync task already in progress"* ]]; then
       echo "$resp"
       echo
       break
     fi
-    ((count--))
-    sleep 10
+    sleep "$delay"
+    ((waited += delay))
+    delay=$((delay * 2 > 10 ? 10 : delay * 2))
   done
 }
 
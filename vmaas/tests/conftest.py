@@ -1,19 +1,95 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import os
 
 import pytest
 
 from vmaas.misc import packages
 from vmaas.rest import tools
+from vmaas.utils import blockers
+from vmaas.utils.conf import conf
 
 
 logging.basicConfig()
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        '--fake-vmaas', metavar='FIXTURE',
+        help='Run tests against fake VMaaS server serving data from fixture file.')
+    parser.addoption(
+        '--timing', action='store_true',
+        help='Print time spent in network, decoding, validation and fixtures per test.')
+    parser.addoption(
+        '--timing-top', type=int, default=10, metavar='N',
+        help='Number of slowest tests and calls printed by --timing (default: 10).')
+    parser.addoption(
+        '--timing-trace', metavar='FILE',
+        help='Save --timing phases as Chrome trace events (implies --timing).')
+    parser.addoption(
+        '--cassette', metavar='FILE',
+        help='Record responses of the REST API to the cassette file or replay them.')
+    parser.addoption(
+        '--cassette-mode', choices=('record', 'replay'), default='replay',
+        help='Whether --cassette is recorded or replayed without server (default: replay).')
+    parser.addoption(
+        '--result-cache', action='store_true',
+        help='Skip tests that passed twice with the same source and dbchange timestamps.')
+
+
 def pytest_configure(config):
     config.addinivalue_line('markers', 'smoke: mark a test as a smoke test.')
 
+    fixture = config.getoption('--fake-vmaas')
+    if fixture or (config.getoption('--cassette') and
+                   config.getoption('--cassette-mode') == 'replay'):
+        # runs without server don't contact GitHub either
+        blockers.GH.OFFLINE = True
+    if fixture:
+        # imported here so the fake server is loaded only when requested
+        from vmaas.fake.server import FakeServer
+
+        server = FakeServer(fixture, sync_port=0).start()
+        conf['hostname'] = '127.0.0.1:{}'.format(server.port)
+        conf['sync_port'] = server.sync_port
+        config.add_cleanup(server.stop)
+
+    cassette = config.getoption('--cassette')
+    if cassette:
+        # imported here so the cassette is loaded only when requested
+        from vmaas.rest.cassette import Cassette
+
+        tools.cassette = Cassette(cassette, config.getoption('--cassette-mode'))
+        config.add_cleanup(tools.cassette.close)
+
+    if config.getoption('--timing') or config.getoption('--timing-trace'):
+        # imported here so the tests don't wrap anything unless timing is requested
+        from vmaas.utils.timing import TimingPlugin
+
+        config.pluginmanager.register(
+            TimingPlugin(config.getoption('--timing-top'), config.getoption('--timing-trace')),
+            'vmaas-timing')
+
+    if config.getoption('--result-cache'):
+        # imported here so the tests don't wrap anything unless the cache is requested
+        from vmaas.utils.resultcache import ResultCachePlugin
+
+        config.pluginmanager.register(ResultCachePlugin(config), 'vmaas-result-cache')
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):  # pylint: disable=unused-argument
+    if config.option.collectonly:
+        return
+    # resolve blockers used in the collected tests, their skipif conditions and schemas
+    # in one concurrent round; tests which don't use blockers (unit tests) fetch nothing
+    references = blockers.find_references(sorted({str(item.fspath) for item in items}))
+    if references:
+        tests_dir = os.path.dirname(os.path.abspath(__file__))
+        references.extend(blockers.find_references([os.path.join(tests_dir, '..', 'rest')]))
+        blockers.GH.prefetch(references)
+
 
 @pytest.fixture()
 def rest_api():
@@ -208,7 +208,7 @@ class TestCVEsQuery(object):
 
 
 @pytest.mark.smoke
-@pytest.mark.skipif(GH(299).blocks, reason='Blocked by GH 299')
+@pytest.mark.skipif('GH(299).blocks', reason='Blocked by GH 299')
 class TestCVEsModifiedSince(object):
     def test_post_multi(self, rest_api):
         """Tests multiple CVEs using POST."""
@@ -246,7 +246,7 @@ class TestCVEsModifiedSince(object):
         assert 'Wrong date format' in cves.raw.body
 
 
-@pytest.mark.skipif(GH(312).blocks, reason='Blocked by GH 312')
+@pytest.mark.skipif('GH(312).blocks', reason='Blocked by GH 312')
 class TestCVEsCorrect(object):
     def post_multi(self, rest_api, rh_data_required=True):
         """Tests multiple CVEs using POST."""
@@ -322,7 +322,7 @@ class TestCVEsCorrect(object):
         self.get(rest_api, cve_in, rh_data_required=False)
 
 
-@pytest.mark.skipif(GH(311).blocks, reason='Blocked by GH 311')
+@pytest.mark.skipif('GH(311).blocks', reason='Blocked by GH 311')
 @pytest.mark.smoke
 class TestCVEsRegex(object):
     @pytest.mark.parametrize(
@@ -2,7 +2,6 @@
 
 import iso8601
 
-from time import sleep
 from vmaas.rest import tools
 
 
@@ -19,7 +18,7 @@ class TestDBChange(object):
         # perform sync /api/v1/sync
         tools.sync_all()
         # wait for sync
-        sleep(30)
+        tools.wait_for_sync('all', since=exported)
 
         # get datetimes after sync
         response = rest_api.get_dbchange().response_check()
@@ -94,7 +94,7 @@ class TestErrataQuery(object):
         self.post_multi(rest_api, ERRATA)
 
     @pytest.mark.smoke
-    @pytest.mark.skipif(GH(310).blocks, reason='Blocked by GH 310')
+    @pytest.mark.skipif('GH(310).blocks', reason='Blocked by GH 310')
     def test_post_multi_smoke(self, rest_api):
         """Tests multiple real errata using POST."""
         self.post_multi(rest_api, ERRATA_SMOKE)
@@ -2,7 +2,7 @@
 
 import pytest
 
-from vmaas.utils.blockers import GH
+from vmaas.utils.blockers import GH  # noqa: F401 (used by skipif conditions)
 
 UPDATES_JSON = {
     'package_list': [
@@ -69,7 +69,7 @@ class TestJSON(object):
             assert not isinstance(updates.raw.body, dict)
             assert "'package_list' is a required property" in updates.raw.body
 
-    @pytest.mark.skipif(GH(330).blocks or GH(329).blocks,
+    @pytest.mark.skipif('GH(330).blocks or GH(329).blocks',
                         reason="blocked by GH#329 or GH#330")
     @pytest.mark.parametrize('json', JSONS, ids=[j[2] for j in JSONS])
     def test_json_cves(self, rest_api, json):
@@ -90,7 +90,7 @@ class TestJSON(object):
             assert not isinstance(cves.raw.body, dict)
             assert "'cve_list' is a required property" in cves.raw.body
 
-    @pytest.mark.skipif(GH(330).blocks or GH(329).blocks,
+    @pytest.mark.skipif('GH(330).blocks or GH(329).blocks',
                         reason="blocked by GH#329 or GH#330")
     @pytest.mark.parametrize('json', JSONS, ids=[j[2] for j in JSONS])
     def test_json_errata(self, rest_api, json):
@@ -111,7 +111,7 @@ class TestJSON(object):
             assert not isinstance(errata.raw.body, dict)
             assert "'errata_list' is a required property" in errata.raw.body
 
-    @pytest.mark.skipif(GH(330).blocks or GH(329).blocks,
+    @pytest.mark.skipif('GH(330).blocks or GH(329).blocks',
                         reason="blocked by GH#329 or GH#330")
     @pytest.mark.parametrize('json', JSONS, ids=[j[2] for j in JSONS])
     def test_json_repos(self, rest_api, json):
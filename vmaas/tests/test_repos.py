@@ -4,7 +4,7 @@ import pytest
 
 from math import ceil
 from vmaas.rest import schemas, tools
-from vmaas.utils.blockers import GH
+from vmaas.utils.blockers import GH  # noqa: F401 (used by skipif conditions)
 
 REPOS = [
     ('vmaas-test-1', 1),
@@ -105,8 +105,8 @@ class TestReposQuery(object):
 
 @pytest.mark.smoke
 class TestReposNonexistent(object):
-    @pytest.mark.skipif(GH(299).blocks, reason='Blocked by GH 299')
-    @pytest.mark.skipif(GH(316).blocks, reason='Blocked by GH 316')
+    @pytest.mark.skipif('GH(299).blocks', reason='Blocked by GH 299')
+    @pytest.mark.skipif('GH(316).blocks', reason='Blocked by GH 316')
     def test_post_multi(self, rest_api):
         """Tests multiple non-existent repos using POST."""
         request_body = tools.gen_repos_body(REPOS_NONEXISTENT)
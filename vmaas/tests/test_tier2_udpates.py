@@ -44,7 +44,7 @@ class TestUpdatesBasic(object):
 
 
 class TestUpdateInOtherRepo(object):
-    @pytest.mark.skipif(GH(280).blocks, reason='Blocked by GH 280')
+    @pytest.mark.skipif('GH(280).blocks', reason='Blocked by GH 280')
     def test_post_multi(self, rest_api):
         """Tests correct updates in different repo using POST with multiple packages."""
         body = tools.gen_updates_body(
@@ -85,7 +85,7 @@ class TestUpdateInOtherRepo(object):
 
 
 class TestUpdateToNoarch(object):
-    @pytest.mark.skipif(GH(280).blocks, reason='Blocked by GH 280')
+    @pytest.mark.skipif('GH(280).blocks', reason='Blocked by GH 280')
     def test_post_multi(self, rest_api):
         """Tests correct updates to noarch package using POST with multiple packages."""
         body = tools.gen_updates_body(
@@ -161,9 +161,9 @@ class TestUpdateFromNoarch(object):
         tools.validate_package_updates(package, expected, exact_match=True)
 
 
-@pytest.mark.skipif(GH(301).blocks, reason='Blocked by GH 301')
+@pytest.mark.skipif('GH(301).blocks', reason='Blocked by GH 301')
 class TestUpdateI386Filter(object):
-    @pytest.mark.skipif(GH(273).blocks, reason='Blocked by GH 273')
+    @pytest.mark.skipif('GH(273).blocks', reason='Blocked by GH 273')
     def test_post_multi(self, rest_api):
         """Tests correct updates from i386 package with basearch set to x86_64
         using POST with multiple packages.
@@ -4,7 +4,7 @@ import pytest
 
 from vmaas.misc import packages
 from vmaas.rest import schemas, tools
-from vmaas.utils.blockers import GH
+from vmaas.utils.blockers import GH  # noqa: F401 (used by skipif conditions)
 
 
 @pytest.mark.smoke
@@ -45,7 +45,7 @@ class TestUpdatesAll(object):
 
 
 @pytest.mark.smoke
-@pytest.mark.skipif(GH(301).blocks, reason='Blocked by GH 301')
+@pytest.mark.skipif('GH(301).blocks', reason='Blocked by GH 301')
 class TestUpdatesInRepos(object):
     def test_post_multi(self, rest_api):
         """Tests updates in repos using POST with multiple packages."""
@@ -75,7 +75,7 @@ class TestUpdatesInRepos(object):
         for update in package.available_updates:
             assert update['repository'] in packages.REPOS
 
-    @pytest.mark.skipif(GH(299).blocks, reason='Blocked by GH 299')
+    @pytest.mark.skipif('GH(299).blocks', reason='Blocked by GH 299')
     def test_post_nonexistent_repo(self, rest_api):
         """Tests updates in repos using POST with single package."""
         name = packages.PACKAGES_W_REPOS[0][0]
@@ -85,7 +85,7 @@ class TestUpdatesInRepos(object):
         assert not updates.available_updates
 
 
-@pytest.mark.skipif(GH(301).blocks, reason='Blocked by GH 301')
+@pytest.mark.skipif('GH(301).blocks', reason='Blocked by GH 301')
 class TestUpdatesFilterRelease(object):
     def test_post_multi(self, rest_api):
         """Tests updates with filtered release version using POST with multiple packages."""
@@ -118,7 +118,7 @@ class TestUpdatesFilterRelease(object):
             assert update['releasever'] == request_body['releasever']
 
 
-@pytest.mark.skipif(GH(301).blocks, reason='Blocked by GH 301')
+@pytest.mark.skipif('GH(301).blocks', reason='Blocked by GH 301')
 class TestUpdatesFilterBasearch(object):
     def test_post_multi(self, rest_api):
         """Tests updates with filtered basearch using POST with multiple packages."""
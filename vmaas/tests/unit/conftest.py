@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests of the tools; they run without VMaaS server.
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_bash():
+    """Overrides the functional tests fixture querying the server."""
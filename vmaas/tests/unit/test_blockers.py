@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+import types
+
+import pytest
+
+from vmaas.utils import blockers
+from vmaas.utils.blockers import GH, IssueData, IssueStore
+
+TTL = 60
+MAX_STALE = 600
+
+
+class FakeGithub(object):
+    """Stub of ``github.Github`` serving issue states from dict."""
+    def __init__(self, states):
+        self.states = states
+        self.fetched = []
+        self.fetch_done = threading.Event()
+
+    def get_repo(self, repo):
+        return types.SimpleNamespace(get_issue=lambda num: self._issue(repo, num))
+
+    def _issue(self, repo, num):
+        self.fetched.append(num)
+        self.fetch_done.set()
+        state = self.states[num]
+        if isinstance(state, Exception):
+            raise state
+        return types.SimpleNamespace(state=state, title='Issue {}'.format(num))
+
+
+@pytest.fixture()
+def cache_file(tmp_path):
+    return str(tmp_path / 'cache' / 'github_issues.json')
+
+
+@pytest.fixture()
+def github(monkeypatch, cache_file):
+    fake = FakeGithub({1: 'closed', 2: 'open', 3: RuntimeError('rate limit')})
+    monkeypatch.setattr(GH, '_github', fake, raising=False)
+    monkeypatch.setattr(GH, '_issue_cache', {})
+    monkeypatch.setattr(GH, '_store', IssueStore(cache_file))
+    monkeypatch.setattr(GH, '_refreshing', set())
+    monkeypatch.setattr(GH, '_failed', set())
+    monkeypatch.setattr(GH, 'OFFLINE', False)
+    monkeypatch.setattr(GH, 'CACHE_TTL', TTL)
+    monkeypatch.setattr(GH, 'CACHE_MAX_STALE', MAX_STALE)
+    return fake
+
+
+def _store(cache_file, num, state, age):
+    IssueStore(cache_file).put(GH(num).identifier, IssueData(state, None, time.time() - age))
+
+
+def test_fetched_and_stored(github, cache_file):
+    assert GH(2).data.state == 'open'
+    assert GH(1).blocks is False
+    assert GH(2).blocks is True
+    assert github.fetched == [2, 1]
+    # cached in memory and in the file shared by other runs
+    assert GH(1).data.state == 'closed' and github.fetched == [2, 1]
+    assert IssueStore(cache_file).get(GH(1).identifier).state == 'closed'
+
+
+def test_fresh(github, cache_file):
+    _store(cache_file, 1, 'open', TTL / 2)
+    assert GH(1).data.state == 'open'
+    assert github.fetched == []
+
+
+def test_stale_refreshed_in_background(github, cache_file):
+    _store(cache_file, 1, 'open', TTL * 2)
+    # stale state is served right away
+    assert GH(1).data.state == 'open'
+    assert github.fetch_done.wait(5)
+    for __ in range(100):
+        if not GH._refreshing:
+            break
+        time.sleep(0.01)
+    assert GH(1).data.state == 'closed'
+    assert IssueStore(cache_file).get(GH(1).identifier).state == 'closed'
+    assert github.fetched == [1]
+
+
+def test_too_stale_fetched(github, cache_file):
+    _store(cache_file, 1, 'open', MAX_STALE * 2)
+    assert GH(1).data.state == 'closed'
+    assert github.fetched == [1]
+
+
+def test_failure_not_retried(github, caplog):
+    assert GH(3).data.state == 'open'
+    assert GH(3).blocks
+    assert github.fetched == [3]
+    assert 'considered open' in caplog.text
+    # too stale state is used when it can't be refreshed
+    GH._store.put(GH(3).identifier, IssueData('closed', None, time.time() - MAX_STALE * 2))
+    GH._failed.clear()
+    assert GH(3).data.state == 'closed'
+
+
+def test_offline(github, cache_file, monkeypatch):
+    monkeypatch.setattr(GH, 'OFFLINE', True)
+    _store(cache_file, 1, 'closed', MAX_STALE * 2)
+    assert GH(1).data.state == 'closed'
+    assert GH(2).data.state == 'open'
+    assert GH.prefetch([GH(1), GH(2)]) == 0
+    assert github.fetched == []
+
+
+@pytest.mark.parametrize('content', ['{not json', '[1, 2]', '{"RedHatInsights/vmaas:1": 5}',
+                                     '{"RedHatInsights/vmaas:1": ["closed"]}'])
+def test_corrupt_file(github, cache_file, content):
+    os.makedirs(os.path.dirname(cache_file))
+    with open(cache_file, 'w') as out:
+        out.write(content)
+    assert GH(1).data.state == 'closed'
+    assert github.fetched == [1]
+    # corrupt file is replaced
+    with open(cache_file) as input_file:
+        assert json.load(input_file)[GH(1).identifier][0] == 'closed'
+
+
+def test_store_write_failure(cache_file, caplog):
+    store = IssueStore(cache_file)
+    store.put('a/b:1', IssueData('open', None, 1.0))
+    store.put('a/b:2', IssueData('open', object(), 1.0))
+    assert 'Failed to save' in caplog.text
+    assert os.listdir(os.path.dirname(cache_file)) == ['github_issues.json']
+    assert IssueStore(cache_file).get('a/b:1') == IssueData('open', None, 1.0)
+
+
+def test_prefetch(github, cache_file):
+    _store(cache_file, 1, 'open', TTL * 2)
+    _store(cache_file, 2, 'closed', TTL / 2)
+    # missing issues are fetched, stale ones are refreshed in background
+    assert GH.prefetch([GH(1), GH(2), GH(3), GH(3)]) == 0
+    assert GH(3).identifier in GH._failed
+    assert github.fetch_done.wait(5)
+    assert GH.prefetch([GH(3)]) == 0
+    assert sorted(github.fetched) == [1, 3]
+
+
+def test_prefetch_too_stale(github, cache_file):
+    _store(cache_file, 1, 'open', MAX_STALE * 2)
+    assert GH.prefetch([GH(1), GH(2)]) == 2
+    assert sorted(github.fetched) == [1, 2]
+    assert GH(1).data.state == 'closed'
+
+
+def test_no_cache_file(github):
+    assert GH(1).data.state == 'closed'
+    assert blockers.IssueStore(None).get(GH(1).identifier) is None
+
+
+REFERENCES = '''
+import pytest
+from vmaas.utils.blockers import GH
+
+ISSUE = 300
+
+
+@pytest.mark.skipif(GH(240).blocks, reason='Blocked by GH 240')
+def test_decorator():
+    pass
+
+
+@pytest.mark.skipif('GH(250).blocks and True', reason='Blocked by GH 250')
+def test_condition():
+    pass
+
+
+def test_call():
+    if GH('owner/project:260').blocks or GH(ISSUE).blocks or GH(issue_number()).blocks:
+        pytest.skip('Blocked')
+    assert "GH(" in 'GH(270'
+'''
+
+
+def _identifiers(found):
+    return [blocker.identifier for blocker in found]
+
+
+def test_parse_references():
+    assert sorted(_identifiers(blockers.parse_references(REFERENCES))) == [
+        'RedHatInsights/vmaas:240', 'RedHatInsights/vmaas:250', 'owner/project:260']
+    assert blockers.parse_references('import os\n') == []
+    assert blockers.parse_references("GH('not a spec').blocks\nGH(1.5)\nGH(2, 3)\n") == []
+
+
+def test_find_references(tmp_path):
+    (tmp_path / 'tests').mkdir()
+    (tmp_path / 'tests' / 'test_one.py').write_text(REFERENCES)
+    (tmp_path / 'tests' / 'notes.txt').write_text('GH(1)')
+    (tmp_path / 'test_two.py').write_text('GH(280)\n')
+    found = blockers.find_references([str(tmp_path / 'tests'), str(tmp_path / 'test_two.py')])
+    assert len(found) == 4
+    assert _identifiers(found)[-1] == 'RedHatInsights/vmaas:280'
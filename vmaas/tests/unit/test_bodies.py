@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import time
+
+from vmaas.perf import bodies
+
+
+def _args(packages_file, seed=1):
+    return argparse.Namespace(
+        distribution='uniform', packages_file=str(packages_file), frequency_file=None,
+        zipf_skew=1.0, seed=seed, arch=None, name_prefix=None, min_age=None, max_age=None)
+
+
+def _entry(cache_dir, name, size, age):
+    path = cache_dir / name
+    path.mkdir()
+    (path / 'updates0.json').write_bytes(b'x' * size)
+    used = time.time() - age
+    os.utime(str(path), (used, used))
+    return path
+
+
+def test_body_files_cached(tmp_path):
+    packages = tmp_path / 'rpm_list.txt'
+    packages.write_text('bash-4.2.46-28.el7.x86_64\nvim-common-7.4.160-1.el7.x86_64\n')
+    cache_dir = tmp_path / 'cache'
+    files, cached = bodies.body_files(_args(packages), [1, 2], str(cache_dir))
+    assert not cached
+    assert [os.path.basename(path) for path in files] == ['updates0.json', 'updates1.json']
+    again, cached = bodies.body_files(_args(packages), [1, 2], str(cache_dir))
+    assert cached and again == files
+    other, cached = bodies.body_files(_args(packages, seed=2), [1, 2], str(cache_dir))
+    assert not cached and other != files
+    assert len(os.listdir(str(cache_dir))) == 2
+
+
+def test_evict_age(tmp_path):
+    old = _entry(tmp_path, 'old', 10, 3600)
+    new = _entry(tmp_path, 'new', 10, 60)
+    tmp = _entry(tmp_path, '.tmp-running', 10, 3600)
+    assert bodies.evict(str(tmp_path), max_age=1800) == 1
+    assert not old.exists()
+    assert new.exists() and tmp.exists()
+
+
+def test_evict_size(tmp_path):
+    oldest = _entry(tmp_path, 'a', 100, 300)
+    older = _entry(tmp_path, 'b', 100, 200)
+    kept = _entry(tmp_path, 'c', 100, 100)
+    current = _entry(tmp_path, 'd', 100, 400)
+    assert bodies.evict(str(tmp_path), max_size=250, keep=str(current)) == 2
+    assert not oldest.exists() and not older.exists()
+    assert kept.exists() and current.exists()
+
+
+def test_evict_missing_dir(tmp_path):
+    assert bodies.evict(str(tmp_path / 'missing')) == 0
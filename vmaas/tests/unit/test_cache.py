@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import types
+
+from vmaas.perf import cache
+from vmaas.perf.hosts import Server
+from vmaas.perf.http import Connection
+
+
+def test_probe_warms_every_connection(monkeypatch):
+    sent = []
+
+    async def request(self, method, path, body=None):
+        sent.append((id(self), body))
+        await asyncio.sleep(0)
+        return types.SimpleNamespace(status=200)
+
+    monkeypatch.setattr(Connection, 'request', request)
+    bodies = [b'a', b'b', b'c']
+    histogram, errors = asyncio.run(cache._probe(
+        [Server('127.0.0.1', 1), Server('127.0.0.1', 2)], bodies, rate=100, duration=0.1,
+        connections=4, timeout=1))
+    warm_up, measured = sent[:4 * len(bodies)], sent[4 * len(bodies):]
+    assert len(set(warm_up)) == len(warm_up)
+    assert len({conn for conn, __ in warm_up}) == 4
+    assert len(measured) == 10
+    assert histogram.count == 10 and not errors
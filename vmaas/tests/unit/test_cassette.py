@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from simple_rest_client.models import Response
+
+from vmaas.rest.cassette import Cassette, CassetteMiss, request_key
+
+
+def _response(value):
+    return Response('http://localhost/api/v1/cves', 'POST', {'value': value}, {}, 200, True)
+
+
+def _record(path, responses):
+    with Cassette(path, 'record') as cassette:
+        for key, value in responses:
+            cassette.record(key, _response(value))
+
+
+def test_request_key_canonical():
+    assert request_key('get_cves', body={'a': 1, 'b': [1, 2]}) == \
+        request_key('get_cves', body={'b': [1, 2], 'a': 1})
+    assert request_key('get_cves', body={'a': 1}) != request_key('get_errata', body={'a': 1})
+    assert request_key('get_cve', ('CVE-1',)) != request_key('get_cve', ('CVE-2',))
+
+
+@pytest.mark.parametrize('rebuild', [False, True], ids=['index', 'rebuilt_index'])
+def test_replay(tmpdir, rebuild):
+    path = str(tmpdir.join('cassette.jsonl'))
+    _record(path, [('key{}'.format(num), num) for num in range(1000)])
+    if rebuild:
+        os.remove(path + '.idx')
+    with Cassette(path) as cassette:
+        for num in (0, 1, 500, 999):
+            response = cassette.lookup('key{}'.format(num))
+            assert response.body == {'value': num}
+            assert response.status_code == 200
+            assert response.client_response
+        with pytest.raises(CassetteMiss):
+            cassette.lookup('missing')
+
+
+def test_replay_order(tmpdir):
+    """Repeated requests are replayed in order, then the last response is repeated."""
+    path = str(tmpdir.join('cassette.jsonl'))
+    _record(path, [('dbchange', 1), ('other', 0), ('dbchange', 2), ('dbchange', 3)])
+    with Cassette(path) as cassette:
+        assert [cassette.lookup('dbchange').body['value'] for __ in range(5)] == [1, 2, 3, 3, 3]
+
+
+def test_wrap(tmpdir):
+    path = str(tmpdir.join('cassette.jsonl'))
+    calls = []
+
+    def action(*args, body=None, params=None):
+        calls.append(args)
+        return _response(body['num'])
+
+    with Cassette(path, 'record') as cassette:
+        cassette.wrap('get_cves', action)(body={'num': 7})
+    with Cassette(path) as cassette:
+        assert cassette.wrap('get_cves', action)(body={'num': 7}).body == {'value': 7}
+    assert len(calls) == 1
+
+
+def test_unknown_mode(tmpdir):
+    with pytest.raises(ValueError):
+        Cassette(str(tmpdir.join('cassette.jsonl')), 'append')
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vmaas.perf.catalog import Catalog
+
+LINES = [
+    'bash-4.2.46-28.el7.x86_64',
+    'not a package',
+    'bash-4.2.46-30.el7.x86_64.rpm',
+    'bash-0:4.2.46-30.el7.x86_64',
+    'bash-4.2.46-30.el7.i686',
+    'bash-4.3~rc1-1.el7.x86_64',
+    'vim-common-2:7.4.160-1.el7.x86_64',
+    'vim-common-7.4.629-1.el7.x86_64',
+    'vim-enhanced-7.4.160-1.el7',
+]
+
+
+@pytest.fixture()
+def catalog():
+    return Catalog.from_lines(LINES)
+
+
+def test_roundtrip(catalog):
+    assert len(catalog) == len(LINES) - 1
+    assert catalog.skipped == 1
+    for index in range(len(catalog)):
+        assert catalog.nevra(index) == LINES[catalog.line(index)]
+    assert catalog.line(0) == 0
+    assert catalog.line(1) == 2
+
+
+def test_ages(catalog):
+    ages = {catalog.nevra(index): age for index, age in enumerate(catalog.ages)}
+    assert ages == {
+        'bash-4.3~rc1-1.el7.x86_64': 0,
+        # missing epoch is epoch 0, so the two are the same version
+        'bash-4.2.46-30.el7.x86_64.rpm': 1,
+        'bash-0:4.2.46-30.el7.x86_64': 1,
+        'bash-4.2.46-28.el7.x86_64': 2,
+        'bash-4.2.46-30.el7.i686': 0,
+        # epoch wins over version
+        'vim-common-2:7.4.160-1.el7.x86_64': 0,
+        'vim-common-7.4.629-1.el7.x86_64': 1,
+        'vim-enhanced-7.4.160-1.el7': 0,
+    }
+
+
+def test_ages_reset_by_add(catalog):
+    assert catalog.ages[0] == 2
+    catalog.add('bash-5.0-1.el8.x86_64')
+    assert catalog.ages[0] == 3
+
+
+def test_select(catalog):
+    assert list(catalog.select(arch='i686')) == ['bash-4.2.46-30.el7.i686']
+    assert len(catalog.select(arch=['x86_64', 'i686'])) == 7
+    assert list(catalog.select(arch='s390x')) == []
+    assert list(catalog.select(name_prefix='vim', max_age=0)) == [
+        'vim-common-2:7.4.160-1.el7.x86_64', 'vim-enhanced-7.4.160-1.el7']
+    older = catalog.select(name_prefix='bash', arch='x86_64', min_age=1)
+    assert older[:] == ['bash-4.2.46-28.el7.x86_64', 'bash-4.2.46-30.el7.x86_64.rpm',
+                        'bash-0:4.2.46-30.el7.x86_64']
+    assert older[-1] == 'bash-0:4.2.46-30.el7.x86_64'
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+import random
+import re
+
+import pytest
+
+from vmaas.fake import dataset
+
+
+def test_errata_names():
+    headers = dataset._gen_errata_headers(random.Random(1), 20000)
+    names = [name for __, name, __ in headers]
+    assert len(set(names)) == len(names) == 20000
+    assert [issued for issued, __, __ in headers] == sorted(issued for issued, __, __ in headers)
+    for name in names:
+        year, seq = re.match(r'^RH[SBE]A-([0-9]{4}):([0-9]{4,5})$', name).groups()
+        assert len(seq) == 4 or int(year) >= dataset.LONG_ERRATUM_YEAR
+
+
+def test_too_many_errata():
+    with pytest.raises(ValueError):
+        dataset.generate(1, errata=dataset.MAX_ERRATA + 1)
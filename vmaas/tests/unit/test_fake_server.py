@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import statistics
+import time
+
+import pytest
+
+from vmaas.fake.server import Dataset, FakeServer
+from vmaas.perf.http import Connection
+
+LATENCY = 0.005
+
+DATA = {
+    'errata': {'RHBA-2018:0001': {'updated': '2018-01-01T00:00:00+00:00'}},
+    'repos': {'rhel-7-server-rpms': [{'basearch': 'x86_64', 'releasever': '7Server'}]},
+    'packages': {
+        'pkg-1-2.noarch': {'errata': ['RHBA-2018:0001'], 'repositories': ['rhel-7-server-rpms']},
+        'pkg-1-3.x86_64': {'errata': ['RHBA-2018:0001'], 'repositories': ['rhel-7-server-rpms']},
+        'pkg-1-4.i686': {'errata': ['RHBA-2018:0001'], 'repositories': ['rhel-7-server-rpms']},
+    },
+}
+
+
+@pytest.fixture(scope='module')
+def server():
+    fake = FakeServer(Dataset(DATA), latency=LATENCY).start()
+    yield fake
+    fake.stop()
+
+
+def _latencies(port, method, path, body, count=20):
+    async def measure():
+        conn = Connection('127.0.0.1', port)
+        latencies = []
+        try:
+            for __ in range(count):
+                started = time.perf_counter()
+                response = await conn.request(method, path, body)
+                latencies.append(time.perf_counter() - started)
+                assert response.status == 200
+        finally:
+            conn.close()
+        return latencies
+    return asyncio.run(measure())
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('GET', '/api/v1/dbchange', None),
+    ('POST', '/api/v1/updates', {'package_list': ['pkg-1-1.x86_64']}),
+], ids=['dbchange', 'updates'])
+def test_keepalive_latency(server, method, path, body):
+    """Sequential requests over one keep-alive connection don't wait for delayed ACK."""
+    latencies = _latencies(server.port, method, path, body)
+    # delayed ACK would add ~40 ms to every request after the first one
+    assert statistics.median(latencies[1:]) < LATENCY + 0.02
+
+
+def test_updates_arch():
+    """Noarch package can be updated by arch specific package and the other way round."""
+    dataset = Dataset(DATA)
+    noarch = dataset.package_updates('pkg-1-1.noarch')['available_updates']
+    assert sorted(update['package'] for update in noarch) == [
+        'pkg-1-2.noarch', 'pkg-1-3.x86_64', 'pkg-1-4.i686']
+    x86_64 = dataset.package_updates('pkg-1-1.x86_64')['available_updates']
+    assert sorted(update['package'] for update in x86_64) == ['pkg-1-2.noarch', 'pkg-1-3.x86_64']
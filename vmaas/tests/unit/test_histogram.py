@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import json
+import random
+
+import pytest
+
+from vmaas.perf import stats
+from vmaas.perf.histogram import SUB_COUNT, Histogram, bucket_bounds, bucket_index
+
+
+def test_buckets_contiguous():
+    assert bucket_bounds(0) == (0, 0)
+    for index in range(20 * SUB_COUNT):
+        lowest, highest = bucket_bounds(index)
+        assert lowest <= highest
+        assert bucket_bounds(index + 1)[0] == highest + 1
+        assert bucket_index(lowest) == bucket_index(highest) == index
+
+
+@pytest.mark.parametrize('value', [0, 1, SUB_COUNT - 1, SUB_COUNT, SUB_COUNT + 1, 1000, 12345,
+                                   999999, 10 ** 7, 2 ** 40 + 17])
+def test_bucket_precision(value):
+    lowest, highest = bucket_bounds(bucket_index(value))
+    assert lowest <= value <= highest
+    assert abs((lowest + highest) / 2.0 - value) <= 0.01 * value
+
+
+def test_percentiles():
+    rng = random.Random(1)
+    samples = [rng.expovariate(100) for __ in range(5000)]
+    histogram = Histogram()
+    for sample in samples:
+        histogram.record(sample)
+    exact = stats.summarize(samples)
+    summary = histogram.summarize()
+    assert summary['count'] == exact['count']
+    assert summary['min'] == exact['min']
+    assert summary['max'] == exact['max']
+    assert summary['mean'] == pytest.approx(exact['mean'])
+    for pct in stats.PERCENTILES:
+        key = 'p{}'.format(pct)
+        assert summary[key] == pytest.approx(exact[key], rel=0.01, abs=1e-6)
+
+
+def test_empty():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    assert histogram.fraction_below(1) is None
+    assert histogram.summarize(2) == {'count': 0, 'throughput': 0}
+
+
+def test_merge():
+    rng = random.Random(2)
+    samples = [rng.uniform(0.001, 2) for __ in range(3000)]
+    whole = Histogram()
+    parts = [Histogram() for __ in range(3)]
+    for num, sample in enumerate(samples):
+        whole.record(sample)
+        parts[num % 3].record(sample)
+    merged = Histogram()
+    for part in parts:
+        merged.merge(part)
+    assert merged.counts == whole.counts
+    assert merged.total == pytest.approx(whole.total)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.summarize() == pytest.approx(whole.summarize())
+    # merging empty histogram changes nothing
+    assert merged.merge(Histogram()).counts == whole.counts
+
+
+def test_dict_roundtrip():
+    histogram = Histogram()
+    for value in (0.0001, 0.002, 0.002, 0.5):
+        histogram.record(value)
+    restored = Histogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert restored.counts == histogram.counts
+    assert restored.summarize() == histogram.summarize()
+    assert restored.fraction_below(0.01) == 0.75
+    assert list(restored.samples()) == sorted(restored.samples())
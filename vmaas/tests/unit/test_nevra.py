@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vmaas.utils.nevra import NEVRA, evr_cmp, nevra_cmp, parse_evr, parse_nevra, rpmvercmp
+
+VERSIONS = [
+    ('1.0', '1.0', 0),
+    ('1.0', '2.0', -1),
+    ('2.0.1', '2.0', 1),
+    ('1.0a', '1.0', 1),
+    ('10', '9', 1),
+    ('010', '10', 0),
+    ('1.0', '1_0', 0),
+    ('a', '1', -1),
+    ('1.0~rc1', '1.0', -1),
+    ('1.0~rc1', '1.0~rc2', -1),
+    ('1.0~rc1~git123', '1.0~rc1', -1),
+    ('1.0~rc1', '1.0~', 1),
+    ('1.0^', '1.0', 1),
+    ('1.0^', '1.0^git1', -1),
+    ('1.0^git1', '1.0', 1),
+    ('1.0^git1', '1.01', -1),
+    ('1.0^git1', '1.0.1', -1),
+    ('1.0^git1', '1.0^git2', -1),
+    ('1.0^git1~pre', '1.0^git1', -1),
+    ('1.0~rc1^git1', '1.0~rc1', 1),
+    ('1.0~rc1^git1', '1.0', -1),
+]
+
+NEVRAS = [
+    ('bash-4.2.46-28.el7.x86_64', NEVRA('bash', None, '4.2.46', '28.el7', 'x86_64')),
+    ('bash-4.2.46-28.el7.x86_64.rpm', NEVRA('bash', None, '4.2.46', '28.el7', 'x86_64')),
+    ('bash-0:4.2.46-28.el7.x86_64', NEVRA('bash', 0, '4.2.46', '28.el7', 'x86_64')),
+    ('2:vim-common-7.4.160-1.el7.x86_64', NEVRA('vim-common', 2, '7.4.160', '1.el7', 'x86_64')),
+    ('bash-4.2.46-28.el7', NEVRA('bash', None, '4.2.46', '28.el7', None)),
+    ('bash-4.2.46-28.el7.rpm', NEVRA('bash', None, '4.2.46', '28.el7', None)),
+    ('kernel-4.18.0-80.el8.unknown', NEVRA('kernel', None, '4.18.0', '80.el8.unknown', None)),
+    ('python3-dnf-plugin-versionlock-4.0.9-1.el8.noarch',
+     NEVRA('python3-dnf-plugin-versionlock', None, '4.0.9', '1.el8', 'noarch')),
+    ('pkg-1.0~rc1^git1-1.src', NEVRA('pkg', None, '1.0~rc1^git1', '1', 'src')),
+]
+
+INVALID = [
+    'bash',
+    'bash-4.2',
+    'bash-4.2.x86_64',
+    '-4.2-1.x86_64',
+    'bash--1.x86_64',
+    'bash-4.2-.x86_64',
+    'bash-x:4.2-1.x86_64',
+    'bash-:4.2-1.x86_64',
+]
+
+
+@pytest.mark.parametrize('first, second, expected', VERSIONS,
+                         ids=['{} {}'.format(v[0], v[1]) for v in VERSIONS])
+def test_rpmvercmp(first, second, expected):
+    assert rpmvercmp(first, second) == expected
+    assert rpmvercmp(second, first) == -expected
+
+
+@pytest.mark.parametrize('nevra, expected', NEVRAS, ids=[n[0] for n in NEVRAS])
+def test_parse_nevra(nevra, expected):
+    assert parse_nevra(nevra) == expected
+
+
+@pytest.mark.parametrize('nevra', INVALID)
+def test_parse_nevra_invalid(nevra):
+    with pytest.raises(ValueError):
+        parse_nevra(nevra)
+
+
+def test_parse_evr():
+    assert parse_evr('1:2.0-3.el7') == (1, '2.0', '3.el7')
+    assert parse_evr('2.0-3') == (None, '2.0', '3')
+    assert parse_evr('2.0') == (None, '2.0', None)
+
+
+def test_evr_cmp():
+    # missing epoch is epoch 0
+    assert evr_cmp((None, '1.0', '1'), (0, '1.0', '1')) == 0
+    assert evr_cmp((1, '1.0', '1'), (None, '2.0', '1')) == 1
+    # release is compared only when both have it
+    assert evr_cmp((None, '1.0', None), (None, '1.0', '5')) == 0
+    assert evr_cmp((None, '1.0', '2'), (None, '1.0', '10')) == -1
+
+
+def test_nevra_cmp():
+    assert nevra_cmp('bash-4.2.46-28.el7.x86_64', 'bash-4.2.46-30.el7.x86_64') == -1
+    assert nevra_cmp('bash-1:4.2.46-28.el7.x86_64', 'bash-4.3-1.el7.x86_64') == 1
+    assert nevra_cmp(parse_nevra('a-1-1.noarch'), 'b-1-1.noarch') == 0
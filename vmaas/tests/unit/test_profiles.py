@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vmaas.perf import profiles
+from vmaas.perf.profiles import Stage
+
+
+def test_parse_phase():
+    assert profiles.parse_phase('plateau:50:60') == {'type': 'plateau', 'rate': 50, 'duration': 60}
+    assert profiles.parse_phase('spike:10:100:60:5') == {
+        'type': 'spike', 'base': 10, 'peak': 100, 'duration': 60, 'spike': 5}
+
+
+@pytest.mark.parametrize('text', ['ramp:1:2', 'plateau:50', 'linear:1:2:3:4', 'step'])
+def test_parse_phase_invalid(text):
+    with pytest.raises(ValueError):
+        profiles.parse_phase(text)
+
+
+def test_expand():
+    phases = [profiles.parse_phase(text) for text in
+              ('step:10:100:3:30', 'linear:10:20:10', 'spike:10:50:20:4')]
+    stages = profiles.expand(phases, ramp_step=5)
+    assert stages == [
+        Stage('1 step 1/3', 0, 10, 10),
+        Stage('1 step 2/3', 10, 10, 55),
+        Stage('1 step 3/3', 20, 10, 100),
+        Stage('2 linear 1/2', 30, 5, 12.5),
+        Stage('2 linear 2/2', 35, 5, 17.5),
+        Stage('3 spike base', 40, 8, 10),
+        Stage('3 spike peak', 48, 4, 50),
+        Stage('3 spike base', 52, 8, 10),
+    ]
+    assert profiles.total_duration(stages) == 60
+    assert profiles.stage_index(stages, 0) == 0
+    assert profiles.stage_index(stages, 47.9) == 5
+    assert profiles.stage_index(stages, 48) == 6
+    assert profiles.stage_index(stages, 60) is None
+
+
+@pytest.mark.parametrize('text', ['plateau:0:10', 'plateau:10:0', 'step:10:20:0:10',
+                                  'spike:10:20:10:10', 'linear:-5:5:10'])
+def test_expand_invalid(text):
+    with pytest.raises(ValueError):
+        profiles.expand([profiles.parse_phase(text)])
+
+
+def test_stage_report():
+    stages = profiles.expand([profiles.parse_phase('step:10:20:2:20')])
+    records = [(1, 0.1, True), (2, 0.3, True), (3, None, False),
+               (15, 0.2, True), (25, 0.5, True)]
+    first, second = profiles.stage_report(stages, records)
+    assert (first['count'], first['errors'], first['rate']) == (2, 1, 10)
+    assert first['throughput'] == pytest.approx(0.2)
+    assert first['max'] == 0.3
+    assert (second['count'], second['errors'], second['rate']) == (1, 0, 20)
+
+
+def test_load_profile(tmp_path):
+    profile = tmp_path / 'profile.yaml'
+    profile.write_text('phases:\n'
+                       '  - {type: plateau, rate: 5, duration: 10}\n'
+                       '  - {type: linear, from: 5, to: 15, duration: 10}\n')
+    assert profiles.load_profile(str(profile)) == [
+        {'type': 'plateau', 'rate': 5, 'duration': 10},
+        {'type': 'linear', 'from': 5, 'to': 15, 'duration': 10},
+    ]
+    profile.write_text('- {type: plateau, rate: 5}\n')
+    with pytest.raises(ValueError):
+        profiles.load_profile(str(profile))
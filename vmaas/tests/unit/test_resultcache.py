@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+import importlib.util
+import linecache
+import time
+import types
+
+import pytest
+
+from vmaas.utils import blockers, resultcache
+from vmaas.utils.resultcache import ResultCachePlugin
+
+MODULE = '''
+import pytest
+
+LIMIT = {limit}
+
+
+def helper():
+    return LIMIT
+
+
+{marker}
+def test_one():
+    assert helper() == {expected}
+
+
+def test_other():
+    assert {other}
+'''
+
+
+class FakeCache(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+class FakeItem(object):
+    # pylint: disable=too-few-public-methods
+    def __init__(self, path, function, rootdir, marks):
+        self.fspath = path
+        self.function = function
+        self.cls = None
+        self.nodeid = 'test_updates.py::{}'.format(function.__name__)
+        self.config = types.SimpleNamespace(rootdir=rootdir)
+        self.marks = marks
+        self.markers = []
+
+    def add_marker(self, marker):
+        self.markers.append(marker)
+
+    def iter_markers(self, name):
+        return [mark for mark in self.marks if mark.name == name]
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    # schemas reference blockers too, none of them is fetched
+    monkeypatch.setattr(blockers.GH, 'OFFLINE', True)
+    monkeypatch.setattr(blockers.GH, '_issue_cache', {})
+    monkeypatch.setattr(ResultCachePlugin, 'get_timestamps',
+                        staticmethod(lambda: {'last_change': '2020-01-01T00:00:00+00:00'}))
+
+
+class Suite(object):
+    """Test module on disk and runs of the result cache plugin over it."""
+    def __init__(self, tmp_path):
+        self.root = tmp_path
+        self.path = tmp_path / 'test_updates.py'
+        self.cache = FakeCache()
+        self.params = {'limit': 1, 'expected': 1, 'other': True, 'marker': ''}
+        self.write_conftest('')
+        self.write()
+
+    def write(self, **params):
+        self.params.update(params)
+        self.path.write_text(MODULE.format(**self.params))
+        linecache.clearcache()
+        for func in (resultcache._parse, resultcache.helpers_hash, resultcache.conftest_hash):
+            func.cache_clear()
+
+    def write_conftest(self, source):
+        (self.root / 'conftest.py').write_text(source)
+        resultcache.conftest_hash.cache_clear()
+
+    def items(self):
+        spec = importlib.util.spec_from_file_location('test_updates', str(self.path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        marks = []
+        if self.params['marker']:
+            marks = [pytest.mark.skipif('GH(280).blocks', reason='Blocked by GH 280').mark]
+        return [FakeItem(str(self.path), module.test_one, str(self.root), marks)]
+
+    def run(self, body=None, passed=True):
+        """Runs the session; returns whether the test was skipped as cached."""
+        config = types.SimpleNamespace(cache=self.cache,
+                                       option=types.SimpleNamespace(collectonly=False))
+        plugin = ResultCachePlugin(config)
+        item, = self.items()
+        plugin.pytest_collection_modifyitems(None, config, [item])
+        if item.markers:
+            return True
+        plugin.bodies[item.nodeid] = [['get_updates', [], body or {'package_list': ['bash']}]]
+        plugin.pytest_runtest_logreport(types.SimpleNamespace(
+            nodeid=item.nodeid, when='call', failed=not passed, skipped=False))
+        plugin.pytest_sessionfinish(None)
+        return False
+
+
+@pytest.fixture()
+def suite(tmp_path):
+    return Suite(tmp_path)
+
+
+def _cache_state(state):
+    blockers.GH._issue_cache[blockers.GH(280).identifier] = blockers.IssueData(
+        state, None, time.time())
+
+
+def test_skipped_after_two_passes(suite):
+    assert [suite.run() for __ in range(4)] == [False, False, True, True]
+
+
+def test_failure_forgets_pass(suite):
+    assert not suite.run()
+    assert not suite.run(passed=False)
+    assert not suite.run()
+    assert not suite.run()
+    assert suite.run()
+
+
+@pytest.mark.parametrize('edit', [
+    {'expected': '1 or 2'},
+    {'limit': 2, 'expected': 2},
+])
+def test_source_change(suite, edit):
+    assert [suite.run() for __ in range(3)] == [False, False, True]
+    suite.write(**edit)
+    assert [suite.run() for __ in range(3)] == [False, False, True]
+
+
+def test_other_test_change(suite):
+    assert [suite.run() for __ in range(3)] == [False, False, True]
+    suite.write(other='1 == 1')
+    assert suite.run()
+
+
+def test_conftest_change(suite):
+    assert [suite.run() for __ in range(3)] == [False, False, True]
+    suite.write_conftest('import pytest\n')
+    assert not suite.run()
+
+
+def test_blocker_state_change(suite):
+    suite.write(marker="@pytest.mark.skipif('GH(280).blocks', reason='Blocked by GH 280')")
+    _cache_state('closed')
+    assert [suite.run() for __ in range(3)] == [False, False, True]
+    # requests of the same source were already seen stable, one pass is enough
+    _cache_state('open')
+    assert [suite.run() for __ in range(2)] == [False, True]
+    _cache_state('closed')
+    assert not suite.run()
+
+
+def test_volatile_sticky(suite):
+    assert not suite.run(body={'package_list': ['bash'], 'modified_since': '1'})
+    assert not suite.run(body={'package_list': ['bash'], 'modified_since': '2'})
+    # the same requests from now on don't make the result reusable
+    assert [suite.run(body={'package_list': ['bash']}) for __ in range(3)] == [False] * 3
+
+
+def test_collect_only(suite):
+    config = types.SimpleNamespace(cache=suite.cache,
+                                   option=types.SimpleNamespace(collectonly=True))
+    plugin = ResultCachePlugin(config)
+    plugin.pytest_collection_modifyitems(None, config, suite.items())
+    assert plugin.timestamps is None and not plugin.fingerprints
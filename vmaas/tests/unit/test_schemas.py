@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+from schema import SchemaError
+
+from vmaas.rest import schemas
+from vmaas.rest.schemas import BlockerSchema
+from vmaas.utils import blockers
+
+
+class Blocker(object):
+    # pylint: disable=too-few-public-methods
+    def __init__(self, blocks):
+        self.resolved = 0
+        self._blocks = blocks
+
+    @property
+    def blocks(self):
+        self.resolved += 1
+        return self._blocks
+
+
+@pytest.mark.parametrize('blocks, valid, invalid', [
+    (True, {'old_name': 1}, {'new_name': 1}),
+    (False, {'new_name': 1}, {'old_name': 1}),
+])
+def test_blocker_schema(blocks, valid, invalid):
+    blocker = Blocker(blocks)
+    schema = BlockerSchema(blocker, {'old_name': int}, {'new_name': int})
+    # nothing is resolved until the schema is used
+    assert blocker.resolved == 0
+    assert schema.validate(valid) == valid
+    with pytest.raises(SchemaError):
+        schema.validate(invalid)
+    assert schema.is_valid(valid)
+    assert blocker.resolved == 1
+
+
+@pytest.mark.parametrize('state, expected', [('open', 'blocked'), ('closed', 'fixed')])
+def test_updates_top_releasever_schema(monkeypatch, state, expected):
+    blocker = schemas.updates_top_releasever_schema.blocker
+    monkeypatch.setattr(blockers.GH, 'OFFLINE', True)
+    monkeypatch.setattr(blockers.GH, '_issue_cache', {
+        blocker.identifier: blockers.IssueData(state, None, time.time())})
+    schema = BlockerSchema(blocker, schemas.updates_top_releasever_schema.blocked,
+                           schemas.updates_top_releasever_schema.fixed)
+    assert schema.schema._schema is getattr(schema, expected)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from vmaas.perf import stats
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert stats.percentile(samples, 50) == 50
+    assert stats.percentile(samples, 99) == 99
+    assert stats.percentile(samples, 0) == 1
+    assert stats.percentile([], 50) is None
+
+
+def test_summarize():
+    summary = stats.summarize([0.3, 0.1, 0.2], duration=2)
+    assert summary['count'] == 3
+    assert summary['throughput'] == 1.5
+    assert summary['mean'] == pytest.approx(0.2)
+    assert (summary['min'], summary['p50'], summary['max']) == (0.1, 0.2, 0.3)
+
+
+def test_ranks_ties():
+    ranks, ties = stats._ranks([3, 1, 2, 2, 5, 5, 5])
+    assert ranks == [4.0, 1.0, 2.5, 2.5, 6.0, 6.0, 6.0]
+    assert ties == (2 ** 3 - 2) + (3 ** 3 - 3)
+
+
+def test_mann_whitney_ties():
+    # reference values computed by hand with the tie corrected variance
+    u_stat, p_value = stats.mann_whitney_u([1, 2, 2, 3, 4, 4, 5], [3, 4, 4, 5, 6, 6, 7])
+    assert u_stat == 41
+    assert p_value == pytest.approx(0.01892, abs=1e-5)
+    u_stat, p_value = stats.mann_whitney_u([1, 2, 3], [2, 3, 4])
+    assert u_stat == 7
+    assert p_value == pytest.approx(0.18434, abs=1e-5)
+
+
+def test_mann_whitney_direction():
+    old = [0.010 + 0.0001 * i for i in range(30)]
+    new = [0.012 + 0.0001 * i for i in range(30)]
+    assert stats.mann_whitney_u(old, new)[1] < 0.01
+    assert stats.mann_whitney_u(new, old)[1] > 0.99
+
+
+def test_mann_whitney_degenerate():
+    assert stats.mann_whitney_u([], [1, 2]) == (None, 1.0)
+    # all values tied, there is no variance
+    assert stats.mann_whitney_u([1, 1, 1], [1, 1]) == (3.0, 1.0)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+import time
+
+import pytest
+
+from wait_for import TimedOutError
+
+from vmaas.fake.server import Dataset, FakeServer
+from vmaas.rest import exceptions, tools
+from vmaas.rest.client import VMaaSClient
+
+DATA = {'dbchange': {'exported': '2020-01-01T00:00:00+00:00'}}
+
+
+@pytest.fixture()
+def server():
+    fake = FakeServer(Dataset(DATA), sync_duration=0.3).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture()
+def api(server):
+    return VMaaSClient('127.0.0.1', port=server.port, port2=server.port)
+
+
+def test_finished(server, api):
+    since = tools.get_dbchange_time(api, 'exported')
+    assert server.start_sync('sync/export')
+    waited = tools.wait_for_sync('export', since=since, delay=0.05, max_delay=0.1, api=api)
+    assert 0.3 <= waited < 0.3 + 0.5
+    assert tools.get_dbchange_time(api, 'exported') > since
+
+
+def test_timeout(api):
+    started = time.monotonic()
+    with pytest.raises(TimedOutError):
+        tools.wait_for_sync('export', timeout=0.3, delay=0.05, max_delay=0.1, api=api)
+    assert time.monotonic() - started < 1
+
+
+def test_stop(api):
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    started = time.monotonic()
+    assert tools.wait_for_sync('export', delay=0.05, max_delay=0.1, api=api, stop=stop) is None
+    assert time.monotonic() - started < 1
+
+
+def test_unreachable():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    api = VMaaSClient('127.0.0.1', port=port, port2=port)
+    started = time.monotonic()
+    with pytest.raises(exceptions.ClientConnectionError):
+        tools.wait_for_sync('export', since='2020-01-01T00:00:00+00:00', delay=0.01,
+                            max_delay=0.01, api=api, max_failures=3)
+    assert time.monotonic() - started < 5
@@ -5,13 +5,30 @@ Blockers using GitHub issues.
 
 # Implementation copied from ManageIQ/integration_tests
 
+import ast
+import collections
+import concurrent.futures
+import json
+import logging
+import os
 import re
-
-from github import Github
+import tempfile
+import threading
+import time
 
 from vmaas.utils.conf import conf
 
 
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'vmaas-tests', 'github_issues.json')
+
+# state of GitHub issue, ``fetched`` is epoch time of the API call
+IssueData = collections.namedtuple('IssueData', 'state title fetched')
+
+
 class _classproperty(property):
     """Subclass property to make classmethod properties possible."""
     def __get__(self, cls, owner):
@@ -35,6 +52,60 @@ def classproperty(func):
     return _classproperty(classmethod(func))
 
 
+class IssueStore(object):
+    """Persistent JSON cache of GitHub issues shared by test runs.
+
+    Args:
+        path: Path of the cache file, ``None`` disables persistence
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path) if path else None
+        self._lock = threading.Lock()
+        self._issues = None
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as input_file:
+                return {identifier: IssueData(*record)
+                        for identifier, record in json.load(input_file).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def get(self, identifier):
+        """Returns cached ``IssueData`` or ``None``."""
+        if not self.path:
+            return None
+        with self._lock:
+            if self._issues is None:
+                self._issues = self._read()
+            return self._issues.get(identifier)
+
+    def put(self, identifier, data):
+        """Stores ``IssueData``; merged with the file as other processes may write it too."""
+        if not self.path:
+            return
+        with self._lock:
+            self._issues = self._read()
+            self._issues[identifier] = data
+            tmp_path = None
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path),
+                                                    prefix='.tmp-')
+                with os.fdopen(handle, 'w', encoding='utf-8') as out:
+                    json.dump({key: list(value) for key, value in self._issues.items()}, out)
+                os.replace(tmp_path, self.path)
+                tmp_path = None
+            except (OSError, TypeError, ValueError) as err:
+                LOGGER.warning('Failed to save GitHub issues cache %s: %s', self.path, err)
+            finally:
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+
 class Blocker(object):
     """Base class for all blockers.
 
@@ -86,19 +157,38 @@ class Blocker(object):
 
 
 class GH(Blocker):
-    """GitHub issues blocker."""
+    """GitHub issues blocker.
+
+    Issue states are cached in ``github/cache_file``. Cached state older than
+    ``github/cache_ttl`` seconds is still used and refreshed in background, state
+    older than ``github/cache_max_stale`` seconds is refreshed before use. Issues
+    which failed to be fetched are not fetched again in the same run, without cached
+    state they are considered open. With ``github/offline`` set GitHub is never
+    contacted, issues not in the cache are considered open.
+    """
     DEFAULT_REPOSITORY = conf.get('github', {}).get('upstream_repo')
+    CACHE_TTL = conf.get('github', {}).get('cache_ttl', 3600)
+    CACHE_MAX_STALE = conf.get('github', {}).get('cache_max_stale', 7 * 24 * 3600)
+    OFFLINE = conf.get('github', {}).get('offline', False)
     _issue_cache = {}
+    _store = IssueStore(conf.get('github', {}).get('cache_file', DEFAULT_CACHE_FILE))
+    _refreshing = set()
+    _failed = set()
+    _refresh_lock = threading.Lock()
 
     @classproperty
     # pylint: disable=no-self-argument,attribute-defined-outside-init
     def github(cls):
         if not hasattr(cls, '_github'):
+            # imported here so importing blockers doesn't load PyGithub until an issue is fetched
+            from github import Github
+
+            # failed fetches are not retried, the default policy retries them 10 times
             token = conf.get('github', {}).get('token')
             if token is not None:
-                cls._github = Github(token)
+                cls._github = Github(token, retry=None)
             else:
-                cls._github = Github()  # Without auth max 60 req/hr
+                cls._github = Github(retry=None)  # Without auth max 60 req/hr
         return cls._github
 
     def __init__(self, description, **kwargs):
@@ -129,13 +219,109 @@ class GH(Blocker):
         else:
             raise ValueError('GH issue specified wrong')
 
+    @property
+    def identifier(self):
+        return "{}:{}".format(self.repo, self.issue)
+
+    def fetch(self):
+        """Gets issue from GitHub and stores it in the caches."""
+        # pylint: disable=no-member
+        issue = self.github.get_repo(self.repo).get_issue(self.issue)
+        data = IssueData(issue.state, issue.title, time.time())
+        self._issue_cache[self.identifier] = data
+        self._store.put(self.identifier, data)
+        return data
+
+    def _refresh(self):
+        try:
+            self.fetch()
+        except Exception as err:  # pylint: disable=broad-except
+            self._failed.add(self.identifier)
+            LOGGER.warning('Failed to refresh %s: %s', self, err)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(self.identifier)
+
+    def _refresh_in_background(self):
+        with self._refresh_lock:
+            if self.identifier in self._refreshing or self.identifier in self._failed:
+                return
+            self._refreshing.add(self.identifier)
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    @classmethod
+    def prefetch(cls, blockers, workers=8):
+        """Gets issues not cached or cached longer than ``CACHE_MAX_STALE`` concurrently.
+
+        Stale cached issues are refreshed in background.
+
+        Returns:
+            Number of issues fetched
+        """
+        if cls.OFFLINE:
+            return 0
+        pending = {}
+        now = time.time()
+        for blocker in blockers:
+            if blocker.identifier in cls._failed:
+                continue
+            data = cls._issue_cache.get(blocker.identifier) or cls._store.get(blocker.identifier)
+            if data is not None:
+                cls._issue_cache[blocker.identifier] = data
+                age = now - data.fetched
+                if age < cls.CACHE_TTL:
+                    continue
+                if age < cls.CACHE_MAX_STALE:
+                    blocker._refresh_in_background()  # pylint: disable=protected-access
+                    continue
+            pending.setdefault(blocker.identifier, blocker)
+        if not pending:
+            return 0
+        cls.github  # pylint: disable=pointless-statement
+        fetched = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(blocker.fetch): blocker for blocker in pending.values()}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                    fetched += 1
+                except Exception as err:  # pylint: disable=broad-except
+                    cls._failed.add(futures[future].identifier)
+                    LOGGER.warning('Failed to prefetch %s: %s', futures[future], err)
+        return fetched
+
     @property
     def data(self):
-        identifier = "{}:{}".format(self.repo, self.issue)
-        if identifier not in self._issue_cache:
-            # pylint: disable=no-member
-            self._issue_cache[identifier] = self.github.get_repo(self.repo).get_issue(self.issue)
-        return self._issue_cache[identifier]
+        identifier = self.identifier
+        data = self._issue_cache.get(identifier)
+        if data is None:
+            data = self._store.get(identifier)
+            if data is not None:
+                self._issue_cache[identifier] = data
+        age = time.time() - data.fetched if data is not None else None
+
+        if self.OFFLINE:
+            if data is None:
+                LOGGER.warning('%s not cached in offline mode, considered open', self)
+                data = self._issue_cache[identifier] = IssueData('open', None, 0)
+            return data
+        if identifier in self._failed:
+            return data or IssueData('open', None, 0)
+        if age is not None and age < self.CACHE_TTL:
+            return data
+        if age is not None and age < self.CACHE_MAX_STALE:
+            # stale state is served while it's being refreshed
+            self._refresh_in_background()
+            return data
+        try:
+            return self.fetch()
+        except Exception as err:  # pylint: disable=broad-except
+            self._failed.add(identifier)
+            if data is None:
+                LOGGER.warning('Failed to fetch %s, considered open: %s', self, err)
+                return IssueData('open', None, 0)
+            LOGGER.warning('Failed to refresh %s, using cached state: %s', self, err)
+            return data
 
     @property
     def blocks(self):
@@ -153,3 +339,50 @@ class GH(Blocker):
     @property
     def url(self):
         return 'https://github.com/{}/issues/{}'.format(self.repo, self.issue)
+
+
+def _gh_calls(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and \
+                node.func.id == 'GH' and len(node.args) == 1:
+            yield node
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str) and \
+                'GH(' in node.value:
+            # string conditions of ``skipif`` markers
+            try:
+                expression = ast.parse(node.value.strip(), mode='eval')
+            except SyntaxError:
+                continue
+            yield from _gh_calls(expression)
+
+
+def parse_references(source, filename='<unknown>'):
+    """Returns ``GH`` blockers referenced by literal arguments in Python source.
+
+    Calls in string conditions of ``skipif`` markers are included.
+    """
+    blockers = []
+    if 'GH(' not in source:
+        return blockers
+    for node in _gh_calls(ast.parse(source, filename)):
+        try:
+            blockers.append(GH(ast.literal_eval(node.args[0])))
+        except ValueError:
+            continue
+    return blockers
+
+
+def find_references(paths):
+    """Returns ``GH`` blockers referenced in Python files under paths."""
+    blockers = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(dirpath, filename)
+                           for dirpath, __, filenames in os.walk(path)
+                           for filename in filenames if filename.endswith('.py'))
+        else:
+            files = [path]
+        for filename in files:
+            with open(filename, encoding='utf-8') as input_file:
+                blockers.extend(parse_references(input_file.read(), filename))
+    return blockers
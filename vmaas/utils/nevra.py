@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing of package NEVRA strings and comparison of versions the same way as rpm does.
+"""
+
+import collections
+import functools
+import re
+
+
+RPM_SUFFIX = '.rpm'
+
+# last dot-separated part of NEVRA is considered arch only when it is known arch,
+# so e.g. "bash-4.2.46-28.el7" is parsed as package without arch
+ARCHES = frozenset((
+    'noarch', 'src', 'nosrc',
+    'i386', 'i486', 'i586', 'i686', 'athlon', 'geode', 'x86_64', 'amd64', 'ia32e', 'ia64',
+    'aarch64', 'armv5tel', 'armv6l', 'armv7l', 'armv7hl', 'armv7hnl',
+    'ppc', 'ppc64', 'ppc64le', 'ppc64p7', 'ppc64iseries', 'ppc64pseries',
+    's390', 's390x', 'riscv64', 'mips', 'mipsel', 'mips64', 'mips64el', 'sparc', 'sparc64',
+))
+
+NEVRA = collections.namedtuple('NEVRA', 'name epoch version release arch')
+
+# segments compared by rpmvercmp; everything else only separates segments
+_TOKEN_RE = re.compile(r'[0-9]+|[a-zA-Z]+|~|\^')
+
+
+def parse_nevra(nevra):
+    """Parses ``[epoch:]name-[epoch:]version-release[.arch][.rpm]``.
+
+    Returns:
+        ``NEVRA`` record; epoch and arch are ``None`` when they are not present.
+
+    Raises:
+        ValueError: String is not NEVRA.
+    """
+    end = len(nevra)
+    if nevra.endswith(RPM_SUFFIX):
+        end -= len(RPM_SUFFIX)
+    arch = None
+    dot = nevra.rfind('.', 0, end)
+    if dot > 0 and nevra[dot + 1:end] in ARCHES:
+        arch = nevra[dot + 1:end]
+        end = dot
+    release_dash = nevra.rfind('-', 0, end)
+    version_dash = nevra.rfind('-', 0, release_dash) if release_dash > 0 else -1
+    if version_dash <= 0 or release_dash == end - 1 or version_dash == release_dash - 1:
+        raise ValueError('Not a NEVRA: {!r}'.format(nevra))
+
+    name = nevra[:version_dash]
+    version = nevra[version_dash + 1:release_dash]
+    epoch = None
+    colon = version.find(':')
+    if colon >= 0:
+        epoch = version[:colon]
+        version = version[colon + 1:]
+    elif ':' in name:
+        # yum style epoch before name
+        epoch, name = name.split(':', 1)
+    if epoch is not None:
+        if not epoch.isdigit():
+            raise ValueError('Invalid epoch in {!r}'.format(nevra))
+        epoch = int(epoch)
+    if not name or not version:
+        raise ValueError('Not a NEVRA: {!r}'.format(nevra))
+    return NEVRA(name, epoch, version, nevra[release_dash + 1:end], arch)
+
+
+def parse_evr(evr):
+    """Parses ``[epoch:]version[-release]`` to ``(epoch, version, release)`` tuple.
+
+    Missing epoch is returned as ``None``, missing release as ``None``.
+    """
+    epoch = None
+    colon = evr.find(':')
+    if colon >= 0:
+        epoch = int(evr[:colon])
+        evr = evr[colon + 1:]
+    version, __, release = evr.partition('-')
+    return epoch, version, release or None
+
+
+@functools.lru_cache(maxsize=65536)
+def _tokens(value):
+    return tuple(_TOKEN_RE.findall(value))
+
+
+@functools.lru_cache(maxsize=65536)
+def rpmvercmp(first, second):
+    """Compares two version (or release) strings like ``rpmvercmp`` from rpm.
+
+    Returns:
+        1 when first is newer, 0 when they are equal, -1 when second is newer.
+    """
+    if first == second:
+        return 0
+    # there are much less distinct versions than their pairs, tokens are cached separately
+    first_tokens = _tokens(first)
+    second_tokens = _tokens(second)
+    first_len = len(first_tokens)
+    second_len = len(second_tokens)
+    for index in range(max(first_len, second_len)):
+        one = first_tokens[index] if index < first_len else None
+        two = second_tokens[index] if index < second_len else None
+        # tilde sorts before everything, even the end of string
+        if one == '~' or two == '~':
+            if one != '~':
+                return 1
+            if two != '~':
+                return -1
+            continue
+        # caret sorts after the end of string, but before anything else
+        if one == '^' or two == '^':
+            if one is None:
+                return -1
+            if two is None:
+                return 1
+            if one != '^':
+                return 1
+            if two != '^':
+                return -1
+            continue
+        # version with segments left is newer
+        if one is None:
+            return -1
+        if two is None:
+            return 1
+        one_numeric = one[0].isdigit()
+        if one_numeric != two[0].isdigit():
+            # numeric segment is newer than alphabetic one
+            return 1 if one_numeric else -1
+        if one_numeric:
+            one = one.lstrip('0')
+            two = two.lstrip('0')
+            if len(one) != len(two):
+                return 1 if len(one) > len(two) else -1
+        if one != two:
+            return 1 if one > two else -1
+    return 0
+
+
+def evr_cmp(first, second):
+    """Compares ``(epoch, version, release)`` tuples like rpm.
+
+    Missing epoch is the same as epoch 0; release is compared only when it is
+    present in both tuples.
+    """
+    first_epoch = first[0] or 0
+    second_epoch = second[0] or 0
+    if first_epoch != second_epoch:
+        return 1 if first_epoch > second_epoch else -1
+    result = rpmvercmp(first[1], second[1])
+    if result or first[2] is None or second[2] is None:
+        return result
+    return rpmvercmp(first[2], second[2])
+
+
+# sort key for ``(epoch, version, release)`` tuples
+evr_key = functools.cmp_to_key(evr_cmp)
+
+
+def nevra_cmp(first, second):
+    """Compares versions of two NEVRA strings or ``NEVRA`` records, names are ignored."""
+    if isinstance(first, str):
+        first = parse_nevra(first)
+    if isinstance(second, str):
+        second = parse_nevra(second)
+    return evr_cmp(first[1:4], second[1:4])
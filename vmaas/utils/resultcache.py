@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Change-aware caching of passed functional tests.
+
+Fingerprint of every test consists of its source (test function, parameters,
+helpers and fixtures of its module and class, ``conftest.py`` files and the shared
+REST helpers), of the state of the GitHub issues blocking it and of the
+``dbchange`` timestamp of the data the test module queries. Passed tests are
+stored in the pytest cache together with the request bodies they sent. Test which
+passed twice with the same fingerprint and the same request bodies is skipped in
+the next runs until its source, its blockers or the data change. Tests whose
+request bodies differ between runs (e.g. relative ``modified_since``) are never
+skipped, as well as tests of modules without known ``dbchange`` timestamp (sync
+tests).
+"""
+
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import os
+import textwrap
+
+import pytest
+
+
+CACHE_KEY = 'vmaas/passed'
+
+# ``dbchange`` timestamp of data queried by the test module
+MODULE_TIMESTAMPS = {
+    'test_cves.py': 'cve_changes',
+    'test_errata.py': 'errata_changes',
+    'test_repos.py': 'repository_changes',
+    'test_updates.py': 'last_change',
+    'test_tier2_udpates.py': 'last_change',
+}
+
+# modules the outcome of every test depends on
+SUPPORT_MODULES = ('vmaas.rest.client', 'vmaas.rest.schemas', 'vmaas.rest.tools',
+                   'vmaas.misc.packages')
+
+
+def _digest(*parts):
+    hashed = hashlib.sha256()
+    for part in parts:
+        hashed.update(part.encode('utf-8'))
+        hashed.update(b'\0')
+    return hashed.hexdigest()
+
+
+def _support_sources():
+    sources = []
+    for name in SUPPORT_MODULES:
+        module = __import__(name, fromlist=['__name__'])
+        with open(module.__file__, encoding='utf-8') as source:
+            sources.append(source.read())
+    return sources
+
+
+def support_hash():
+    """Returns hash of the sources of ``SUPPORT_MODULES``."""
+    return _digest(*_support_sources())
+
+
+@functools.lru_cache(maxsize=None)
+def _parse(path):
+    with open(path, encoding='utf-8') as source:
+        return ast.parse(source.read(), path)
+
+
+def _is_test(node):
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return node.name.startswith('test')
+    return isinstance(node, ast.ClassDef) and node.name.startswith('Test')
+
+
+@functools.lru_cache(maxsize=None)
+def helpers_hash(path, class_name=None):
+    """Returns hash of everything in the test module (and class) but the tests."""
+    tree = _parse(path)
+    parts = [ast.dump(node) for node in tree.body if not _is_test(node)]
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            parts.extend(ast.dump(decorator) for decorator in node.decorator_list)
+            parts.extend(ast.dump(member) for member in node.body if not _is_test(member))
+    return _digest(*parts)
+
+
+@functools.lru_cache(maxsize=None)
+def conftest_hash(path, rootdir):
+    """Returns hash of ``conftest.py`` files from rootdir down to the test module."""
+    sources = []
+    directory = os.path.dirname(os.path.abspath(path))
+    rootdir = os.path.abspath(rootdir)
+    while True:
+        conftest = os.path.join(directory, 'conftest.py')
+        if os.path.exists(conftest):
+            with open(conftest, encoding='utf-8') as source:
+                sources.append(source.read())
+        parent = os.path.dirname(directory)
+        if directory == rootdir or parent == directory:
+            break
+        directory = parent
+    return _digest(*sources)
+
+
+def source_hash(item, support=''):
+    """Returns hash of the test function source, its parameters and helpers."""
+    try:
+        source = inspect.getsource(item.function)
+    except (OSError, TypeError):
+        source = ''
+    callspec = getattr(item, 'callspec', None)
+    params = repr(sorted(callspec.params.items())) if callspec else ''
+    path = str(item.fspath)
+    cls = getattr(item, 'cls', None)
+    helpers = helpers_hash(path, cls.__name__ if cls is not None else None)
+    conftests = conftest_hash(path, str(item.config.rootdir))
+    return _digest(item.nodeid, source, params, helpers, conftests, support)
+
+
+def referenced_blockers(item):
+    """Returns identifiers of GitHub issues referenced by the test and its skipif markers."""
+    # imported here so the module can be imported without the blockers deps
+    from vmaas.utils import blockers
+
+    try:
+        source = textwrap.dedent(inspect.getsource(item.function))
+    except (OSError, TypeError):
+        source = ''
+    found = blockers.parse_references(source)
+    for mark in item.iter_markers('skipif'):
+        for condition in mark.args:
+            if isinstance(condition, str):
+                found.extend(blockers.parse_references(condition))
+    return {blocker.identifier: blocker for blocker in found}
+
+
+def blockers_state(found):
+    """Returns states of the blockers as ``['owner/repo:issue=state']``."""
+    return sorted('{}={}'.format(identifier, blocker.data.state)
+                  for identifier, blocker in found.items())
+
+
+def bodies_hash(bodies):
+    """Returns hash of request bodies sent by the test."""
+    return _digest(*(json.dumps(body, sort_keys=True, default=str) for body in bodies))
+
+
+class ResultCachePlugin(object):
+    """Pytest plugin skipping tests that passed with the same fingerprint.
+
+    Args:
+        config: Pytest config, its cache stores the passed tests
+    """
+    def __init__(self, config):
+        self.config = config
+        self.passed = config.cache.get(CACHE_KEY, {})
+        self.timestamps = None
+        self.fingerprints = {}
+        self.bodies = {}
+        self.outcomes = {}
+        self.cached = set()
+        self._test = None
+        self._patched = None
+
+    @staticmethod
+    def get_timestamps():
+        """Returns ``dbchange`` timestamps, ``None`` when unavailable."""
+        # imported here so the module can be imported without the REST client deps
+        from vmaas.rest import tools
+
+        try:
+            # pylint: disable=no-member
+            body = tools.rest_api().get_dbchange().raw.body
+        except Exception:  # pylint: disable=broad-except
+            return None
+        return body if isinstance(body, dict) else None
+
+    def install(self):
+        """Wraps REST client actions to record request bodies of the running test."""
+        from vmaas.rest import client
+
+        plugin = self
+        original = client.VMaaSClient.__dict__['_wrap_action'].__func__
+
+        def _wrap_action(api_obj, action_name, cassette=None):
+            action = original(api_obj, action_name, cassette)
+
+            def wrapper(*args, **kwargs):
+                if plugin._test is not None:
+                    plugin.bodies[plugin._test].append(
+                        [action_name, list(args), kwargs.get('body')])
+                return action(*args, **kwargs)
+            return wrapper
+
+        self._patched = staticmethod(original)
+        client.VMaaSClient._wrap_action = staticmethod(_wrap_action)
+
+    def uninstall(self):
+        """Restores REST client."""
+        if self._patched is not None:
+            from vmaas.rest import client
+
+            client.VMaaSClient._wrap_action = self._patched
+            self._patched = None
+
+    def pytest_configure(self, config):  # pylint: disable=unused-argument
+        self.install()
+
+    def pytest_unconfigure(self, config):  # pylint: disable=unused-argument
+        self.uninstall()
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        # pylint: disable=unused-argument
+        if config.option.collectonly:
+            return
+        self.timestamps = self.get_timestamps()
+        if self.timestamps is None:
+            return
+        # imported here so the module can be imported without the blockers deps
+        from vmaas.utils import blockers
+
+        support = support_hash()
+        # blockers of the schemas apply to every test
+        support_blockers = {}
+        for source in _support_sources():
+            support_blockers.update(
+                (blocker.identifier, blocker) for blocker in blockers.parse_references(source))
+        for item in items:
+            key = MODULE_TIMESTAMPS.get(os.path.basename(str(item.fspath)))
+            if key is None or not self.timestamps.get(key):
+                continue
+            referenced = dict(support_blockers)
+            referenced.update(referenced_blockers(item))
+            fingerprint = {'source': source_hash(item, support), 'key': key,
+                           'timestamp': self.timestamps[key],
+                           'blockers': blockers_state(referenced)}
+            self.fingerprints[item.nodeid] = fingerprint
+            cached = self.passed.get(item.nodeid)
+            if cached and cached.get('stable') and \
+                    all(cached.get(name) == value for name, value in fingerprint.items()):
+                self.cached.add(item.nodeid)
+                item.add_marker(pytest.mark.skip(
+                    reason='passed with the same source, blockers and {} {}'.format(
+                        key, fingerprint['timestamp'])))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):  # pylint: disable=unused-argument
+        self._test = item.nodeid
+        self.bodies[item.nodeid] = []
+        try:
+            yield
+        finally:
+            self._test = None
+
+    def pytest_runtest_logreport(self, report):
+        if report.nodeid not in self.fingerprints or report.nodeid in self.cached:
+            return
+        if report.failed or report.skipped:
+            self.outcomes[report.nodeid] = False
+        elif report.when == 'call':
+            self.outcomes.setdefault(report.nodeid, True)
+
+    def pytest_sessionfinish(self, session):  # pylint: disable=unused-argument
+        if self.timestamps is None:
+            return
+        # timestamps moved by sync tests during the session invalidate the results
+        current = self.get_timestamps() or {}
+        for nodeid, fingerprint in self.fingerprints.items():
+            outcome = self.outcomes.get(nodeid)
+            if outcome is None:
+                # cached or not run at all
+                continue
+            if not outcome:
+                self.passed.pop(nodeid, None)
+                continue
+            if current.get(fingerprint['key']) != fingerprint['timestamp']:
+                continue
+            fingerprint['bodies'] = bodies_hash(self.bodies.get(nodeid, []))
+            cached = self.passed.get(nodeid)
+            same_source = bool(cached) and cached.get('source') == fingerprint['source']
+            # requests differing between runs make the result not reusable
+            fingerprint['volatile'] = same_source and (
+                cached.get('volatile', False) or cached.get('bodies') != fingerprint['bodies'])
+            fingerprint['stable'] = same_source and not fingerprint['volatile']
+            self.passed[nodeid] = fingerprint
+        self.config.cache.set(CACHE_KEY, self.passed)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.timestamps is None:
+            terminalreporter.write_line('Result cache: dbchange not available, nothing cached')
+        else:
+            terminalreporter.write_line(
+                'Result cache: {} tests skipped as passed with the same fingerprint'.format(
+                    len(self.cached)))
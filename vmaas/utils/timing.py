@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Per-test time breakdown of the functional tests.
+
+The plugin wraps the REST client and validators while the test run lasts and
+attributes wall time of every test to phases:
+
+* ``network`` - REST API calls, including decoding of the HTTP response body
+* ``decode`` - building ``ResponseContainer`` and resources out of response data
+* ``validation`` - ``tools`` validators and ``schema`` validation
+* ``fixtures`` - setup of fixtures (without the phases above called by them)
+* ``other`` - rest of the test wall time, i.e. test code and pytest itself
+
+Nested phases are counted only once, time of the inner phase is subtracted from
+the outer one. Optionally the phases are exported as Chrome trace events, viewable
+in ``chrome://tracing`` or Perfetto.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import time
+
+import pytest
+
+
+PHASES = ('network', 'decode', 'validation', 'fixtures')
+
+# ``vmaas.rest.tools`` functions timed as validation
+VALIDATORS = (
+    'validate_package_updates',
+    'check_updates_uniq',
+    'check_updates_newer',
+    'check_expected_updates_content',
+    'checks_expected_updates_number',
+    'validate_cves',
+    'cve_match',
+)
+
+
+class PhaseRecorder(object):
+    """Records exclusive time of nested phases per test.
+
+    Args:
+        trace: Whether trace events are kept
+    """
+    def __init__(self, trace=False):
+        self.test = None
+        self.tests = collections.OrderedDict()
+        self.labels = collections.defaultdict(lambda: [0, 0.0])
+        self.events = [] if trace else None
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, phase, label):
+        """Times the block as ``phase``; reentrant calls of the same label are ignored."""
+        if any(frame[0] == phase and frame[1] == label for frame in self._stack):
+            yield
+            return
+        frame = [phase, label, 0.0]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][2] += duration
+            self.add(phase, label, duration - frame[2], start, duration)
+
+    def add(self, phase, label, exclusive, start=None, duration=None):
+        """Adds exclusive time of phase to the current test."""
+        if self.test is not None:
+            times = self.tests.setdefault(self.test, collections.defaultdict(float))
+            times[phase] += exclusive
+        stats = self.labels[(phase, label)]
+        stats[0] += 1
+        stats[1] += exclusive
+        if self.events is not None and start is not None:
+            self.events.append(self._event(label, phase, start, duration))
+
+    def _event(self, name, category, start, duration):
+        return {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': os.getpid(),
+            'tid': 1,
+            'args': {'test': self.test},
+        }
+
+    @contextlib.contextmanager
+    def running(self, nodeid):
+        """Attributes phases inside the block to the test."""
+        self.test = nodeid
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            times = self.tests.setdefault(nodeid, collections.defaultdict(float))
+            times['total'] = duration
+            times['other'] = max(duration - sum(times[phase] for phase in PHASES), 0.0)
+            if self.events is not None:
+                event = self._event(nodeid, 'test', start, duration)
+                event['tid'] = 0
+                self.events.append(event)
+            self.test = None
+
+    def write_trace(self, path):
+        """Writes recorded events in Chrome trace event format."""
+        with open(path, 'w') as out:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, out)
+
+
+def _timed(recorder, phase, label, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with recorder.phase(phase, label):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class TimingPlugin(object):
+    """Pytest plugin printing slowest tests and phases at the end of the run.
+
+    Args:
+        top: How many slowest tests and labels of every phase are printed
+        trace: Path of the Chrome trace file or ``None``
+    """
+    def __init__(self, top=10, trace=None):
+        self.top = top
+        self.trace = trace
+        self.recorder = PhaseRecorder(trace=bool(trace))
+        self._patched = []
+
+    def _patch(self, owner, name, phase, label=None):
+        original = owner.__dict__[name]
+        func = original.__func__ if isinstance(original, staticmethod) else original
+        wrapped = _timed(self.recorder, phase, label or name, func)
+        setattr(owner, name, staticmethod(wrapped) if isinstance(original, staticmethod)
+                else wrapped)
+        self._patched.append((owner, name, original))
+
+    def _wrap_action_patch(self, client):
+        recorder = self.recorder
+        original = client.VMaaSClient.__dict__['_wrap_action'].__func__
+
+        def _wrap_action(api_obj, action_name, cassette=None):
+            return _timed(recorder, 'network', action_name,
+                          original(api_obj, action_name, cassette))
+
+        self._patched.append((client.VMaaSClient, '_wrap_action', staticmethod(original)))
+        client.VMaaSClient._wrap_action = staticmethod(_wrap_action)
+
+    def install(self):
+        """Wraps client and validators."""
+        # imported here so the module can be imported without the REST client deps
+        import schema
+        from vmaas.rest import client, tools
+
+        self._wrap_action_patch(client)
+        self._patch(client.ResponseContainer, 'load', 'decode', 'ResponseContainer.load')
+        self._patch(client.Resource, 'load', 'decode', 'Resource.load')
+        for name in VALIDATORS:
+            self._patch(tools, name, 'validation')
+        self._patch(schema.Schema, 'validate', 'validation', 'Schema.validate')
+
+    def uninstall(self):
+        """Restores wrapped functions."""
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def pytest_configure(self, config):  # pylint: disable=unused-argument
+        self.install()
+
+    def pytest_unconfigure(self, config):  # pylint: disable=unused-argument
+        self.uninstall()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):  # pylint: disable=unused-argument
+        with self.recorder.running(item.nodeid):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):  # pylint: disable=unused-argument
+        with self.recorder.phase('fixtures', fixturedef.argname):
+            yield
+
+    def pytest_terminal_summary(self, terminalreporter):
+        write = terminalreporter.write_line
+        tests = self.recorder.tests
+        columns = ('total',) + PHASES + ('other',)
+        terminalreporter.section('time breakdown')
+        write('{:<60} '.format('slowest tests (s)') + ' '.join(
+            '{:>10}'.format(column) for column in columns))
+        slowest = sorted(tests.items(), key=lambda item: item[1]['total'], reverse=True)
+        for nodeid, times in slowest[:self.top]:
+            write('{:<60} '.format(nodeid[-60:]) + ' '.join(
+                '{:>10.3f}'.format(times[column]) for column in columns))
+        write('{:<60} '.format('all tests') + ' '.join(
+            '{:>10.3f}'.format(sum(times[column] for times in tests.values()))
+            for column in columns))
+
+        write('')
+        write('{:<12} {:<48} {:>8} {:>10}'.format('phase', 'slowest calls', 'count', 'total s'))
+        for phase in PHASES:
+            labels = sorted(((label, stats) for (label_phase, label), stats in
+                             self.recorder.labels.items() if label_phase == phase),
+                            key=lambda item: item[1][1], reverse=True)
+            for label, (count, total) in labels[:self.top]:
+                write('{:<12} {:<48} {:>8} {:>10.3f}'.format(phase, label[-48:], count, total))
+
+        if self.trace:
+            self.recorder.write_trace(self.trace)
+            write('')
+            write('Trace: {}'.format(self.trace))